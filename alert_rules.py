@@ -0,0 +1,264 @@
+import json
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import instruments
+from models import FundingRate, Opportunity
+
+# User-defined alert conditions, compiled once and evaluated in a single pass over each snapshot.
+# Rates are percent per 8h funding round: main scales hourly venues (scheduler.FUNDING_HOURS)
+# before anything is compared, so spreads never mix bases. APR = rate * 3 * 365.
+#
+# Rule spec (JSON, from ALERT_RULES: inline JSON or a path to a JSON file):
+#   {"type": "rate",   "min": 0.05}                     one venue's rate above a threshold
+#   {"type": "apr",    "min": 60, "exchanges": [...]}   same, expressed as APR %
+#   {"type": "spread", "min": 0.04, "symbols": [...]}   max - min rate for a base asset across venues
+#                                                       and instruments (BTCUSDT vs BTCUSD_INV)
+#   {"type": "top_n",  "n": 5}                          a (symbol, venue) newly entering the top N
+#   {"type": "persistent_apr", "min": 40}               persistence-adjusted APR (rolling.py) above a threshold
+# Optional on every rule: "name", "cooldown" (seconds, default 1800), "hysteresis" (fraction of
+# "min" the value must fall below the threshold before the rule re-arms, default 0.2; for top_n,
+# ranks beyond N an entry may slip before it counts as having left, default 2).
+# Optional on rate / apr rules: "min_depth" (USD of bid depth near the top of the book). Depth is
+# only measured for the top-K opportunities (see depth.py), so such a rule never fires for rows
+# outside them or on venues without a book endpoint. top_n ranks already account for depth.
+# Optional on rate / apr / persistent_apr rules: "min_streak" (consecutive positive settlements).
+# "symbols" takes instruments (BTCUSDT) or base assets (BTC, every quote); spread rules match on
+# the base of either.
+
+PERIODS_PER_YEAR = 3 * 365
+DEFAULT_COOLDOWN = 1800.0
+DEFAULT_HYSTERESIS = 0.2
+
+DEFAULT_RULES = [
+    {"type": "apr", "min": 50},
+    {"type": "top_n", "n": 5},
+]
+
+
+class AlertEvent(NamedTuple):
+    rule: str
+    kind: str
+    symbol: str
+    exchange: str
+    value: float        # the measured rate / spread (percent per round), persistent APR (%) or rank
+    threshold: float
+    detail: str = ""
+
+
+class _Threshold(NamedTuple):
+    name: str
+    fire_at: float
+    clear_below: float
+    cooldown: float
+    exchanges: Optional[frozenset]
+    symbols: Optional[frozenset]
+    min_depth: float = 0.0
+    min_streak: int = 0
+
+
+class _Row(NamedTuple):
+    exchange: str
+    symbol: str
+    rate: float
+
+
+class _TopN(NamedTuple):
+    name: str
+    n: int
+    exit_rank: int
+    cooldown: float
+
+
+def _names(spec: Dict, field: str) -> Optional[frozenset]:
+    values = spec.get(field)
+    return frozenset(values) if values else None
+
+
+def load_rule_specs(source: Optional[str] = None) -> List[Dict]:
+    source = source if source is not None else os.getenv("ALERT_RULES", "")
+    if not source.strip():
+        return list(DEFAULT_RULES)
+    if os.path.exists(source):
+        with open(source) as f:
+            return json.load(f)
+    return json.loads(source)
+
+
+class RuleEngine:
+    """
+    Compiled rule set plus per-(rule, key) alert state. `evaluate` makes one pass over the
+    snapshot rows and returns only the transitions that should be sent: a condition fires when
+    it becomes true, re-arms only once the value falls below the hysteresis band, and never
+    fires again for the same key within its cooldown.
+    """
+    def __init__(self, specs: Iterable[Dict]):
+        self.rates: List[_Threshold] = []
+        self.spreads: List[_Threshold] = []
+        self.persistent: List[_Threshold] = []
+        self.top_ns: List[_TopN] = []
+        for i, spec in enumerate(specs):
+            self._compile(i, spec)
+        # Row rules sorted by threshold so the scan can stop at the first one a row misses
+        self.rates.sort(key=lambda r: r.fire_at)
+        self.min_rate = self.rates[0].fire_at if self.rates else float("inf")
+        self.uses_depth = any(r.min_depth for r in self.rates)
+        self.uses_streak = any(r.min_streak for r in self.rates)
+
+        self.active: Dict[tuple, bool] = {}
+        self.armed_rows: set = set()     # (symbol, exchange) with any active row rule
+        self.last_fired: Dict[tuple, float] = {}
+        self.top_members: Dict[str, set] = {}
+
+    def _compile(self, i: int, spec: Dict):
+        kind = spec.get("type")
+        name = spec.get("name") or f"{kind}#{i}"
+        cooldown = float(spec.get("cooldown", DEFAULT_COOLDOWN))
+        if kind in ("rate", "apr", "spread", "persistent_apr"):
+            threshold = float(spec["min"])
+            if kind == "apr":
+                threshold /= PERIODS_PER_YEAR
+            band = float(spec.get("hysteresis", DEFAULT_HYSTERESIS))
+            if "min_depth" in spec and kind not in ("rate", "apr"):
+                raise ValueError(f"min_depth applies to rate / apr rules, not {name!r}")
+            if "min_streak" in spec and kind == "spread":
+                raise ValueError(f"min_streak applies to rate / apr / persistent_apr rules, not {name!r}")
+            symbols = _names(spec, "symbols")
+            if symbols and kind == "spread":
+                symbols = frozenset(instruments.base(s) for s in symbols)
+            rule = _Threshold(name, threshold, threshold - abs(threshold) * band, cooldown,
+                              _names(spec, "exchanges"), symbols, float(spec.get("min_depth", 0.0)),
+                              int(spec.get("min_streak", 0)))
+            {"spread": self.spreads, "persistent_apr": self.persistent}.get(kind, self.rates).append(rule)
+        elif kind == "top_n":
+            n = int(spec.get("n", 5))
+            self.top_ns.append(_TopN(name, n, n + int(spec.get("hysteresis", 2)), cooldown))
+        else:
+            raise ValueError(f"unknown alert rule type: {kind!r}")
+
+    @classmethod
+    def from_env(cls) -> "RuleEngine":
+        return cls(load_rule_specs())
+
+    def _transition(self, key: tuple, value: float, rule: _Threshold, now: float) -> bool:
+        if value >= rule.fire_at:
+            if self.active.get(key):
+                return False
+            self.active[key] = True
+            if now - self.last_fired.get(key, float("-inf")) < rule.cooldown:
+                return False
+            self.last_fired[key] = now
+            return True
+        if value < rule.clear_below:
+            self.active.pop(key, None)
+        return False
+
+    def evaluate(self, opportunities: List[Opportunity], rates: Optional[List[FundingRate]], now: float) -> List[AlertEvent]:
+        events: List[AlertEvent] = []
+        rate_rules, spread_rules, min_rate, armed = self.rates, self.spreads, self.min_rate, self.armed_rows
+
+        # Single pass over the rows: per-row thresholds, and per-base extremes for spreads
+        extremes: Dict[str, list] = {}
+        base_of = instruments.base
+        depths: Dict[tuple, float] = {}
+        if self.uses_depth:
+            depths = {(o.symbol, o.long_exchange): o.depth for o in opportunities if o.depth is not None}
+        streaks: Dict[tuple, int] = {}
+        if self.uses_streak:
+            streaks = {(o.symbol, o.long_exchange): o.streak for o in opportunities if o.streak}
+        rows = rates if rates is not None else [_Row(o.long_exchange, o.symbol, o.long_rate) for o in opportunities]
+        missing = set(armed)     # Armed rows not in this snapshot (venue down, quarantined, delisted)
+        for r in rows:
+            if spread_rules:
+                base = base_of(r.symbol)
+                ext = extremes.get(base)
+                if ext is None:
+                    extremes[base] = [r, r]
+                elif r.rate > ext[0].rate:
+                    ext[0] = r
+                elif r.rate < ext[1].rate:
+                    ext[1] = r
+            row = (r.symbol, r.exchange)
+            if missing:
+                missing.discard(row)
+            if r.rate < min_rate and row not in armed:
+                continue
+            for rule in rate_rules:
+                if r.rate < rule.fire_at and row not in armed:
+                    break
+                if rule.exchanges and r.exchange not in rule.exchanges:
+                    continue
+                if rule.symbols and r.symbol not in rule.symbols and base_of(r.symbol) not in rule.symbols:
+                    continue
+                if rule.min_depth and depths.get(row, 0.0) < rule.min_depth:
+                    continue
+                if rule.min_streak and streaks.get(row, 0) < rule.min_streak:
+                    continue
+                key = (rule.name, r.symbol, r.exchange)
+                if self._transition(key, r.rate, rule, now):
+                    events.append(AlertEvent(rule.name, "rate", r.symbol, r.exchange, r.rate, rule.fire_at))
+            if any((rule.name, r.symbol, r.exchange) in self.active for rule in rate_rules):
+                armed.add(row)
+            else:
+                armed.discard(row)
+        # A row that left the snapshot re-arms like one that fell below the band, so it alerts
+        # again (cooldown permitting) when it comes back above the threshold
+        for symbol, exchange in missing:
+            armed.discard((symbol, exchange))
+            for rule in rate_rules:
+                self.active.pop((rule.name, symbol, exchange), None)
+
+        for base, (hi, lo) in extremes.items():
+            spread = hi.rate - lo.rate
+            for rule in spread_rules:
+                if rule.symbols and base not in rule.symbols:
+                    continue
+                key = (rule.name, base)
+                if self._transition(key, spread, rule, now):
+                    events.append(AlertEvent(rule.name, "spread", base, f"{hi.exchange}/{lo.exchange}", spread, rule.fire_at,
+                                             f"{hi.symbol} {hi.rate:+.4f}% vs {lo.symbol} {lo.rate:+.4f}%"))
+        if spread_rules:
+            names = {rule.name for rule in spread_rules}
+            for key in [k for k in self.active if len(k) == 2 and k[0] in names and k[1] not in extremes]:
+                del self.active[key]
+
+        # Persistence-adjusted APR, on the opportunities that carry rolling statistics
+        for rule in self.persistent:
+            present = set()
+            for o in opportunities:
+                if o.persistent_apr is None:
+                    continue
+                if rule.exchanges and o.long_exchange not in rule.exchanges:
+                    continue
+                if rule.symbols and o.symbol not in rule.symbols and o.base not in rule.symbols:
+                    continue
+                if rule.min_streak and (o.streak or 0) < rule.min_streak:
+                    continue
+                key = (rule.name, o.symbol, o.long_exchange)
+                present.add(key)
+                if self._transition(key, o.persistent_apr, rule, now):
+                    events.append(AlertEvent(rule.name, "persistent_apr", o.symbol, o.long_exchange, o.persistent_apr,
+                                             rule.fire_at, f"{o.streak} positive settlements"))
+            # A row that left the positives (or lost its stats) re-arms like one that fell below the band
+            for key in [k for k in self.active if k[0] == rule.name and k not in present]:
+                del self.active[key]
+
+        # Opportunities arrive sorted best-first, so ranks are list positions
+        for rule in self.top_ns:
+            current = {(o.symbol, o.long_exchange): rank for rank, o in
+                       enumerate(opportunities[:rule.exit_rank], 1)}
+            members = self.top_members.get(rule.name)
+            if members is not None:
+                for (symbol, exchange), rank in current.items():
+                    if rank > rule.n or (symbol, exchange) in members:
+                        continue
+                    key = (rule.name, symbol, exchange)
+                    if now - self.last_fired.get(key, float("-inf")) < rule.cooldown:
+                        continue
+                    self.last_fired[key] = now
+                    o = opportunities[rank - 1]
+                    events.append(AlertEvent(rule.name, "top_n", symbol, exchange, o.long_rate, rule.n, f"#{rank}"))
+            # Entries stay members while within the exit band; a seed pass never alerts
+            kept = {k for k in (members or ()) if k in current}
+            self.top_members[rule.name] = kept | {k for k, rank in current.items() if rank <= rule.n}
+        return events
@@ -0,0 +1,400 @@
+import heapq
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import uuid
+import zlib
+import logging
+import re
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("Archive")
+logger.setLevel(logging.INFO)
+
+# Segment layout:
+#   [magic][u32 index length][zlib(JSON index)][block][block]...
+# One block per symbol holding its columns back to back (snapshot_ts, ts, rate, price),
+# each a float64 array, zlib-compressed together. The index maps symbol -> (offset, length, rows)
+# so a reader seeks straight to one symbol's block and never inflates the others.
+# Files are partitioned as <root>/<YYYY-MM-DD>/<exchange>/seg-*.dcol (UTC day of the snapshot).
+#
+# Compaction is tiered: flushed segments are level 0, and `min_segments` segments of one level
+# merge into one of the next (seg-<ms>-<uuid>-c<level>.dcol, named after the oldest input). The
+# level is its own dash-separated field after the hex uuid, so no flushed name can parse as one.
+# Each row is rewritten once per level, so a day costs log_min_segments(flushes) rewrites per
+# row instead of one per pass.
+MAGIC = b"DNCOL001"
+PREAMBLE = struct.Struct("<8sI")
+COLUMNS = ("snapshot_ts", "ts", "rate", "price")
+SEGMENT_SUFFIX = ".dcol"
+
+Row = Tuple[float, str, str, float, float, float]   # snapshot_ts, exchange, symbol, ts, rate, price
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _new_columns() -> Dict[str, array]:
+    return {c: array("d") for c in COLUMNS}
+
+
+def write_segment(path: str, blocks: Dict[str, Dict[str, array]]):
+    """Writes {symbol: {column: array('d')}} as one segment, atomically."""
+    index, payload, offset = {}, [], 0
+    t0, t1 = float("inf"), float("-inf")
+    for symbol in sorted(blocks):
+        cols = blocks[symbol]
+        rows = len(cols["snapshot_ts"])
+        if not rows:
+            continue
+        raw = b"".join(cols[c].tobytes() for c in COLUMNS)
+        packed = zlib.compress(raw, 6)
+        index[symbol] = [offset, len(packed), rows]
+        payload.append(packed)
+        offset += len(packed)
+        t0 = min(t0, min(cols["snapshot_ts"]))
+        t1 = max(t1, max(cols["snapshot_ts"]))
+
+    if not index:
+        return
+    header = zlib.compress(json.dumps({"t0": t0, "t1": t1, "symbols": index}).encode())
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, len(header)))
+        f.write(header)
+        for block in payload:
+            f.write(block)
+    os.replace(tmp, path)
+
+
+class Segment:
+    def __init__(self, path: str):
+        self.path = path
+        # Held open from listing until close(): a compaction removing the file in between does not
+        # pull it from under a query (an unlinked file stays readable through an open handle)
+        self._file = open(path, "rb")
+        try:
+            magic, header_len = PREAMBLE.unpack(self._file.read(PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an archive segment")
+            meta = json.loads(zlib.decompress(self._file.read(header_len)))
+        except BaseException:
+            self._file.close()
+            raise
+        self.t0 = meta["t0"]
+        self.t1 = meta["t1"]
+        self.symbols: Dict[str, list] = meta["symbols"]
+        self._data_start = PREAMBLE.size + header_len
+
+    def close(self):
+        self._file.close()
+
+    def read(self, symbol: str) -> Optional[Dict[str, array]]:
+        entry = self.symbols.get(symbol)
+        if entry is None:
+            return None
+        offset, length, rows = entry
+        self._file.seek(self._data_start + offset)
+        raw = zlib.decompress(self._file.read(length))
+        cols, width = {}, rows * 8
+        for i, c in enumerate(COLUMNS):
+            col = array("d")
+            col.frombytes(raw[i * width:(i + 1) * width])
+            cols[c] = col
+        return cols
+
+    def read_all(self) -> Dict[str, Dict[str, array]]:
+        return {s: self.read(s) for s in self.symbols}
+
+
+class SnapshotArchive:
+    """
+    Background archive writer. `submit` only enqueues the snapshot; conversion, compression,
+    disk I/O and compaction all happen on the worker thread.
+    """
+    def __init__(self, root: str, flush_rows: int = 200_000, flush_interval: float = 300.0,
+                 compact_interval: float = 900.0, compact_min_segments: int = 8, max_pending: int = 256):
+        self.root = root
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self.compact_min_segments = compact_min_segments
+
+        self.queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+        self.segments_written = 0
+        self.segments_compacted = 0
+
+        # (day, exchange) -> symbol -> columns
+        self._buffers: Dict[Tuple[str, str], Dict[str, Dict[str, array]]] = {}
+        self._buffered_rows = 0
+        self._last_flush = time.monotonic()
+        self._last_compact = time.monotonic()
+
+        os.makedirs(root, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="archive-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, snapshot_ts: float, rates: List):
+        try:
+            self.queue.put_nowait((snapshot_ts, rates))
+        except queue.Full:
+            # Never block the fetch loop on disk; losing a snapshot is preferable
+            self.dropped += 1
+
+    def close(self, timeout: float = 30.0):
+        self.queue.put(None)
+        self._thread.join(timeout)
+
+    # WORKER
+
+    def _run(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=1.0)
+            except queue.Empty:
+                item = False
+            if item is None:
+                self._flush()
+                return
+            try:
+                if item:
+                    self._buffer(*item)
+                now = time.monotonic()
+                if self._buffered_rows >= self.flush_rows or (self._buffered_rows and now - self._last_flush >= self.flush_interval):
+                    self._flush()
+                if now - self._last_compact >= self.compact_interval:
+                    self._last_compact = now
+                    self.compact()
+            except Exception as e:
+                logger.error(f"Archive worker error: {e}")
+
+    def _buffer(self, snapshot_ts: float, rates: List):
+        day = _day(snapshot_ts)
+        for r in rates:
+            part = self._buffers.get((day, r.exchange))
+            if part is None:
+                part = self._buffers[(day, r.exchange)] = {}
+            cols = part.get(r.symbol)
+            if cols is None:
+                cols = part[r.symbol] = _new_columns()
+            price = getattr(r, 'price', None)
+            cols["snapshot_ts"].append(snapshot_ts)
+            cols["ts"].append(r.timestamp)
+            cols["rate"].append(r.rate)
+            cols["price"].append(price if isinstance(price, (int, float)) else float("nan"))
+        self._buffered_rows += len(rates)
+
+    def _partition_dir(self, day: str, exchange: str) -> str:
+        return os.path.join(self.root, day, exchange)
+
+    def _flush(self):
+        for (day, exchange), blocks in self._buffers.items():
+            directory = self._partition_dir(day, exchange)
+            os.makedirs(directory, exist_ok=True)
+            name = f"seg-{int(time.time() * 1000)}-{uuid.uuid4().hex[:6]}{SEGMENT_SUFFIX}"
+            write_segment(os.path.join(directory, name), blocks)
+            self.segments_written += 1
+        self._buffers = {}
+        self._buffered_rows = 0
+        self._last_flush = time.monotonic()
+
+    def compact(self):
+        self.segments_compacted += compact_partitions(self.root, self.compact_min_segments)
+
+
+_LEVEL = re.compile(r"(seg-\d+-[0-9a-f]+)-c(\d*)")
+
+
+def _level(name: str) -> int:
+    """Compaction level of a segment file name: 0 when flushed, N for seg-*-*-cN (bare -c is 1)."""
+    m = _LEVEL.fullmatch(name[:-len(SEGMENT_SUFFIX)])
+    return 0 if m is None else int(m.group(2) or 1)
+
+
+def _sort_by_snapshot(cols: Dict[str, array]):
+    """Puts one symbol's merged rows back into snapshot order (stable), in place."""
+    snap = np.frombuffer(cols["snapshot_ts"], np.float64)
+    if len(snap) < 2 or not (snap[1:] < snap[:-1]).any():
+        return      # Inputs are merged oldest first, so this is the common case
+    order = np.argsort(snap, kind="stable")
+    for c in COLUMNS:
+        col = array("d")
+        col.frombytes(np.frombuffer(cols[c], np.float64)[order].tobytes())
+        cols[c] = col
+
+
+def _merge(directory: str, paths: List[str], level: int) -> str:
+    merged: Dict[str, Dict[str, array]] = {}
+    for p in paths:
+        seg = Segment(os.path.join(directory, p))
+        try:
+            for symbol, cols in seg.read_all().items():
+                target = merged.setdefault(symbol, _new_columns())
+                for c in COLUMNS:
+                    target[c].extend(cols[c])
+        finally:
+            seg.close()
+    for cols in merged.values():
+        _sort_by_snapshot(cols)
+    # Named after the oldest input, so segments keep sorting in time order
+    base = paths[0][:-len(SEGMENT_SUFFIX)]
+    m = _LEVEL.fullmatch(base)
+    if m is not None:
+        base = m.group(1)
+    name = f"{base}-c{level}{SEGMENT_SUFFIX}"
+    write_segment(os.path.join(directory, name), merged)
+    for p in paths:
+        os.remove(os.path.join(directory, p))
+    return name
+
+
+def compact_partitions(root: str, min_segments: int) -> int:
+    """
+    Merges, in every partition, each level holding `min_segments` or more segments into one
+    segment of the next level. Returns the number of input segments merged.
+    """
+    min_segments = max(min_segments, 2)
+    compacted = 0
+    for day in sorted(os.listdir(root)):
+        day_dir = os.path.join(root, day)
+        if not os.path.isdir(day_dir):
+            continue
+        for exchange in sorted(os.listdir(day_dir)):
+            directory = os.path.join(day_dir, exchange)
+            levels: Dict[int, List[str]] = {}
+            for p in sorted(os.listdir(directory)):
+                if p.endswith(SEGMENT_SUFFIX):
+                    levels.setdefault(_level(p), []).append(p)
+            level = 0
+            while level <= max(levels, default=-1):
+                paths = levels.get(level, [])
+                if len(paths) >= min_segments:
+                    merged = _merge(directory, paths, level + 1)
+                    compacted += len(paths)
+                    levels[level + 1] = sorted(levels.get(level + 1, []) + [merged])
+                level += 1
+    return compacted
+
+
+class ArchiveReader:
+    def __init__(self, root: str):
+        self.root = root
+
+    def _days(self, start: float, end: float) -> List[str]:
+        first = datetime.fromtimestamp(start, tz=timezone.utc).date()
+        last = datetime.fromtimestamp(end, tz=timezone.utc).date()
+        days = []
+        while first <= last:
+            days.append(first.strftime("%Y-%m-%d"))
+            first += timedelta(days=1)
+        return days
+
+    def _day_segments(self, day: str, start: float, end: float, exchanges: Optional[List[str]]) -> Iterator[Tuple[str, Segment]]:
+        day_dir = os.path.join(self.root, day)
+        if not os.path.isdir(day_dir):
+            return
+        for exchange in sorted(os.listdir(day_dir)):
+            if exchanges and exchange not in exchanges:
+                continue
+            directory = os.path.join(day_dir, exchange)
+            for p in sorted(os.listdir(directory)):
+                if not p.endswith(SEGMENT_SUFFIX):
+                    continue
+                try:
+                    seg = Segment(os.path.join(directory, p))
+                except FileNotFoundError:
+                    continue    # removed by a concurrent compaction
+                if seg.t1 < start or seg.t0 > end:
+                    seg.close()
+                    continue
+                yield exchange, seg
+
+    def segments(self, start: float, end: float, exchanges: Optional[List[str]] = None) -> Iterator[Tuple[str, Segment]]:
+        """Open segments overlapping [start, end]; the caller closes each one."""
+        for day in self._days(start, end):
+            yield from self._day_segments(day, start, end, exchanges)
+
+    def scan(self, symbol: str, start: float, end: float, exchanges: Optional[List[str]] = None) -> Iterator[Row]:
+        """Rows for one symbol in [start, end]; only that symbol's blocks are decompressed."""
+        for exchange, seg in self.segments(start, end, exchanges):
+            try:
+                cols = seg.read(symbol)
+            finally:
+                seg.close()
+            if cols is None:
+                continue
+            snap, ts, rate, price = (cols[c] for c in COLUMNS)
+            for i in range(len(snap)):
+                if start <= snap[i] <= end:
+                    yield snap[i], exchange, symbol, ts[i], rate[i], price[i]
+
+    def _exchange_rows(self, exchange: str, segments: List[Segment], start: float, end: float) -> Iterator[Row]:
+        # One segment decoded at a time; rows re-sorted into snapshot order
+        for seg in segments:
+            rows = []
+            try:
+                blocks = seg.read_all()
+            finally:
+                seg.close()
+            for symbol, cols in blocks.items():
+                snap, ts, rate, price = (cols[c] for c in COLUMNS)
+                for i in range(len(snap)):
+                    if start <= snap[i] <= end:
+                        rows.append((snap[i], exchange, symbol, ts[i], rate[i], price[i]))
+            rows.sort()
+            yield from rows
+
+    def snapshots(self, start: float, end: float, exchanges: Optional[List[str]] = None) -> Iterator[Tuple[float, List[Row]]]:
+        """Reassembles whole snapshots (all exchanges) in time order, one day at a time."""
+        for day in self._days(start, end):
+            by_exchange: Dict[str, List[Segment]] = {}
+            for exchange, seg in self._day_segments(day, start, end, exchanges):
+                by_exchange.setdefault(exchange, []).append(seg)
+            streams = [self._exchange_rows(ex, segs, start, end) for ex, segs in sorted(by_exchange.items())]
+
+            current_ts, batch = None, []
+            for row in heapq.merge(*streams):
+                if row[0] != current_ts:
+                    if batch:
+                        yield current_ts, batch
+                    current_ts, batch = row[0], []
+                batch.append(row)
+            if batch:
+                yield current_ts, batch
+
+
+def parse_date(value: str) -> float:
+    return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query or compact the snapshot archive")
+    parser.add_argument("--root", default=os.getenv("ARCHIVE_DIR", "data/archive"))
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    scan_p = sub.add_parser("scan", help="print one symbol as CSV")
+    scan_p.add_argument("symbol")
+    scan_p.add_argument("--start", required=True, help="YYYY-MM-DD (UTC)")
+    scan_p.add_argument("--end", required=True, help="YYYY-MM-DD (UTC, inclusive)")
+    scan_p.add_argument("--exchange", action="append")
+    sub.add_parser("compact", help="merge small segments now")
+    args = parser.parse_args()
+
+    if args.cmd == "scan":
+        start, end = parse_date(args.start), parse_date(args.end) + 86400 - 1e-6
+        print("snapshot_ts,exchange,symbol,ts,rate,price")
+        for row in ArchiveReader(args.root).scan(args.symbol.upper(), start, end, args.exchange):
+            sys.stdout.write(",".join(str(v) for v in row) + "\n")
+    else:
+        print(f"Compacted {compact_partitions(args.root, 2)} segments")
@@ -0,0 +1,44 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from models import FundingRate
+from validation import group_median
+
+# Basis engine: the price half of the carry trade, from the mark / index / last prices the
+# venues already return next to the funding rate. Computed for the whole snapshot in one pass:
+#   premium = (mark - index) / index          the venue's own perp premium
+#   basis   = (perp - spot) / spot            perp = last trade (mark if none); spot = the venue's
+#                                             index, else the median index across venues
+# Both in percent. NaN where a venue returns no usable price.
+
+
+def compute(rates: Sequence[FundingRate]) -> Tuple[np.ndarray, np.ndarray]:
+    """(premium %, basis %) arrays aligned with `rates`."""
+    n = len(rates)
+    if n == 0:
+        return np.empty(0), np.empty(0)
+    nan = float("nan")
+    mark = np.array([nan if r.mark_price is None else r.mark_price for r in rates])
+    index = np.array([nan if r.index_price is None else r.index_price for r in rates])
+    last = np.array([nan if r.last_price is None else r.last_price for r in rates])
+
+    # Cross-venue spot reference for venues that publish no index of their own
+    ids = {}
+    sym = np.array([ids.setdefault(r.symbol, len(ids)) for r in rates])
+    has_index = ~np.isnan(index)
+    spot = index.copy()
+    if has_index.any() and not has_index.all():
+        ref, _ = group_median(sym[has_index], index[has_index], len(ids))
+        spot[~has_index] = ref[sym[~has_index]]
+
+    perp = np.where(np.isnan(last), mark, last)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        premium = (mark - index) / index * 100
+        basis = (perp - spot) / spot * 100
+    return premium, basis
+
+
+def as_optional(values: np.ndarray) -> List:
+    """Floats with NaN as None, for models and JSON."""
+    return [None if v != v else v for v in values.tolist()]
@@ -0,0 +1,126 @@
+import argparse
+import asyncio
+import json
+import sys
+from typing import Dict, List
+
+from simulator import add_profile_args, simulator_from_args, start_in_subprocess
+
+# End-to-end benchmark of AsyncFetcher.fetch_all and ArbitrageBot.run_cycle against the
+# local simulator. Runs fully offline; the simulator lives in its own process by default so
+# server-side JSON/HTTP work does not share the event loop under test.
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_bench(base_url: str, iterations: int, warmup: int) -> Dict:
+    from fetcher import AsyncFetcher
+    from notifier import TelegramNotifier
+    from main import ArbitrageBot, USER_AGENT
+
+    fetcher = AsyncFetcher(USER_AGENT, base_url=base_url)
+    notifier = TelegramNotifier()
+    notifier.token = None   # decisions run, nothing leaves the box
+    bot = ArbitrageBot(fetcher=fetcher, notifier=notifier, persist=False)
+    await fetcher.start_session()
+
+    venue_lat: Dict[str, List[float]] = {}
+    venue_rows: Dict[str, List[int]] = {}
+    stages: Dict[str, List[float]] = {}
+    cycles: List[float] = []
+    rows_total = 0
+
+    try:
+        for i in range(warmup + iterations):
+            rates, _, elapsed = await bot.run_cycle()
+            if i < warmup:
+                continue
+            cycles.append(elapsed)
+            rows_total += len(rates)
+            for stage, seconds in bot.stage_times.items():
+                stages.setdefault(stage, []).append(seconds)
+            counts: Dict[str, int] = {}
+            for r in rates:
+                counts[r.exchange] = counts.get(r.exchange, 0) + 1
+            for venue, seconds in fetcher.venue_timings.items():
+                venue_lat.setdefault(venue, []).append(seconds)
+                venue_rows.setdefault(venue, []).append(counts.get(venue, 0))
+    finally:
+        await bot.close()
+
+    wall = sum(cycles)
+    report = {
+        "iterations": iterations,
+        "cycles_per_sec": iterations / wall if wall else 0.0,
+        "rows_per_sec": rows_total / wall if wall else 0.0,
+        "cycle": {"p50_ms": percentile(cycles, 0.5) * 1000, "p99_ms": percentile(cycles, 0.99) * 1000},
+        "stages": {}, "venues": {},
+    }
+    for stage, values in stages.items():
+        report["stages"][stage] = {"p50_ms": percentile(values, 0.5) * 1000, "p99_ms": percentile(values, 0.99) * 1000,
+                                   "per_sec": len(values) / sum(values) if sum(values) else 0.0}
+    for venue, values in venue_lat.items():
+        rows = sum(venue_rows[venue])
+        report["venues"][venue] = {"p50_ms": percentile(values, 0.5) * 1000, "p99_ms": percentile(values, 0.99) * 1000,
+                                   "rows_per_sec": rows / sum(values) if sum(values) else 0.0,
+                                   "rows": rows // max(len(values), 1)}
+    return report
+
+
+def print_report(report: Dict):
+    print(f"\n🏁 {report['iterations']} cycles  |  {report['cycles_per_sec']:.2f} cycles/s  |  "
+          f"{report['rows_per_sec']:,.0f} rows/s  |  cycle p50 {report['cycle']['p50_ms']:.1f}ms "
+          f"p99 {report['cycle']['p99_ms']:.1f}ms")
+    print(f"\n   {'STAGE':12s} {'p50 ms':>9s} {'p99 ms':>9s} {'ops/s':>10s}")
+    for stage, s in report["stages"].items():
+        print(f"   {stage:12s} {s['p50_ms']:>9.2f} {s['p99_ms']:>9.2f} {s['per_sec']:>10.1f}")
+    print(f"\n   {'VENUE':12s} {'rows':>6s} {'p50 ms':>9s} {'p99 ms':>9s} {'rows/s':>11s}")
+    for venue, v in sorted(report["venues"].items(), key=lambda kv: -kv[1]["p50_ms"]):
+        print(f"   {venue:12s} {v['rows']:>6d} {v['p50_ms']:>9.2f} {v['p99_ms']:>9.2f} {v['rows_per_sec']:>11,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline fetch_all / run_cycle benchmark")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--inproc", action="store_true", help="run the simulator on the same event loop")
+    parser.add_argument("--json", help="also write the report to this file")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    if sys.platform != 'win32':
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
+
+    if args.inproc:
+        async def run():
+            runner, url = await simulator_from_args(args).start()
+            try:
+                return await run_bench(url, args.iterations, args.warmup)
+            finally:
+                await runner.cleanup()
+        report = asyncio.run(run())
+    else:
+        proc, url = start_in_subprocess(args)
+        try:
+            report = asyncio.run(run_bench(url, args.iterations, args.warmup))
+        finally:
+            proc.terminate()
+            proc.join()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
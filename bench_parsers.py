@@ -0,0 +1,187 @@
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from fetcher import AsyncFetcher
+from simulator import ENDPOINTS, Market, synthetic_bases, _bitstamp_funding
+
+# Microbenchmarks for the parse_* stage of every AsyncFetcher adapter, fed large synthetic
+# payloads in isolation (no network, no event loop). Compares against a stored baseline and
+# exits non-zero on regression so it can gate CI. Timings are gated as a cost relative to a
+# fixed calibration loop, so the baseline transfers between machines.
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_parsers_baseline.json")
+
+
+def build_cases(fetcher: AsyncFetcher, symbols: int, seed: int = 7) -> Dict[str, Callable[[], List]]:
+    bases = synthetic_bases(symbols)
+    payloads = {venue: eps[0][2](Market(bases, random.Random(f"{seed}-{venue}"))) for venue, eps in ENDPOINTS.items()}
+
+    # Bitstamp lists pairs, then one funding payload per pair
+    bitstamp_market = Market(bases, random.Random(f"{seed}-Bitstamp"))
+    bitstamp_pairs = [{"url_symbol": f"{b.lower()}usd-perp", "description": f"{b} / USD Perpetual"} for b in bases]
+    bitstamp_rates = {p["url_symbol"]: _bitstamp_funding(bitstamp_market, p["url_symbol"]) for p in bitstamp_pairs}
+
+    def bitstamp():
+        ts = time.time()
+        out = []
+        for sym in fetcher.parse_bitstamp_pairs(bitstamp_pairs):
+            fr = fetcher.parse_bitstamp_rate(sym, bitstamp_rates[sym], ts)
+            if fr: out.append(fr)
+        return out
+
+    return {
+        "Binance": lambda: fetcher.parse_binance(payloads["Binance"]),
+        "Bybit": lambda: fetcher.parse_bybit(payloads["Bybit"]),
+        "OKX": lambda: fetcher.parse_okx(payloads["OKX"]),
+        "GateIO": lambda: fetcher.parse_gateio(payloads["GateIO"]),
+        "KuCoin": lambda: fetcher.parse_kucoin(payloads["KuCoin"]),
+        "Bitget": lambda: fetcher.parse_bitget(payloads["Bitget"]),
+        "MEXC": lambda: fetcher.parse_mexc(payloads["MEXC"]),
+        "Huobi": lambda: fetcher.parse_huobi(payloads["Huobi"]),
+        "BingX": lambda: fetcher.parse_bingx(payloads["BingX"]),
+        "Kraken": lambda: fetcher.parse_kraken(payloads["Kraken"]),
+        "dYdX": lambda: fetcher.parse_dydx(payloads["dYdX"]),
+        "BitMEX": lambda: fetcher.parse_bitmex(payloads["BitMEX"]),
+        "Phemex": lambda: fetcher.parse_phemex(payloads["Phemex"]),
+        "HTX": lambda: fetcher.parse_huobi(payloads["HTX"], exchange="HTX"),
+        "CryptoCom": lambda: fetcher.parse_crypto_com(payloads["CryptoCom"]),
+        "Coinbase": lambda: fetcher.parse_coinbase(payloads["Coinbase"]),
+        "Hyperliquid": lambda: fetcher.parse_hyperliquid(payloads["Hyperliquid"]),
+        "CoinEx": lambda: fetcher.parse_coinex(payloads["CoinEx"]),
+        "BitUnix": lambda: fetcher.parse_bitunix(payloads["BitUnix"]),
+        "Bitstamp": bitstamp,
+    }
+
+
+_CALIBRATION_ROWS = [{"symbol": f"X{i}USDT", "rate": str(i * 1e-6)} for i in range(2000)]
+
+
+def _calibration():
+    # Fixed pure-Python workload resembling a parse loop (dict gets, suffix test, float())
+    out = []
+    for i in _CALIBRATION_ROWS:
+        if i.get("symbol", "").endswith("USDT"):
+            out.append((i["symbol"], float(i["rate"]) * 100))
+    return out
+
+
+def _best_time(fn: Callable, min_time: float) -> float:
+    loops, start = 0, time.perf_counter()
+    while True:
+        fn()
+        loops += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / loops
+
+
+def measure(fn: Callable[[], List], repeats: int = 9, min_time: float = 0.2) -> Dict[str, float]:
+    rows = len(fn())
+    if rows == 0:
+        return {"rows": 0, "rows_per_sec": 0.0, "relative_cost": 0.0, "blocks_per_row": 0.0, "peak_bytes_per_row": 0.0}
+
+    # Each repeat is bracketed by the calibration workload so its cost ratio (per-row parse time /
+    # per-row calibration time) cancels out machine speed. `relative_cost`, what the regression
+    # gate compares, is the median ratio over `repeats`: one lucky or unlucky repeat cannot move
+    # it. rows/sec is reported from the best repeat.
+    best, ratios = float("inf"), []
+    for _ in range(repeats):
+        gc.collect()
+        calib = _best_time(_calibration, min_time / 4)
+        elapsed = _best_time(fn, min_time)
+        calib = min(calib, _best_time(_calibration, min_time / 4))
+        best = min(best, elapsed)
+        ratios.append((elapsed / rows) / (calib / len(_CALIBRATION_ROWS)))
+
+    # Allocations: blocks still held by the result, and peak traced bytes during one parse
+    gc.collect()
+    before = sys.getallocatedblocks()
+    result = fn()
+    blocks = sys.getallocatedblocks() - before
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "rows": rows,
+        "rows_per_sec": rows / best,
+        "relative_cost": statistics.median(ratios),
+        "blocks_per_row": blocks / rows,
+        "peak_bytes_per_row": peak / rows,
+    }
+
+
+def check(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float, alloc_tolerance: float) -> List[Tuple[str, str]]:
+    failures = []
+    for venue, res in results.items():
+        base = baseline.get(venue)
+        if not base or not res["rows"]:
+            continue
+        if res["relative_cost"] > base["relative_cost"] * (1 + tolerance):
+            failures.append((venue, f"relative cost {res['relative_cost']:.2f} > baseline {base['relative_cost']:.2f} (+{tolerance:.0%})"))
+        if res["blocks_per_row"] > base["blocks_per_row"] * (1 + alloc_tolerance) + 0.5:
+            failures.append((venue, f"blocks/row {res['blocks_per_row']:.2f} > baseline {base['blocks_per_row']:.2f} (+{alloc_tolerance:.0%})"))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-adapter parser microbenchmarks")
+    parser.add_argument("--symbols", type=int, default=5000, help="listings per fixture payload")
+    parser.add_argument("--venue", action="append", help="only these venues (repeatable)")
+    parser.add_argument("--repeats", type=int, default=9, help="timed repeats; the gate uses their median")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.35, help="allowed relative cost growth vs baseline")
+    parser.add_argument("--alloc-tolerance", type=float, default=0.10, help="allowed blocks/row growth vs baseline")
+    args = parser.parse_args()
+
+    cases = build_cases(AsyncFetcher("bench"), args.symbols)
+    if args.venue:
+        cases = {k: v for k, v in cases.items() if k in args.venue}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("venues", {})
+
+    _best_time(_calibration, 0.5)   # warm up before the first venue is timed
+    results = {}
+    print(f"   {'VENUE':12s} {'rows':>6s} {'rows/s':>11s} {'rel cost':>9s} {'vs base':>8s} {'blocks/row':>11s} {'peak B/row':>11s}")
+    for venue, fn in cases.items():
+        res = results[venue] = measure(fn, args.repeats)
+        base = baseline.get(venue)
+        delta = f"{res['relative_cost'] / base['relative_cost'] - 1:+.0%}" if base and base.get("relative_cost") else "--"
+        print(f"   {venue:12s} {res['rows']:>6d} {res['rows_per_sec']:>11,.0f} {res['relative_cost']:>9.2f} {delta:>8s} "
+              f"{res['blocks_per_row']:>11.2f} {res['peak_bytes_per_row']:>11.0f}")
+
+    if args.update_baseline:
+        merged = dict(baseline)
+        merged.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump({"symbols": args.symbols, "python": sys.version.split()[0], "venues": merged}, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    failures = check(results, baseline, args.tolerance, args.alloc_tolerance)
+    if failures:
+        print("\n❌ REGRESSIONS:")
+        for venue, reason in failures:
+            print(f"   {venue:12s} {reason}")
+        sys.exit(1)
+    print("\n✅ No regressions" if baseline else "\n(no baseline yet; run with --update-baseline)")
+
+
+if __name__ == "__main__":
+    main()
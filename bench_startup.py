@@ -0,0 +1,82 @@
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+# Cold-start profile: per-module import cost (via `python -X importtime`) for the entry points
+# each run mode touches, plus checkpoint save / restore timings for a realistic snapshot size.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+MODES = {
+    "core": "import main",
+    "headless+web": "import main, web_dashboard; web_dashboard.create_app(); import fetcher, history, archive",
+    "tui+web": "import main, web_dashboard; web_dashboard.create_app(); import fetcher, history, archive, terminal",
+}
+
+
+def import_profile(statement: str) -> Tuple[float, List[Tuple[str, float, float]]]:
+    """Returns (total seconds, [(module, self s, cumulative s)]) for `statement` in a fresh interpreter."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=HERE,
+                          capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        head, cumulative_us, name = line.split("|", 2)
+        self_us = head.split(":", 1)[1]
+        rows.append((name.rstrip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    # Top-level entries (no indent) add up to the whole statement
+    total = sum(cum for name, _, cum in rows if not name.startswith("  "))
+    return total, rows
+
+
+def checkpoint_timings(opportunities: int) -> Dict[str, float]:
+    from models import Opportunity
+    import checkpoint
+
+    rng = random.Random(1)
+    opps = []
+    for i in range(opportunities):
+        rate = rng.uniform(0.0001, 0.2)
+        opps.append(Opportunity(symbol=f"X{i:05d}USDT", long_exchange=f"Venue{i % 20}", long_rate=rate,
+                                short_exchange="N/A", short_rate=0.0, spread=rate, annualized_spread=rate * 1095))
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "checkpoint.json")
+        t0 = time.perf_counter()
+        state = checkpoint.snapshot(opps, opportunities, time.time())
+        t1 = time.perf_counter()
+        checkpoint.save(path, state)
+        t2 = time.perf_counter()
+        restored = checkpoint.load(path)
+        t3 = time.perf_counter()
+        size = os.path.getsize(path)
+    assert len(restored["opportunities"]) == opportunities
+    return {"snapshot_ms": (t1 - t0) * 1000, "save_ms": (t2 - t1) * 1000, "load_ms": (t3 - t2) * 1000, "bytes": size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time and warm-restart profile")
+    parser.add_argument("--mode", action="append", choices=sorted(MODES), help="modes to profile (default: all)")
+    parser.add_argument("--top", type=int, default=12, help="slowest modules to list per mode")
+    parser.add_argument("--opportunities", type=int, default=6000, help="checkpoint size to time")
+    args = parser.parse_args()
+
+    for mode in args.mode or MODES:
+        total, rows = import_profile(MODES[mode])
+        print(f"\n⏱️  {mode:14s} imports {total * 1000:8.1f}ms")
+        print(f"   {'MODULE':40s} {'self ms':>9s} {'cum ms':>9s}")
+        for name, self_s, cum_s in sorted(rows, key=lambda r: -r[1])[:args.top]:
+            print(f"   {name.strip()[:40]:40s} {self_s * 1000:>9.1f} {cum_s * 1000:>9.1f}")
+
+    c = checkpoint_timings(args.opportunities)
+    print(f"\n💾 checkpoint ({args.opportunities} opportunities, {c['bytes'] / 1e6:.2f}MB): snapshot "
+          f"{c['snapshot_ms']:.1f}ms  save {c['save_ms']:.1f}ms  restore {c['load_ms']:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+import asyncio
+import logging
+import math
+import struct
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import metrics
+from models import FundingRate
+
+logger = logging.getLogger("Bus")
+logger.setLevel(logging.INFO)
+
+# Snapshot fan-out: one fetching bot publishes every fetch_all result; any number of subscriber
+# bots (dashboards, notifiers, execution) consume it instead of polling the venues themselves.
+#
+# Transport: TCP ("tcp://host:port") or a Unix socket ("unix:///path/bus.sock"), one-way
+# publisher -> subscriber, length-prefixed frames. Every frame is either a keyframe (full
+# state, string tables reset) or a delta against the previous frame (new strings, rows whose
+# rate changed, price moved more than PRICE_TOLERANCE or that appeared, keys that disappeared).
+# New subscribers get a keyframe on connect.
+#
+# Frame:    <I length> <B version> <B kind> <Q seq> <d published_ts> body   (kind | COMPRESSED => body is zlib)
+# Body:     <H n> n x (<H id> <H len> name)                 new exchange names
+#           <I n> n x (<I id> <H len> name)                 new symbol names
+#           <H n> n x (<H ex> <d ts> <d venue_ts> <d date> <i count>)
+#                                                           per-venue receive time, venue time of its first
+#                                                           row, Date header, row count (-1 = ERR)
+#           <I n> n x (<H ex> <I sym> <d rate> <d next_funding_time> <d venue_ts> <d mark> <d index> <d last>)
+#                                                           upserted rows
+#           <I n> n x (<H ex> <I sym>)                      removed rows (deltas only)
+# NaN is None throughout, except a row's venue_ts: NaN there means "the venue's" (so a per-payload
+# stamp moving every poll does not re-send every row) and -inf means None.
+
+VERSION = 3
+KEYFRAME, DELTA = 1, 2
+COMPRESSED = 0x80
+COMPRESS_OVER = 4096
+KEYFRAME_EVERY = 60
+MAX_BUFFERED = 8 * 1024 * 1024    # A subscriber this far behind is disconnected, not waited for
+PRICE_TOLERANCE = 1e-4            # Prices tick every fetch; a row is only re-sent for a move > 1bp
+NO_STAMP = -math.inf
+
+_LEN = struct.Struct("<I")
+_HEAD = struct.Struct("<BBQd")
+_H = struct.Struct("<H")
+_I = struct.Struct("<I")
+_EX = struct.Struct("<HH")
+_SYM = struct.Struct("<IH")
+_VENUE = struct.Struct("<Hdddi")
+_ROW = struct.Struct("<HIdddddd")
+_KEY = struct.Struct("<HI")
+
+SUBSCRIBERS = metrics.gauge("bus_subscribers", "Connected snapshot bus subscribers")
+FRAMES = metrics.counter("bus_frames_total", "Snapshot bus frames published", ["kind"])
+FRAME_BYTES = metrics.counter("bus_bytes_total", "Snapshot bus bytes published (per frame, before fan-out)")
+DROPPED = metrics.counter("bus_dropped_subscribers_total", "Subscribers disconnected for falling behind")
+
+
+def parse_address(address: str) -> Tuple[str, object]:
+    if address.startswith("unix://"):
+        return "unix", address[len("unix://"):]
+    host, _, port = address.replace("tcp://", "", 1).rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+class _Encoder:
+    """Publisher-side state: interned names and the rows as of the last frame."""
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.ex_ids: Dict[str, int] = {}
+        self.sym_ids: Dict[str, int] = {}
+        self.rows: Dict[Tuple[int, int], Tuple[float, ...]] = {}   # as last sent
+        self.venues: Dict[int, Tuple[float, float, float, int]] = {}
+
+    @staticmethod
+    def _changed(prev, row) -> bool:
+        if prev is None:
+            return True
+        # Rate and times exactly, prices within PRICE_TOLERANCE
+        for a, b in zip(prev[:3], row[:3]):
+            if a != b and not (a != a and b != b):
+                return True
+        for a, b in zip(prev[3:], row[3:]):
+            if a != b and not (a != a and b != b) and not abs(a - b) <= PRICE_TOLERANCE * abs(a):
+                return True
+        return False
+
+    def _intern(self, table: Dict[str, int], name: str, new: List[Tuple[int, str]]) -> int:
+        i = table.get(name)
+        if i is None:
+            i = table[name] = len(table)
+            new.append((i, name))
+        return i
+
+    def encode(self, rates: List[FundingRate], venue_counts: Dict[str, object], keyframe: bool,
+               venue_dates: Optional[Dict[str, float]] = None) -> Tuple[bytes, int]:
+        if keyframe:
+            self.reset()
+        new_ex: List[Tuple[int, str]] = []
+        new_sym: List[Tuple[int, str]] = []
+        prev = self.rows
+        rows: Dict[Tuple[int, int], Tuple[float, ...]] = {}
+        upserts = []
+        venue_ts: Dict[int, float] = {}
+        stamps: Dict[int, Optional[float]] = {}
+        nan = math.nan
+        changed = self._changed
+        for r in rates:
+            ex = self._intern(self.ex_ids, r.exchange, new_ex)
+            key = (ex, self._intern(self.sym_ids, r.symbol, new_sym))
+            if ex not in venue_ts:
+                venue_ts[ex], stamps[ex] = r.timestamp, r.venue_ts
+            stamp = r.venue_ts
+            row = (r.rate, nan if r.next_funding_time is None else r.next_funding_time,
+                   nan if stamp == stamps[ex] else (NO_STAMP if stamp is None else stamp),
+                   nan if r.mark_price is None else r.mark_price,
+                   nan if r.index_price is None else r.index_price, nan if r.last_price is None else r.last_price)
+            old = prev.get(key)
+            if old != row and changed(old, row):
+                upserts.append((key, row))
+                rows[key] = row
+            else:
+                rows[key] = old
+        venue_dates = venue_dates or {}
+        for name in venue_counts:
+            self._intern(self.ex_ids, name, new_ex)
+        venues = {}
+        for name, ex in self.ex_ids.items():
+            count = venue_counts.get(name)
+            if count is None and ex not in venue_ts:
+                continue
+            stamp, date = stamps.get(ex), venue_dates.get(name)
+            venues[ex] = (venue_ts.get(ex, nan), nan if stamp is None else stamp, nan if date is None else date,
+                          count if isinstance(count, int) else -1)
+
+        removed = [k for k in prev if k not in rows] if not keyframe else []
+        self.rows = rows
+        self.venues = venues
+        return self._body(new_ex, new_sym, venues, upserts, removed), len(upserts)
+
+    def full_state(self) -> bytes:
+        """Keyframe body for the current state using the current ids, so later deltas still apply."""
+        return self._body([(i, n) for n, i in self.ex_ids.items()], [(i, n) for n, i in self.sym_ids.items()],
+                          self.venues, list(self.rows.items()), [])
+
+    @staticmethod
+    def _body(new_ex, new_sym, venues, upserts, removed) -> bytes:
+        out = [_H.pack(len(new_ex))]
+        for i, name in new_ex:
+            b = name.encode()
+            out.append(_EX.pack(i, len(b)) + b)
+        out.append(_I.pack(len(new_sym)))
+        for i, name in new_sym:
+            b = name.encode()
+            out.append(_SYM.pack(i, len(b)) + b)
+        out.append(_H.pack(len(venues)))
+        out.extend(_VENUE.pack(ex, *venue) for ex, venue in venues.items())
+        out.append(_I.pack(len(upserts)))
+        out.extend(_ROW.pack(ex, sym, *row) for (ex, sym), row in upserts)
+        out.append(_I.pack(len(removed)))
+        out.extend(_KEY.pack(ex, sym) for ex, sym in removed)
+        return b"".join(out)
+
+
+def encode_frame(kind: int, seq: int, ts: float, body: bytes) -> bytes:
+    if len(body) > COMPRESS_OVER:
+        body = zlib.compress(body, 1)
+        kind |= COMPRESSED
+    payload = _HEAD.pack(VERSION, kind, seq, ts) + body
+    return _LEN.pack(len(payload)) + payload
+
+
+class Decoder:
+    """Subscriber-side state rebuilt from keyframes and deltas."""
+    def __init__(self):
+        self.seq = -1
+        self.ts = 0.0
+        self.exchanges: Dict[int, str] = {}
+        self.symbols: Dict[int, str] = {}
+        self.rows: Dict[Tuple[int, int], Tuple[float, ...]] = {}
+        self.venues: Dict[int, Tuple[float, float, float, int]] = {}
+
+    def apply(self, payload: bytes):
+        version, kind, seq, ts = _HEAD.unpack_from(payload, 0)
+        if version != VERSION:
+            raise ValueError(f"bus frame version {version}, expected {VERSION}")
+        body = payload[_HEAD.size:]
+        if kind & COMPRESSED:
+            body = zlib.decompress(body)
+            kind &= ~COMPRESSED
+        if kind == KEYFRAME:
+            self.exchanges, self.symbols, self.rows = {}, {}, {}
+        elif kind != DELTA or seq != self.seq + 1:
+            raise ValueError(f"out of sequence frame {seq} after {self.seq}")
+        self.seq, self.ts = seq, ts
+
+        mv, off = memoryview(body), 0
+        (n,), off = _H.unpack_from(mv, off), off + _H.size
+        for _ in range(n):
+            i, ln = _EX.unpack_from(mv, off)
+            off += _EX.size
+            self.exchanges[i] = bytes(mv[off:off + ln]).decode()
+            off += ln
+        (n,), off = _I.unpack_from(mv, off), off + _I.size
+        for _ in range(n):
+            i, ln = _SYM.unpack_from(mv, off)
+            off += _SYM.size
+            self.symbols[i] = bytes(mv[off:off + ln]).decode()
+            off += ln
+        (n,), off = _H.unpack_from(mv, off), off + _H.size
+        self.venues = {ex: tuple(venue) for ex, *venue in _VENUE.iter_unpack(mv[off:off + n * _VENUE.size])}
+        off += n * _VENUE.size
+        (n,), off = _I.unpack_from(mv, off), off + _I.size
+        rows = self.rows
+        for ex, sym, *row in _ROW.iter_unpack(mv[off:off + n * _ROW.size]):
+            rows[(ex, sym)] = row
+        off += n * _ROW.size
+        (n,), off = _I.unpack_from(mv, off), off + _I.size
+        for key in _KEY.iter_unpack(mv[off:off + n * _KEY.size]):
+            rows.pop(key, None)
+
+    def rates(self) -> List[FundingRate]:
+        ex_names, sym_names, venues = self.exchanges, self.symbols, self.venues
+        # Rows were validated by the publisher; skip pydantic validation on the way back in
+        construct = FundingRate.model_construct
+        out = []
+        for (ex, sym), (rate, nft, stamp, mark, index, last) in self.rows.items():
+            ts, venue_stamp = venues[ex][:2]
+            if stamp != stamp:
+                stamp = venue_stamp
+            out.append(construct(exchange=ex_names[ex], symbol=sym_names[sym], rate=rate, timestamp=ts,
+                                 mark_price=None if mark != mark else mark, index_price=None if index != index else index,
+                                 last_price=None if last != last else last,
+                                 next_funding_time=None if nft != nft else nft,
+                                 venue_ts=None if stamp != stamp or stamp == NO_STAMP else stamp))
+        return out
+
+    def venue_counts(self) -> Dict[str, object]:
+        return {self.exchanges[ex]: (count if count >= 0 else "ERR") for ex, (*_, count) in self.venues.items()}
+
+    def venue_dates(self) -> Dict[str, float]:
+        return {self.exchanges[ex]: date for ex, (_, _, date, _) in self.venues.items() if date == date}
+
+
+class BusPublisher:
+    """Serves snapshots to subscribers. `publish` never awaits a subscriber."""
+    def __init__(self, address: str, keyframe_every: int = KEYFRAME_EVERY):
+        self.address = address
+        self.keyframe_every = keyframe_every
+        self.encoder = _Encoder()
+        self.seq = -1
+        self.clients: set = set()
+        self._server = None
+        self._ts = 0.0
+
+    async def start(self):
+        kind, where = parse_address(self.address)
+        if kind == "unix":
+            self._server = await asyncio.start_unix_server(self._on_connect, path=where)
+        else:
+            self._server = await asyncio.start_server(self._on_connect, *where)
+        logger.info(f"Publishing snapshots on {self.address}")
+
+    async def _on_connect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self.seq >= 0:
+            # Late joiner: the current state as a keyframe, then it follows the shared delta chain
+            writer.write(encode_frame(KEYFRAME, self.seq, self._ts, self.encoder.full_state()))
+        self.clients.add(writer)
+        SUBSCRIBERS.set(len(self.clients))
+        try:
+            await reader.read()     # Subscribers never send; this returns on disconnect
+        finally:
+            self._drop(writer)
+
+    def _drop(self, writer: asyncio.StreamWriter):
+        if writer in self.clients:
+            self.clients.discard(writer)
+            SUBSCRIBERS.set(len(self.clients))
+        writer.close()
+
+    def publish(self, ts: float, rates: List[FundingRate], venue_counts: Optional[Dict[str, object]] = None,
+                venue_dates: Optional[Dict[str, float]] = None):
+        venue_counts = venue_counts or {}
+        self.seq += 1
+        keyframe = self.seq % self.keyframe_every == 0
+        body, _ = self.encoder.encode(rates, venue_counts, keyframe, venue_dates)
+        frame = encode_frame(KEYFRAME if keyframe else DELTA, self.seq, ts, body)
+        self._ts = ts
+        FRAMES.inc(kind="keyframe" if keyframe else "delta")
+        FRAME_BYTES.inc(len(frame))
+        for writer in list(self.clients):
+            if writer.transport.get_write_buffer_size() > MAX_BUFFERED:
+                logger.warning("Dropping slow bus subscriber")
+                DROPPED.inc()
+                self._drop(writer)
+                continue
+            writer.write(frame)
+
+    async def close(self):
+        for writer in list(self.clients):
+            self._drop(writer)
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+class BusSubscriber:
+    """
+    Drop-in for AsyncFetcher that takes snapshots from a BusPublisher instead of the venues.
+    `fetch_all` returns the next snapshot received after the previous call.
+    """
+    def __init__(self, address: str, reconnect_delay: float = 1.0):
+        self.address = address
+        self.reconnect_delay = reconnect_delay
+        self.decoder = Decoder()
+        self.venue_counts: Dict[str, object] = {}
+        self.venue_timings: Dict[str, float] = {}
+        self.venue_rows: Dict[str, List[FundingRate]] = {}     # As AsyncFetcher, for freshness.observe
+        self.venue_dates: Dict[str, float] = {}
+        self.published_ts = 0.0
+        self.frames = 0
+        self._returned = 0
+        self._updated = None
+        self._task = None
+
+    async def start_session(self):
+        if self._task is None:
+            self._updated = asyncio.Condition()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        kind, where = parse_address(self.address)
+        while True:
+            try:
+                if kind == "unix":
+                    reader, writer = await asyncio.open_unix_connection(where)
+                else:
+                    reader, writer = await asyncio.open_connection(*where)
+                logger.info(f"Subscribed to {self.address}")
+                self.decoder = Decoder()
+                try:
+                    while True:
+                        (length,) = _LEN.unpack(await reader.readexactly(_LEN.size))
+                        self.decoder.apply(await reader.readexactly(length))
+                        self.frames += 1
+                        async with self._updated:
+                            self._updated.notify_all()
+                finally:
+                    writer.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Bus connection lost ({e}); reconnecting")
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def fetch_all(self) -> List[FundingRate]:
+        await self.start_session()
+        async with self._updated:
+            await self._updated.wait_for(lambda: self.frames > self._returned)
+        d = self.decoder
+        self._returned = self.frames
+        self.published_ts = d.ts
+        self.venue_counts = d.venue_counts()
+        self.venue_dates = d.venue_dates()
+        rates = d.rates()
+        self.venue_rows = {}
+        for r in rates:
+            self.venue_rows.setdefault(r.exchange, []).append(r)
+        return rates
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,56 @@
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from models import Opportunity
+
+# Warm-state checkpoint: the last published snapshot plus a little metadata, so a restarted bot
+# can serve data immediately (marked stale) instead of waiting for the first full fetch_all.
+# Written atomically (temp file + rename) so a crash mid-write never leaves a torn file.
+
+VERSION = 1
+COLUMNS = ("symbol", "long_exchange", "long_rate", "short_exchange", "short_rate", "spread", "annualized_spread",
+           "price", "premium", "basis", "depth", "executable_apr",
+           "ewma", "stddev", "min_24h", "max_24h", "streak", "persistent_apr")
+
+
+def snapshot(opportunities: List[Opportunity], total_pairs: int, timestamp: float,
+             meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Plain-data copy of the current state; cheap enough to take on the event loop."""
+    return {
+        "version": VERSION,
+        "timestamp": timestamp,
+        "total_pairs": total_pairs,
+        "meta": meta or {},
+        "columns": COLUMNS,
+        "rows": [tuple(getattr(o, c) for c in COLUMNS) for o in opportunities],
+    }
+
+
+def save(path: str, state: Dict[str, Any]):
+    """Serialises and writes `state` (from `snapshot`). Safe to run in a worker thread."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(dict(state, saved_at=time.time()), f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load(path: str) -> Optional[Dict[str, Any]]:
+    """Returns the checkpoint with `opportunities` rebuilt, or None if missing/unreadable."""
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("version") != VERSION:
+        return None
+    columns = state.pop("columns")     # Older files may have fewer; missing fields take their defaults
+    # Written by us from validated models, so skip re-validation on the hot restart path
+    state["opportunities"] = [Opportunity.model_construct(**dict(zip(columns, row))) for row in state.pop("rows")]
+    return state
@@ -0,0 +1,117 @@
+import contextvars
+import random
+from typing import Dict, List, Optional
+
+import metrics
+
+# Per-venue circuit breaker. A venue that keeps failing (down, geo-blocked, rate limited, or
+# answering with something the parser no longer understands) is skipped on the hot path
+# instead of costing every cycle a connection slot and up to the full request timeout. While
+# open it is probed in the background with a lightweight request (PROBE_URLS; the venue's own
+# adapter where no ping endpoint is known); after a successful probe the next cycle fetches it
+# once as a trial (half-open), which closes the breaker or opens it again with a longer wait.
+#
+# Failure kinds, as classified by AsyncFetcher._fetch for the request that failed:
+#   timeout, blocked (403 / 451), rate_limited (429), http (other status), connection,
+#   parse (body was not JSON), empty (request fine but no rows parsed), error (adapter raised)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Consecutive failures of a kind before the breaker opens, and the first wait before probing
+THRESHOLDS = {"blocked": 2, "rate_limited": 2}
+DEFAULT_THRESHOLD = 3
+COOLDOWNS = {"blocked": 300.0, "rate_limited": 60.0}
+DEFAULT_COOLDOWN = 30.0
+MAX_COOLDOWN = 900.0
+
+PROBE_URLS = {
+    "Binance": "https://fapi.binance.com/fapi/v1/ping",
+    "Bybit": "https://api.bybit.com/v5/market/time",
+    "OKX": "https://www.okx.com/api/v5/public/time",
+    "KuCoin": "https://api-futures.kucoin.com/api/v1/timestamp",
+    "Bitget": "https://api.bitget.com/api/v2/public/time",
+    "MEXC": "https://contract.mexc.com/api/v1/contract/ping",
+    "BingX": "https://open-api.bingx.com/openApi/swap/v2/server/time",
+    "Huobi": "https://api.hbdm.vn/api/v1/timestamp",
+    "HTX": "https://api.hbdm.com/api/v1/timestamp",
+    "Phemex": "https://api.phemex.com/public/time",
+}
+
+STATE = metrics.gauge("circuit_state", "Venue circuit breaker: 0 closed, 1 half-open, 2 open", ["exchange"])
+FAILURES = metrics.counter("circuit_failures_total", "Failed venue polls by kind", ["exchange", "kind"])
+PROBES = metrics.counter("circuit_probes_total", "Background health probes of open venues", ["exchange", "result"])
+
+# Failure kinds noted by the requests of the adapter currently running (one list per adapter task)
+_failures: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar("venue_failures", default=None)
+
+
+def track() -> List[str]:
+    """Starts collecting failure kinds for the calling task; returns the list they land in."""
+    failures: List[str] = []
+    _failures.set(failures)
+    return failures
+
+
+def note(kind: str):
+    failures = _failures.get()
+    if failures is not None:
+        failures.append(kind)
+
+
+def status_kind(status: int) -> str:
+    if status in (403, 451):
+        return "blocked"
+    if status == 429:
+        return "rate_limited"
+    return "http"
+
+
+class CircuitBreaker:
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.reason = ""
+        self.streak = 0             # consecutive failed polls; `reason` is the latest kind
+        self.opened = 0             # times opened since last closed, for backoff
+        self.probe_at = 0.0
+        STATE.set(0, exchange=name)
+
+    def allow(self) -> bool:
+        return self.state != OPEN
+
+    def _set(self, state: str):
+        self.state = state
+        STATE.set(STATE_VALUES[state], exchange=self.name)
+
+    def success(self):
+        self.streak, self.opened, self.reason = 0, 0, ""
+        if self.state != CLOSED:
+            self._set(CLOSED)
+
+    def failure(self, kind: str, now: float):
+        FAILURES.inc(exchange=self.name, kind=kind)
+        self.streak += 1
+        self.reason = kind
+        if self.state == HALF_OPEN or self.streak >= THRESHOLDS.get(kind, DEFAULT_THRESHOLD):
+            self._open(now)
+
+    def _open(self, now: float):
+        self.opened += 1
+        wait = min(COOLDOWNS.get(self.reason, DEFAULT_COOLDOWN) * 2 ** (self.opened - 1), MAX_COOLDOWN)
+        self.probe_at = now + wait * random.uniform(0.8, 1.2)
+        self._set(OPEN)
+
+    def probe_due(self, now: float) -> bool:
+        return self.state == OPEN and now >= self.probe_at
+
+    def probed(self, ok: bool, kind: str, now: float):
+        PROBES.inc(exchange=self.name, result="ok" if ok else kind)
+        if ok:
+            self._set(HALF_OPEN)
+        else:
+            self.reason = kind
+            self._open(now)
+
+    def snapshot(self) -> Dict[str, object]:
+        return {"state": self.state, "reason": self.reason}
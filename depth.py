@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import instruments
+import metrics
+from models import Opportunity
+
+# Order-book depth for the best candidates only. Ranking on rate alone puts a 2% contract with
+# $5k on the book above a 0.5% one with $5m; fetching every book every cycle is ~10k requests.
+# After calculate_arbitrage, the top `k` opportunities get the bid-side notional within `band`
+# percent of the best bid (the side a short perp sells into), from a per-(venue, symbol) cache
+# with a `ttl`. Concurrent requests for the same book share one fetch, and a cycle waits at most
+# `timeout` seconds: books still in flight are used by the next cycle instead.
+#
+# The top K are then re-ranked on executable APR: APR * min(depth, size) / size, i.e. the yield
+# on a `size` USD position counting only what the book can absorb. Candidates whose depth is
+# unknown (venue without a book endpoint below, or the fetch failed) keep their plain APR, so
+# only a book measured thin demotes a row; everything past K keeps its rate order.
+#
+# Venues whose books are quoted in contracts (OKX, GateIO, MEXC, KuCoin, Huobi) are not covered:
+# converting needs each contract's size, which the funding payloads do not carry.
+
+logger = logging.getLogger("Depth")
+
+BOOK_REQUESTS = metrics.counter("depth_book_requests_total", "Order-book fetches for top-K enrichment", ["exchange", "result"])
+CACHE_HITS = metrics.counter("depth_cache_hits_total", "Top-K books served from the cache or an in-flight fetch")
+ENRICHED = metrics.gauge("depth_enriched", "Top-K opportunities with a measured book in the last cycle")
+
+Levels = List[Tuple[float, float]]      # (price, quantity in base units), best first
+
+
+BOOK_QUOTES = {"Binance": ("USDT", "USDC"), "Bybit": ("USDT",), "Bitget": ("USDT",), "BingX": ("USDT",),
+               "dYdX": ("USD",), "Hyperliquid": ("USD",)}
+
+
+def _pairs(levels) -> Levels:
+    return [(float(level[0]), float(level[1])) for level in levels]
+
+
+# venue -> (GET url template or None for a POST, POST body template, bids extractor). `{symbol}`
+# is the canonical symbol (BTCUSDT), `{base}` its base asset. BOOK_QUOTES lists the quotes whose
+# canonical instrument is the one the template addresses; inverse contracts are never covered.
+BOOKS: Dict[str, Tuple[str, Optional[dict], Callable[[object], Levels]]] = {
+    "Binance": ("https://fapi.binance.com/fapi/v1/depth?symbol={symbol}&limit=50", None,
+                lambda d: _pairs(d["bids"])),
+    "Bybit": ("https://api.bybit.com/v5/market/orderbook?category=linear&symbol={symbol}&limit=50", None,
+              lambda d: _pairs(d["result"]["b"])),
+    "Bitget": ("https://api.bitget.com/api/v2/mix/market/merge-depth?productType=USDT-FUTURES&symbol={symbol}&limit=50", None,
+               lambda d: _pairs(d["data"]["bids"])),
+    "BingX": ("https://open-api.bingx.com/openApi/swap/v2/quote/depth?symbol={base}-USDT&limit=50", None,
+              lambda d: _pairs(d["data"]["bids"])),
+    "dYdX": ("https://indexer.dydx.trade/v4/orderbooks/perpetualMarket/{base}-USD", None,
+             lambda d: [(float(b["price"]), float(b["size"])) for b in d["bids"]]),
+    "Hyperliquid": ("https://api.hyperliquid.xyz/info", {"type": "l2Book", "coin": "{base}"},
+                    lambda d: [(float(b["px"]), float(b["sz"])) for b in d["levels"][0]]),
+}
+
+
+def band_notional(bids: Levels, band: float) -> float:
+    """USD notional resting within `band` percent below the best bid."""
+    if not bids:
+        return 0.0
+    floor = bids[0][0] * (1 - band / 100)
+    total = 0.0
+    for price, qty in bids:
+        if price < floor:
+            break
+        total += price * qty
+    return total
+
+
+class DepthEnricher:
+    def __init__(self, fetcher, k: int = 20, ttl: float = 30.0, band: float = 0.5, size: float = 10_000.0,
+                 timeout: float = 2.0, rank_field: str = "annualized_spread"):
+        self.fetcher = fetcher
+        self.rank_field = rank_field    # The APR the book caps: plain, or persistence-adjusted
+        self.k = k
+        self.ttl = ttl
+        self.band = band
+        self.size = size
+        self.timeout = timeout
+        self._cache: Dict[Tuple[str, str], Tuple[float, Optional[float]]] = {}   # -> (expires, depth USD)
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    def _cached(self, key: Tuple[str, str], now: float):
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] > now:
+            return entry
+        return None
+
+    def depth(self, exchange: str, symbol: str) -> asyncio.Future:
+        """The bid depth of one book: cached, joined to a fetch already in flight, or fetched."""
+        key = (exchange, symbol)
+        entry = self._cached(key, time.monotonic())
+        if entry is not None or key in self._inflight:
+            CACHE_HITS.inc()
+            if entry is not None:
+                done = asyncio.get_running_loop().create_future()
+                done.set_result(entry[1])
+                return done
+            return self._inflight[key]
+        task = asyncio.ensure_future(self._load(key))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def _load(self, key: Tuple[str, str]) -> Optional[float]:
+        exchange, symbol = key
+        url, body, bids = BOOKS[exchange]
+        base = instruments.base(symbol)
+        if body is None:
+            data = await self.fetcher._fetch(url.format(symbol=symbol, base=base))
+        else:
+            post = {k: v.format(base=base) for k, v in body.items()}
+            data = await self.fetcher._fetch(url, method='POST', post_data=post)
+        value = None
+        try:
+            if data is not None:
+                value = band_notional(bids(data), self.band)
+        except (KeyError, IndexError, TypeError, ValueError):
+            logger.debug(f"Unexpected {exchange} book payload for {symbol}")
+        BOOK_REQUESTS.inc(exchange=exchange, result="ok" if value is not None else "error")
+        # Failures are cached too (for the same TTL) so a bad book is not refetched every cycle
+        self._cache[key] = (time.monotonic() + self.ttl, value)
+        return value
+
+    def _allowed(self, exchange: str, symbol: str) -> bool:
+        inst = instruments.parse(symbol)
+        if inst.inverse or inst.quote not in BOOK_QUOTES.get(exchange, ()):
+            return False
+        breaker = getattr(self.fetcher, "breakers", {}).get(exchange)
+        return breaker is None or breaker.allow()
+
+    def _prune(self, now: float):
+        if len(self._cache) > 8 * self.k:
+            self._cache = {key: entry for key, entry in self._cache.items() if entry[0] > now}
+
+    async def enrich(self, opportunities: Sequence[Opportunity]) -> List[Opportunity]:
+        """Top-K opportunities with depth and executable APR, re-ranked; the rest unchanged after them."""
+        top, rest = list(opportunities[:self.k]), list(opportunities[self.k:])
+        if not top:
+            return list(opportunities)
+        self._prune(time.monotonic())
+        pending = {i: self.depth(o.long_exchange, o.symbol) for i, o in enumerate(top) if self._allowed(o.long_exchange, o.symbol)}
+        if pending:
+            # Not cancelled at the deadline: a book still loading stays in flight for the next cycle
+            await asyncio.wait(set(pending.values()), timeout=self.timeout)
+
+        enriched = []
+        for i, o in enumerate(top):
+            future = pending.get(i)
+            value = None
+            if future is not None and future.done() and not future.cancelled() and future.exception() is None:
+                value = future.result()
+            if value is None:
+                enriched.append(o)
+                continue
+            executable = (getattr(o, self.rank_field) or 0.0) * min(value, self.size) / self.size
+            enriched.append(o.model_copy(update={"depth": value, "executable_apr": executable}))
+        ENRICHED.set(sum(1 for o in enriched if o.depth is not None))
+        field = self.rank_field
+        enriched.sort(key=lambda o: (getattr(o, field) or 0.0) if o.executable_apr is None else o.executable_apr, reverse=True)
+        return enriched + rest
+
+    async def close(self):
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self._inflight.clear()
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import metrics
+from models import FundingRate, Opportunity
+
+logger = logging.getLogger("Dispatcher")
+logger.setLevel(logging.INFO)
+
+QUEUE_DEPTH = metrics.gauge("alert_queue_depth", "Opportunity snapshots waiting for the alert worker")
+IN_FLIGHT = metrics.gauge("alert_in_flight", "1 while the alert worker is delivering a snapshot")
+SUBMITTED = metrics.counter("alert_submitted_total", "Snapshots handed to the dispatcher")
+COALESCED = metrics.counter("alert_coalesced_total", "Snapshots replaced by a newer one before delivery")
+ERRORS = metrics.counter("alert_errors_total", "Snapshots whose delivery raised")
+DELIVERY = metrics.histogram("alert_delivery_seconds", "Submit to delivery-complete latency")
+SEND = metrics.histogram("alert_send_seconds", "Time spent inside notifier.process")
+
+
+class AlertDispatcher:
+    """
+    Hands opportunity snapshots from the fetch loop to the notifier without awaiting it.
+    Holds at most one pending snapshot: a newer submit replaces an undelivered one, since only
+    the latest state is worth alerting on. Delivery runs in a separate task.
+    """
+    def __init__(self, notifier):
+        self.notifier = notifier
+        self._pending: Optional[Tuple[List[Opportunity], datetime, Optional[List[FundingRate]], float]] = None
+        self._wake = None
+        self._task = None
+        self._closing = False
+        self.delivered = 0
+        self.coalesced = 0
+
+    def start(self):
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    def submit(self, opportunities: List[Opportunity], now: Optional[datetime] = None,
+               rates: Optional[List[FundingRate]] = None):
+        """Never blocks. Must be called from the event loop thread."""
+        self.start()
+        if self._pending is not None:
+            self.coalesced += 1
+            COALESCED.inc()
+        self._pending = (opportunities, now or datetime.now(), rates, time.perf_counter())
+        SUBMITTED.inc()
+        QUEUE_DEPTH.set(1)
+        self._wake.set()
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            await self._deliver()
+            if self._closing and self._pending is None:
+                return
+
+    async def _deliver(self):
+        if self._pending is None:
+            return
+        opportunities, now, rates, submitted = self._pending
+        self._pending = None
+        QUEUE_DEPTH.set(0)
+        IN_FLIGHT.set(1)
+        started = time.perf_counter()
+        try:
+            await self.notifier.process(opportunities, now=now, rates=rates)
+            self.delivered += 1
+        except Exception as e:
+            ERRORS.inc()
+            logger.error(f"Alert delivery failed: {e}")
+        finally:
+            done = time.perf_counter()
+            SEND.observe(done - started)
+            DELIVERY.observe(done - submitted)
+            IN_FLIGHT.set(0)
+
+    async def close(self, timeout: float = 10.0):
+        """Lets the in-flight and pending snapshots go out (up to `timeout`), then stops the worker."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wake.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Alert worker did not finish in time; pending alert dropped")
+        self._task = None
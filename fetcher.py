@@ -1,16 +1,33 @@
 import asyncio
 import aiohttp
+import contextvars
 import logging
 import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
 import json
-from typing import List, Any
+from typing import List, Any, Optional, Dict, Callable, Awaitable, Iterable
+import circuit
+import instruments
 from models import FundingRate
 
 logger = logging.getLogger("Fetcher")
 logger.setLevel(logging.INFO)
 
+# Date headers of the successful responses of the adapter currently running (one list per adapter task)
+_dates: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar("response_dates", default=None)
+
 class AsyncFetcher:
-    def __init__(self, user_agent: str):
+    def __init__(self, user_agent: str, base_url: str = None):
+        # base_url reroutes every venue request to one host (e.g. the local simulator):
+        # https://fapi.binance.com/fapi/v1/x -> {base_url}/fapi.binance.com/fapi/v1/x
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.venue_timings = {}
+        self.venue_counts = {}      # Rows per venue from the last fetch_all, or "ERR"
+        self.venue_rows: Dict[str, List[FundingRate]] = {}  # Last result per venue, reused by partial fetches
+        self.venue_dates: Dict[str, float] = {}     # Server Date header of each venue's last response, Unix seconds
+        self.breakers: Dict[str, circuit.CircuitBreaker] = {}
+        self._probe_task = None
         self.std_headers = {
             'User-Agent': 'python-requests/2.31.0', 
             'Accept': 'application/json',
@@ -38,209 +55,323 @@ class AsyncFetcher:
         )
 
     async def close(self):
+        if self._probe_task:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
         if self.session:
             await self.session.close()
 
+    def _route(self, url: str) -> str:
+        if not self.base_url: return url
+        return self.base_url + '/' + url.split('://', 1)[-1]
+
     async def _fetch(self, url: str, mode: str = 'std', extra_headers: dict = None, method: str = 'GET', post_data: dict = None) -> Any:
         if not self.session: return None
+        url = self._route(url)
         headers = self.browser_headers.copy() if mode == 'browser' else self.std_headers.copy()
         if extra_headers: headers.update(extra_headers)
 
+        # Failures still return None (adapters treat that as no data), but their kind is noted
+        # for the venue's circuit breaker
         try:
             if method == 'POST':
                 if 'Content-Type' not in headers:
                     headers['Content-Type'] = 'application/json'
-                async with self.session.post(url, headers=headers, json=post_data, ssl=False) as response:
-                    if response.status == 200:
-                        return await response.json()
+                request = self.session.post(url, headers=headers, json=post_data, ssl=False)
             else:
-                async with self.session.get(url, headers=headers, ssl=False) as response:
-                    if response.status == 200:
-                        return await response.json()
+                request = self.session.get(url, headers=headers, ssl=False)
+            async with request as response:
+                if response.status == 200:
+                    dates = _dates.get()
+                    if dates is not None and 'Date' in response.headers:
+                        dates.append(response.headers['Date'])
+                    return await response.json()
+                circuit.note(circuit.status_kind(response.status))
             return None
+        except asyncio.TimeoutError:
+            circuit.note("timeout")
+        except (aiohttp.ContentTypeError, ValueError):
+            circuit.note("parse")
+        except (aiohttp.ClientError, OSError):
+            circuit.note("connection")
         except Exception:
-            return None
+            circuit.note("error")
+        return None
 
     def _norm(self, symbol: str) -> str:
         return symbol.replace('-', '').replace('_', '').replace('/', '').upper()
 
+    @staticmethod
+    def _px(value, scale: float = 1.0) -> Optional[float]:
+        """A price field from a payload, or None when absent / zero."""
+        if value is None or value == '':
+            return None
+        value = float(value) / scale
+        return value if value > 0 else None
+
+    @staticmethod
+    def _iso(value) -> Optional[float]:
+        """An ISO-8601 UTC timestamp ("...Z") as Unix seconds."""
+        if not value:
+            return None
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+    @staticmethod
+    def _ms(value, base: float = 0.0, unit: float = 1e3) -> Optional[float]:
+        """A millisecond timestamp (or, with `base`, a millisecond offset) as Unix seconds; `unit` ticks per second."""
+        if not value:
+            return None
+        return base + float(value) / unit
+
     # EXCHANGES
+    # Each venue is split into get_* (network) and parse_* (pure, takes the decoded payload)
+    # so parsing can be benchmarked and replayed without I/O.
 
     async def get_binance(self) -> List[FundingRate]:
-        data = await self._fetch("https://fapi.binance.com/fapi/v1/premiumIndex", mode='browser')
+        return self.parse_binance(await self._fetch("https://fapi.binance.com/fapi/v1/premiumIndex", mode='browser'))
+
+    def parse_binance(self, data) -> List[FundingRate]:
         if not data: return []
         res, ts = [], time.time()
         for i in data:
-            if i.get('symbol', '').endswith('USDT'):
-                try: res.append(FundingRate(exchange="Binance", symbol=i['symbol'], rate=float(i['lastFundingRate']) * 100, timestamp=ts))
+            # USDⓈ-M perps are already canonical (BTCUSDT / BTCUSDC); dated futures end in a date
+            if i.get('symbol', '').endswith(('USDT', 'USDC')):
+                try: res.append(FundingRate(exchange="Binance", symbol=i['symbol'], rate=float(i['lastFundingRate']) * 100, timestamp=ts,
+                                             mark_price=self._px(i.get('markPrice')), index_price=self._px(i.get('indexPrice')),
+                                             next_funding_time=self._ms(i.get('nextFundingTime')), venue_ts=self._ms(i.get('time'))))
                 except: continue
         return res
 
     async def get_bybit(self) -> List[FundingRate]:
-        data = await self._fetch("https://api.bybit.com/v5/market/tickers?category=linear", mode='browser')
+        return self.parse_bybit(await self._fetch("https://api.bybit.com/v5/market/tickers?category=linear", mode='browser'))
+
+    def parse_bybit(self, data) -> List[FundingRate]:
         if not data or data.get('retCode') != 0: return []
-        res, ts = [], time.time()
+        res, ts, venue_ts = [], time.time(), self._ms(data.get('time'))
         for i in data.get('result', {}).get('list', []):
-            if i.get('symbol', '').endswith('USDT') and i.get('fundingRate'):
-                try: res.append(FundingRate(exchange="Bybit", symbol=i['symbol'], rate=float(i['fundingRate']) * 100, timestamp=ts))
-                except: continue
+            sym = i.get('symbol', '')
+            if not i.get('fundingRate'): continue
+            if sym.endswith('PERP'): sym = sym[:-4].rstrip('-') + 'USDC'     # USDC perps: BTCPERP
+            elif not sym.endswith('USDT'): continue
+            try: res.append(FundingRate(exchange="Bybit", symbol=sym, rate=float(i['fundingRate']) * 100, timestamp=ts,
+                                         mark_price=self._px(i.get('markPrice')), index_price=self._px(i.get('indexPrice')),
+                                         last_price=self._px(i.get('lastPrice')),
+                                         next_funding_time=self._ms(i.get('nextFundingTime')), venue_ts=venue_ts))
+            except: continue
         return res
 
     async def get_gateio(self) -> List[FundingRate]:
-            data = await self._fetch("https://api.gateio.ws/api/v4/futures/usdt/tickers", mode='std')
-            if not data: return []
-            res, ts = [], time.time()
-            for i in data:
-                if 'contract' in i and 'funding_rate' in i:
-                    contract_name = i['contract']
-                    if not contract_name.isascii():
-                        continue
-                    try: 
-                        res.append(FundingRate(exchange="GateIO", symbol=self._norm(contract_name), rate=float(i['funding_rate']) * 100, timestamp=ts))
-                    except: continue
-            return res
+        return self.parse_gateio(await self._fetch("https://api.gateio.ws/api/v4/futures/usdt/tickers", mode='std'))
+
+    def parse_gateio(self, data) -> List[FundingRate]:
+        if not data: return []
+        res, ts = [], time.time()
+        for i in data:
+            if 'contract' in i and 'funding_rate' in i:
+                contract_name = i['contract']
+                if not contract_name.isascii():
+                    continue
+                try: 
+                    res.append(FundingRate(exchange="GateIO", symbol=self._norm(contract_name), rate=float(i['funding_rate']) * 100, timestamp=ts,
+                                           mark_price=self._px(i.get('mark_price')), index_price=self._px(i.get('index_price')),
+                                           last_price=self._px(i.get('last'))))
+                except: continue
+        return res
 
     async def get_okx(self) -> List[FundingRate]:
         url = "https://www.okx.com/priapi/v5/public/tickers?instType=SWAP"
         headers = {"Referer": "https://www.okx.com/trade-swap"}
-        data = await self._fetch(url, mode='browser', extra_headers=headers)
+        return self.parse_okx(await self._fetch(url, mode='browser', extra_headers=headers))
+
+    def parse_okx(self, data) -> List[FundingRate]:
         if not data or data.get('code') != '0': return []
         res, ts = [], time.time()
         for i in data.get('data', []):
-            inst_id = i.get('instId', '')
-            if inst_id.endswith('USDT-SWAP') and i.get('fundingRate'):
+            inst_id = i.get('instId', '')     # BTC-USDT-SWAP, BTC-USDC-SWAP, BTC-USD-SWAP (inverse)
+            if inst_id.endswith('-SWAP') and i.get('fundingRate'):
+                symbol = instruments.from_name(inst_id[:-5], inverse=inst_id.endswith('-USD-SWAP'))
+                if symbol is None: continue
                 try:
-                    symbol = inst_id.split('-')[0] + "USDT"
-                    res.append(FundingRate(exchange="OKX", symbol=symbol, rate=float(i['fundingRate']) * 100, timestamp=ts))
+                    res.append(FundingRate(exchange="OKX", symbol=symbol, rate=float(i['fundingRate']) * 100, timestamp=ts,
+                                           mark_price=self._px(i.get('markPx')), index_price=self._px(i.get('idxPx')),
+                                           last_price=self._px(i.get('last')),
+                                           next_funding_time=self._ms(i.get('nextFundingTime')), venue_ts=self._ms(i.get('ts'))))
                 except: continue
         return res
 
     async def get_kucoin(self) -> List[FundingRate]:
-        data = await self._fetch("https://api-futures.kucoin.com/api/v1/contracts/active", mode='std')
+        return self.parse_kucoin(await self._fetch("https://api-futures.kucoin.com/api/v1/contracts/active", mode='std'))
+
+    def parse_kucoin(self, data) -> List[FundingRate]:
         if not data or data.get('code') != '200000': return []
         res, ts = [], time.time()
         for i in data.get('data', []):
-            if i.get('symbol', '').endswith('USDTM') and i.get('fundingFeeRate'):
-                try: res.append(FundingRate(exchange="KuCoin", symbol=i['symbol'].replace('USDTM', 'USDT'), rate=float(i['fundingFeeRate']) * 100, timestamp=ts))
+            # XBTUSDTM / XBTUSDCM / XBTUSDM (inverse): the contract carries its own base and quote
+            quote = i.get('quoteCurrency')
+            if quote in instruments.QUOTES and i.get('baseCurrency') and i.get('fundingFeeRate'):
+                symbol = instruments.symbol(i['baseCurrency'], quote, inverse=bool(i.get('isInverse')))
+                try: res.append(FundingRate(exchange="KuCoin", symbol=symbol, rate=float(i['fundingFeeRate']) * 100, timestamp=ts,
+                                             mark_price=self._px(i.get('markPrice')), index_price=self._px(i.get('indexPrice')),
+                                             last_price=self._px(i.get('lastTradePrice')),
+                                             next_funding_time=self._ms(i.get('nextFundingRateTime'), ts)))
                 except: continue
         return res
 
     async def get_bitget(self) -> List[FundingRate]:
-        data = await self._fetch("https://api.bitget.com/api/v2/mix/market/tickers?productType=USDT-FUTURES", mode='std')
+        return self.parse_bitget(await self._fetch("https://api.bitget.com/api/v2/mix/market/tickers?productType=USDT-FUTURES", mode='std'))
+
+    def parse_bitget(self, data) -> List[FundingRate]:
         if not data or data.get('code') != '00000': return []
         res, ts = [], time.time()
         for i in data.get('data', []):
             if i.get('symbol', '').endswith('USDT') and i.get('fundingRate'):
-                try: res.append(FundingRate(exchange="Bitget", symbol=i['symbol'], rate=float(i['fundingRate']) * 100, timestamp=ts))
+                try: res.append(FundingRate(exchange="Bitget", symbol=i['symbol'], rate=float(i['fundingRate']) * 100, timestamp=ts,
+                                             mark_price=self._px(i.get('markPrice')), index_price=self._px(i.get('indexPrice')),
+                                             last_price=self._px(i.get('lastPr')), venue_ts=self._ms(i.get('ts'))))
                 except: continue
         return res
 
     async def get_mexc(self) -> List[FundingRate]:
-        data = await self._fetch("https://contract.mexc.com/api/v1/contract/ticker", mode='std')
+        return self.parse_mexc(await self._fetch("https://contract.mexc.com/api/v1/contract/ticker", mode='std'))
+
+    def parse_mexc(self, data) -> List[FundingRate]:
         if not data or not data.get('success'): return []
         res, ts = [], time.time()
         for i in data.get('data', []):
-            if i.get('symbol', '').endswith('_USDT') and i.get('fundingRate'):
-                try: res.append(FundingRate(exchange="MEXC", symbol=self._norm(i['symbol']), rate=float(i['fundingRate']) * 100, timestamp=ts))
+            sym = i.get('symbol', '')     # BTC_USDT, BTC_USDC, BTC_USD (inverse)
+            if i.get('fundingRate') and (symbol := instruments.from_name(sym, inverse=sym.endswith('_USD'))):
+                try: res.append(FundingRate(exchange="MEXC", symbol=symbol, rate=float(i['fundingRate']) * 100, timestamp=ts,
+                                             mark_price=self._px(i.get('fairPrice')), index_price=self._px(i.get('indexPrice')),
+                                             last_price=self._px(i.get('lastPrice')), venue_ts=self._ms(i.get('timestamp'))))
                 except: continue
         return res
 
     async def get_huobi(self) -> List[FundingRate]:
         url = "https://api.hbdm.vn/linear-swap-api/v1/swap_batch_funding_rate"
-        data = await self._fetch(url, mode='std')
+        return self.parse_huobi(await self._fetch(url, mode='std'))
+
+    def parse_huobi(self, data, exchange: str = "Huobi") -> List[FundingRate]:
         if not data or data.get('status') != 'ok': return []
-        res, ts = [], time.time()
+        res, ts, venue_ts = [], time.time(), self._ms(data.get('ts'))
         for i in data.get('data', []):
-            if i.get('contract_code', '').endswith('USDT') and i.get('funding_rate'):
-                try: res.append(FundingRate(exchange="Huobi", symbol=self._norm(i['contract_code']), rate=float(i['funding_rate']) * 100, timestamp=ts))
+            if i.get('contract_code', '').endswith(('-USDT', '-USDC')) and i.get('funding_rate'):
+                try: res.append(FundingRate(exchange=exchange, symbol=self._norm(i['contract_code']), rate=float(i['funding_rate']) * 100, timestamp=ts,
+                                               next_funding_time=self._ms(i.get('funding_time')), venue_ts=venue_ts))
                 except: continue
         return res
 
     async def get_bingx(self) -> List[FundingRate]:
-        data = await self._fetch("https://open-api.bingx.com/openApi/swap/v2/quote/premiumIndex", mode='std')
+        return self.parse_bingx(await self._fetch("https://open-api.bingx.com/openApi/swap/v2/quote/premiumIndex", mode='std'))
+
+    def parse_bingx(self, data) -> List[FundingRate]:
         if not data or data.get('code') != 0: return []
         res, ts = [], time.time()
         for i in data.get('data', []):
             rate_val = i.get('lastFundingRate')
-            if i.get('symbol', '').endswith('-USDT') and rate_val:
-                try: res.append(FundingRate(exchange="BingX", symbol=self._norm(i['symbol']), rate=float(rate_val) * 100, timestamp=ts))
+            if i.get('symbol', '').endswith(('-USDT', '-USDC')) and rate_val:
+                try: res.append(FundingRate(exchange="BingX", symbol=self._norm(i['symbol']), rate=float(rate_val) * 100, timestamp=ts,
+                                             mark_price=self._px(i.get('markPrice')), index_price=self._px(i.get('indexPrice')),
+                                             next_funding_time=self._ms(i.get('nextFundingTime'))))
                 except: continue
         return res
 
     async def get_kraken(self) -> List[FundingRate]:
-        data = await self._fetch("https://futures.kraken.com/derivatives/api/v3/tickers", mode='std')
+        return self.parse_kraken(await self._fetch("https://futures.kraken.com/derivatives/api/v3/tickers", mode='std'))
+
+    def parse_kraken(self, data) -> List[FundingRate]:
         if not data or data.get('result') != 'success': return []
-        res, ts = [], time.time()
+        res, ts, venue_ts = [], time.time(), self._iso(data.get('serverTime'))
         seen = set()
         for i in data.get('tickers', []):
             sym = i.get('symbol', '').upper()
-            if 'USD' not in sym or 'fundingRate' not in i: continue
-            if "XBT" in sym: norm = "BTCUSDT"
-            elif "ETH" in sym: norm = "ETHUSDT"
-            else: norm = sym.replace('PF_', '').replace('USD', '') + "USDT"
-            if norm in seen: continue
-            seen.add(norm)
-            try: res.append(FundingRate(exchange="Kraken", symbol=norm, rate=float(i['fundingRate']), timestamp=ts))
+            # PF_XBTUSD: multi-collateral linear perp quoted in USD; PI_XBTUSD: inverse
+            if 'fundingRate' not in i or sym[:3] not in ('PF_', 'PI_'): continue
+            norm = instruments.from_name(sym[3:], inverse=sym[:3] == 'PI_')
+            if norm is None or norm in seen: continue
+            try:
+                # fundingRate is an absolute amount per contract (USD for PF_, coin for PI_) per hour;
+                # relativeFundingRate is the fraction of the mark, else derive it from the mark
+                mark = self._px(i.get('markPrice'))
+                if i.get('relativeFundingRate') is not None:
+                    rate = float(i['relativeFundingRate']) * 100
+                elif mark:
+                    rate = float(i['fundingRate']) / mark * 100
+                else: continue
+                res.append(FundingRate(exchange="Kraken", symbol=norm, rate=rate, timestamp=ts, mark_price=mark,
+                                       index_price=self._px(i.get('indexPrice')), last_price=self._px(i.get('last')),
+                                       venue_ts=venue_ts))
+                seen.add(norm)
             except: continue
         return res
 
     async def get_dydx(self) -> List[FundingRate]:
-        data = await self._fetch("https://indexer.dydx.trade/v4/perpetualMarkets", mode='std')
+        return self.parse_dydx(await self._fetch("https://indexer.dydx.trade/v4/perpetualMarkets", mode='std'))
+
+    def parse_dydx(self, data) -> List[FundingRate]:
         if not data or 'markets' not in data: return []
         res, ts = [], time.time()
         for key, i in data['markets'].items():
             if i.get('nextFundingRate'):
                 try:
-                    symbol = i.get('ticker', key).replace('-USD', 'USDT')
+                    symbol = i.get('ticker', key).replace('-', '')     # BTC-USD: USDC-settled, USD-quoted
                     rate = float(i['nextFundingRate']) * 100
-                    res.append(FundingRate(exchange="dYdX", symbol=symbol, rate=rate, timestamp=ts))
+                    res.append(FundingRate(exchange="dYdX", symbol=symbol, rate=rate, timestamp=ts,
+                                           index_price=self._px(i.get('oraclePrice'))))
                 except: continue
         return res
 
     async def get_bitmex(self) -> List[FundingRate]:
-        data = await self._fetch("https://www.bitmex.com/api/v1/instrument/active", mode='std')
+        return self.parse_bitmex(await self._fetch("https://www.bitmex.com/api/v1/instrument/active", mode='std'))
+
+    def parse_bitmex(self, data) -> List[FundingRate]:
         if not data: return []
         res, ts = [], time.time()
         for i in data:
             if i.get('typ') == 'FFWCSX' and i.get('fundingRate'):
                 sym = i.get('symbol', '')
-                if sym == 'XBTUSD': norm = 'BTCUSDT'
-                elif sym == 'ETHUSD': norm = 'ETHUSDT'
-                elif sym.endswith('USDT'): norm = sym
-                else: continue
-                try: res.append(FundingRate(exchange="BitMEX", symbol=norm, rate=float(i['fundingRate']) * 100, timestamp=ts))
+                # XBTUSD is inverse; ETHUSD and the other USD quanto perps settle in XBT but pay in
+                # USD terms linearly, so they stand with the linear USD contracts
+                inverse = i['isInverse'] if 'isInverse' in i else sym == 'XBTUSD'
+                norm = instruments.from_name(sym, inverse=bool(inverse))
+                if norm is None: continue
+                try: res.append(FundingRate(exchange="BitMEX", symbol=norm, rate=float(i['fundingRate']) * 100, timestamp=ts,
+                                             mark_price=self._px(i.get('markPrice')), index_price=self._px(i.get('indicativeSettlePrice')),
+                                             last_price=self._px(i.get('lastPrice')),
+                                             next_funding_time=self._iso(i.get('fundingTimestamp')), venue_ts=self._iso(i.get('timestamp'))))
                 except: continue
         return res
 
     async def get_phemex(self) -> List[FundingRate]:
         url = "https://api.phemex.com/md/v2/ticker/24hr"
-        data = await self._fetch(url, mode='std', extra_headers={"Accept": "*/*"})
+        return self.parse_phemex(await self._fetch(url, mode='std', extra_headers={"Accept": "*/*"}))
+
+    def parse_phemex(self, data) -> List[FundingRate]:
         if not data or 'result' not in data: return []
         res, ts = [], time.time()
         for i in data['result']:
             if i.get('symbol', '').endswith('USDT') and i.get('fundingRate'):
                 try:
                     rate = (float(i['fundingRate']) / 100000000) * 100
-                    res.append(FundingRate(exchange="Phemex", symbol=i['symbol'], rate=rate, timestamp=ts))
+                    # Prices are scaled integers (Ep, 1e4)
+                    res.append(FundingRate(exchange="Phemex", symbol=i['symbol'], rate=rate, timestamp=ts,
+                                           mark_price=self._px(i.get('markPrice'), 1e4), index_price=self._px(i.get('indexPrice'), 1e4),
+                                           last_price=self._px(i.get('close'), 1e4), venue_ts=self._ms(i.get('timestamp'), unit=1e9)))
                 except: continue
         return res
 
     async def get_htx(self) -> List[FundingRate]:
         url = "https://api.hbdm.com/linear-swap-api/v1/swap_batch_funding_rate"
-        data = await self._fetch(url, mode='std')
-        if not data or data.get('status') != 'ok': return []
-        res, ts = [], time.time()
-        for i in data.get('data', []):
-            if i.get('contract_code', '').endswith('USDT') and i.get('funding_rate'):
-                try:
-                    res.append(FundingRate(exchange="HTX", symbol=self._norm(i['contract_code']), rate=float(i['funding_rate']) * 100, timestamp=ts))
-                except: continue
-        return res
+        return self.parse_huobi(await self._fetch(url, mode='std'), exchange="HTX")
 
     async def get_crypto_com(self) -> List[FundingRate]:
         url = "https://deriv-api.crypto.com/v1/public/get-valuations?valuation_type=funding_rate"
-        data = await self._fetch(url, mode='browser')
-        
+        return self.parse_crypto_com(await self._fetch(url, mode='browser'))
+
+    def parse_crypto_com(self, data) -> List[FundingRate]:
         if not data or data.get('code') != 0: return []
         res, ts = [], time.time()
         
@@ -250,27 +381,15 @@ class AsyncFetcher:
             
             if sym.endswith('PERP') and rate is not None:
                 try:
-                    norm = sym.replace('_', '').replace('-PERP', '')
+                    norm = instruments.from_name(sym.replace('_', '').replace('-PERP', ''))     # BTCUSD-PERP
+                    if norm is None: continue
                     res.append(FundingRate(exchange="CryptoCom", symbol=norm, rate=float(rate) * 100, timestamp=ts))
                 except: continue
         return res
 
     async def get_coinbase(self) -> List[FundingRate]:
-        res, ts = [], time.time()
-        
         url_int = "https://api.international.coinbase.com/api/v1/instruments"
-        data_int = await self._fetch(url_int, mode='browser')
-        
-        if data_int and 'results' in data_int:
-            for i in data_int['results']:
-                if i.get('type') == 'PERPETUAL':
-                    sym = i.get('symbol', '')  
-                    rate = i.get('funding_rate')
-                    if sym and rate:
-                        try:
-                            norm = sym.replace('-', '').replace('PERP', 'USDT')
-                            res.append(FundingRate(exchange="Coinbase", symbol=norm, rate=float(rate) * 100, timestamp=ts))
-                        except: continue
+        res = self.parse_coinbase(await self._fetch(url_int, mode='browser'))
 
         if not res:
             url_adv = "https://api.coinbase.com/api/v3/brokerage/products"
@@ -281,11 +400,29 @@ class AsyncFetcher:
                         pass 
         return res
 
+    def parse_coinbase(self, data_int) -> List[FundingRate]:
+        res, ts = [], time.time()
+        if data_int and 'results' in data_int:
+            for i in data_int['results']:
+                if i.get('type') == 'PERPETUAL':
+                    sym = i.get('symbol', '')  
+                    rate = i.get('funding_rate')
+                    if sym and rate:
+                        try:
+                            # BTC-PERP: USDC-margined and settled
+                            norm = instruments.symbol(i.get('base_asset_name') or sym.split('-')[0],
+                                                      i.get('quote_asset_name') or 'USDC')
+                            res.append(FundingRate(exchange="Coinbase", symbol=norm, rate=float(rate) * 100, timestamp=ts,
+                                                   mark_price=self._px(i.get('mark_price')), index_price=self._px(i.get('index_price'))))
+                        except: continue
+        return res
+
     async def get_hyperliquid(self) -> List[FundingRate]:
         url = "https://api.hyperliquid.xyz/info"
         post_body = {"type": "metaAndAssetCtxs"}
-        data = await self._fetch(url, mode='std', method='POST', post_data=post_body)
-        
+        return self.parse_hyperliquid(await self._fetch(url, mode='std', method='POST', post_data=post_body))
+
+    def parse_hyperliquid(self, data) -> List[FundingRate]:
         if not data or not isinstance(data, list) or len(data) < 2: return []
         
         universe = data[0].get('universe', []) if isinstance(data[0], dict) else data[0]
@@ -299,72 +436,66 @@ class AsyncFetcher:
                 name = u.get('name')
                 funding = c.get('funding')
                 if name and funding:
-                    symbol = f"{name}USDT"
-                    res.append(FundingRate(exchange="Hyperliquid", symbol=symbol, rate=float(funding) * 100, timestamp=ts))
+                    symbol = f"{name}USD"     # USDC-margined, quoted against USD
+                    res.append(FundingRate(exchange="Hyperliquid", symbol=symbol, rate=float(funding) * 100, timestamp=ts,
+                                           mark_price=self._px(c.get('markPx')), index_price=self._px(c.get('oraclePx')),
+                                           last_price=self._px(c.get('midPx'))))
             except: continue
         return res
 
     async def get_coinex(self) -> List[FundingRate]:
         url = "https://api.coinex.com/perpetual/v1/market/ticker/all"
-        data = await self._fetch(url, mode='std')
+        return self.parse_coinex(await self._fetch(url, mode='std'))
+
+    def parse_coinex(self, data) -> List[FundingRate]:
         if not data or data.get('code') != 0: return []
         
         ticker_data = data.get('data', {}).get('ticker', {})
-        res, ts = [], time.time()
+        res, ts, venue_ts = [], time.time(), self._ms(data.get('data', {}).get('date'))
         
         for sym, details in ticker_data.items():
             rate = details.get('funding_rate_next') or details.get('funding_rate_last')
-            if sym.endswith('USDT') and rate:
-                try:
-                    res.append(FundingRate(exchange="CoinEx", symbol=sym, rate=float(rate) * 100, timestamp=ts))
-                except: continue
+            if not rate: continue
+            if sym.endswith('USDT'): norm = sym
+            elif sym.endswith('USD'): norm = instruments.symbol(sym[:-3], 'USD', inverse=True)     # Coin-margined
+            else: continue
+            try:
+                res.append(FundingRate(exchange="CoinEx", symbol=norm, rate=float(rate) * 100, timestamp=ts,
+                                       mark_price=self._px(details.get('sign_price')), index_price=self._px(details.get('index_price')),
+                                       last_price=self._px(details.get('last')), venue_ts=venue_ts))
+            except: continue
         return res
 
     async def get_bitunix(self) -> List[FundingRate]:
         url = "https://fapi.bitunix.com/api/v1/futures/market/funding_rate/batch"
-        data = await self._fetch(url, mode='std')
-        
+        res = self.parse_bitunix(await self._fetch(url, mode='std'))
+
+        if not res:
+            url_ticker = "https://fapi.bitunix.com/api/v1/futures/market/tickers"
+            res = self.parse_bitunix(await self._fetch(url_ticker, mode='std'))
+        return res
+
+    def parse_bitunix(self, data) -> List[FundingRate]:
         res, ts = [], time.time()
         if data and data.get('code') == 0:
-             for i in data.get('data', []):
+            for i in data.get('data', []):
                 if i.get('symbol', '').endswith('USDT') and i.get('fundingRate'):
                     try:
-                        res.append(FundingRate(exchange="BitUnix", symbol=i['symbol'], rate=float(i['fundingRate']), timestamp=ts))
+                        res.append(FundingRate(exchange="BitUnix", symbol=i['symbol'], rate=float(i['fundingRate']), timestamp=ts,
+                                               mark_price=self._px(i.get('markPrice')), last_price=self._px(i.get('lastPrice'))))
                     except: continue
-
-        if not res:
-            url_ticker = "https://fapi.bitunix.com/api/v1/futures/market/tickers"
-            data_t = await self._fetch(url_ticker, mode='std')
-            if data_t and data_t.get('code') == 0:
-                for i in data_t.get('data', []):
-                    if i.get('symbol', '').endswith('USDT') and i.get('fundingRate'):
-                        try:
-                            res.append(FundingRate(exchange="BitUnix", symbol=i['symbol'], rate=float(i['fundingRate']), timestamp=ts))
-                        except: continue
         return res
 
     async def get_bitstamp(self) -> List[FundingRate]:
         pairs_url = "https://www.bitstamp.net/api/v2/trading-pairs-info/"
-        pairs_data = await self._fetch(pairs_url, mode='std')
-        
-        if not pairs_data: return []
+        perp_candidates = self.parse_bitstamp_pairs(await self._fetch(pairs_url, mode='std'))
         
-        perp_candidates = []
-        for p in pairs_data:
-             if 'description' in p and 'Perpetual' in p['description']:
-                 perp_candidates.append(p['url_symbol'])
-
         res, ts = [], time.time()
         
         async def fetch_one(sym):
             f_url = f"https://www.bitstamp.net/api/v2/funding_rate/{sym}/"
-            data = await self._fetch(f_url, mode='std')
-            if data and 'funding_rate' in data:
-                try:
-                    norm = sym.upper()
-                    rate = float(data['funding_rate']) * 100
-                    res.append(FundingRate(exchange="Bitstamp", symbol=norm, rate=rate, timestamp=ts))
-                except: pass
+            fr = self.parse_bitstamp_rate(sym, await self._fetch(f_url, mode='std'), ts)
+            if fr: res.append(fr)
 
         if perp_candidates:
             tasks = [fetch_one(s) for s in perp_candidates]
@@ -372,44 +503,139 @@ class AsyncFetcher:
 
         return res
 
-    async def fetch_all(self) -> List[FundingRate]:
-        if not self.session: await self.start_session()
-        tasks_map = {
-            "Binance": self.get_binance(),
-            "Bybit": self.get_bybit(),
-            "OKX": self.get_okx(),
-            "GateIO": self.get_gateio(),
-            "KuCoin": self.get_kucoin(),
-            "Bitget": self.get_bitget(),
-            "MEXC": self.get_mexc(),
-            "Huobi": self.get_huobi(),
-            "BingX": self.get_bingx(),
-            "Kraken": self.get_kraken(),
-            "dYdX": self.get_dydx(),
-            "BitMEX": self.get_bitmex(),
-            "Phemex": self.get_phemex(),
-            "HTX": self.get_htx(),
-            "CryptoCom": self.get_crypto_com(),
-            "Coinbase": self.get_coinbase(),
-            "Hyperliquid": self.get_hyperliquid(),
-            "CoinEx": self.get_coinex(),
-            "BitUnix": self.get_bitunix(),
-            "Bitstamp": self.get_bitstamp(),
+    def parse_bitstamp_pairs(self, pairs_data) -> List[str]:
+        if not pairs_data: return []
+        perp_candidates = []
+        for p in pairs_data:
+             if 'description' in p and 'Perpetual' in p['description']:
+                 perp_candidates.append(p['url_symbol'])
+        return perp_candidates
+
+    def parse_bitstamp_rate(self, sym: str, data, ts: float) -> Optional[FundingRate]:
+        if data and 'funding_rate' in data:
+            try:
+                norm = instruments.from_name(sym.upper().replace('-PERP', ''))     # btcusd-perp
+                if norm is None: return None
+                rate = float(data['funding_rate']) * 100
+                venue_ts = float(data['timestamp']) if data.get('timestamp') else None
+                return FundingRate(exchange="Bitstamp", symbol=norm, rate=rate, timestamp=ts, venue_ts=venue_ts)
+            except: pass
+        return None
+
+    def adapters(self) -> Dict[str, Callable[[], Awaitable[List[FundingRate]]]]:
+        return {
+            "Binance": self.get_binance,
+            "Bybit": self.get_bybit,
+            "OKX": self.get_okx,
+            "GateIO": self.get_gateio,
+            "KuCoin": self.get_kucoin,
+            "Bitget": self.get_bitget,
+            "MEXC": self.get_mexc,
+            "Huobi": self.get_huobi,
+            "BingX": self.get_bingx,
+            "Kraken": self.get_kraken,
+            "dYdX": self.get_dydx,
+            "BitMEX": self.get_bitmex,
+            "Phemex": self.get_phemex,
+            "HTX": self.get_htx,
+            "CryptoCom": self.get_crypto_com,
+            "Coinbase": self.get_coinbase,
+            "Hyperliquid": self.get_hyperliquid,
+            "CoinEx": self.get_coinex,
+            "BitUnix": self.get_bitunix,
+            "Bitstamp": self.get_bitstamp,
         }
-        results = await asyncio.gather(*tasks_map.values(), return_exceptions=True)
-        flat_results = []
-        debug_stats = {}
+
+    async def fetch_all(self, only: Optional[Iterable[str]] = None) -> List[FundingRate]:
+        """
+        Polls every venue, or just the venues in `only` (see scheduler.py); the others contribute
+        the rows from their last poll, so callers always get a whole snapshot.
+        """
+        if not self.session: await self.start_session()
+        adapters = self.adapters()
+        if only is not None:
+            only = set(only)
+            adapters = {name: fn for name, fn in adapters.items() if name in only}
+        venue_counts = self.venue_counts if only is not None else {}
+        if only is None:
+            self.venue_rows = {}
+
+        # Venues with an open breaker are skipped; the prober decides when to try them again
+        breakers = self.breakers
+        for name in adapters:
+            if name not in breakers:
+                breakers[name] = circuit.CircuitBreaker(name)
+            if not breakers[name].allow():
+                venue_counts[name] = "OPEN"
+                self.venue_rows[name] = []
+        tasks_map = {name: fn() for name, fn in adapters.items() if breakers[name].allow()}
+        failures: Dict[str, List[str]] = {}
+        results = await asyncio.gather(*(self._timed(n, c, failures) for n, c in tasks_map.items()),
+                                       return_exceptions=True)
+        now = time.time()
         for (name, _), res in zip(tasks_map.items(), results):
+            if isinstance(res, list) and res:
+                breakers[name].success()
+            else:
+                noted = failures.get(name)
+                breakers[name].failure("error" if isinstance(res, BaseException) else (noted[0] if noted else "empty"), now)
             if isinstance(res, list):
-                count = len(res)
-                debug_stats[name] = count
-                flat_results.extend(res)
+                venue_counts[name] = len(res)
+                self.venue_rows[name] = res
             else:
-                debug_stats[name] = "ERR"
-        
-        # Compact Report
-        print("\n🔍 FETCH REPORT:")
-        for name, count in debug_stats.items():
-            status = f"[green]✅ {count}[/green]" if isinstance(count, int) and count > 0 else f"[red]❌ {count}[/red]"
-            print(f"   {name:12s}: {status}")
+                venue_counts[name] = "ERR"
+                self.venue_rows[name] = []
+        if self._probe_task is None and any(b.state == circuit.OPEN for b in self.breakers.values()):
+            self._probe_task = asyncio.ensure_future(self._probe_loop())
+        # Shown by the terminal view; nothing is printed from here
+        self.venue_counts = venue_counts
+        flat_results = []
+        for rows in self.venue_rows.values():
+            flat_results.extend(rows)
         return flat_results
+
+    async def _timed(self, name: str, coro, failures: Dict[str, List[str]]):
+        start = time.perf_counter()
+        failures[name] = circuit.track()    # This task's context: only this adapter's requests land here
+        dates: List[str] = []
+        _dates.set(dates)
+        try:
+            return await coro
+        finally:
+            self.venue_timings[name] = time.perf_counter() - start
+            if dates:
+                try:
+                    self.venue_dates[name] = parsedate_to_datetime(dates[-1]).timestamp()
+                except (TypeError, ValueError):
+                    pass
+
+    def venue_health(self) -> Dict[str, Dict[str, object]]:
+        return {name: b.snapshot() for name, b in self.breakers.items()}
+
+    async def _probe_loop(self):
+        """Background health checks for venues with an open breaker; exits once none are open."""
+        adapters = self.adapters()
+        running: Dict[str, asyncio.Task] = {}
+        try:
+            while any(b.state == circuit.OPEN for b in self.breakers.values()):
+                now = time.time()
+                for name, breaker in self.breakers.items():
+                    if breaker.probe_due(now) and name not in running and name in adapters:
+                        running[name] = asyncio.ensure_future(self._probe(breaker, adapters[name]))
+                for name in [n for n, task in running.items() if task.done()]:
+                    del running[name]
+                await asyncio.sleep(1.0)
+        finally:
+            for task in running.values():
+                task.cancel()
+            self._probe_task = None
+
+    async def _probe(self, breaker: circuit.CircuitBreaker, adapter):
+        failures = circuit.track()
+        url = circuit.PROBE_URLS.get(breaker.name)
+        try:
+            ok = (await self._fetch(url)) is not None if url else bool(await adapter())
+        except Exception:
+            ok = False
+            failures.append("error")
+        breaker.probed(ok, failures[0] if failures else "empty", time.time())
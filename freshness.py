@@ -0,0 +1,50 @@
+import statistics
+from typing import Dict, Iterable, List, Optional
+
+import metrics
+from models import FundingRate
+
+# How old our data is when we publish it, per venue. Three times per row:
+#   venue time    FundingRate.venue_ts from the payload (the median across the venue's rows), else
+#                 the response's Date header (1s resolution) for venues whose payloads carry none
+#   receive time  FundingRate.timestamp, when the response was parsed
+#   publish time  when the snapshot holding the row reached the dashboard (one per cycle)
+# data age = publish - venue time (what a consumer actually sees, including any caching on the
+# venue's side); pipeline latency = publish - receive (our own share of it). Only venues polled
+# this cycle are observed, so rows reused between scheduled polls are not counted twice. A venue
+# clock ahead of ours would read as a negative age; those observe as 0.
+
+AGE_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+DATA_AGE = metrics.histogram("data_age_seconds", "Publish time minus the venue's own quote time", ["exchange"],
+                             buckets=AGE_BUCKETS)
+PIPELINE_LATENCY = metrics.histogram("pipeline_latency_seconds", "Publish time minus receive time", ["exchange"])
+
+
+def venue_time(rows: List[FundingRate], header_date: Optional[float]):
+    """(venue time, source) for one venue's rows: payload timestamps, else the Date header."""
+    stamps = [r.venue_ts for r in rows if r.venue_ts is not None]
+    if stamps:
+        return statistics.median_low(stamps), "payload"
+    if header_date is not None:
+        return header_date, "header"
+    return None, None
+
+
+def observe(venue_rows: Dict[str, List[FundingRate]], venues: Iterable[str], dates: Dict[str, float],
+            published: float) -> Dict[str, Dict[str, object]]:
+    """Observes age and latency for `venues`; returns name -> {age, latency, source} for each."""
+    out = {}
+    for name in venues:
+        rows = venue_rows.get(name)
+        if not rows:
+            continue
+        latency = published - rows[0].timestamp
+        PIPELINE_LATENCY.observe(latency, exchange=name)
+        at, source = venue_time(rows, dates.get(name))
+        age = None
+        if at is not None:
+            age = published - at
+            DATA_AGE.observe(max(age, 0.0), exchange=name)
+        out[name] = {"age": age, "latency": latency, "source": source}
+    return out
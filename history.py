@@ -0,0 +1,197 @@
+import math
+import mmap
+import os
+import struct
+import threading
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("History")
+logger.setLevel(logging.INFO)
+
+# On-disk layout (single file, memory-mapped):
+#   [file header][slot 0][slot 1]...
+#   slot = [slot header][capacity x record]
+# Every (exchange, symbol) series owns one fixed-size slot, so the file never grows
+# per sample and a restart only re-reads the slot headers, not the samples.
+MAGIC = b"DNHIST01"
+FILE_HEADER = struct.Struct("<8sII48x")   # magic, capacity, slots allocated
+SLOT_HEADER = struct.Struct("<56sQ")      # "exchange|symbol" (UTF-8, NUL-padded), total writes
+KEY_BYTES = 56
+RECORD = struct.Struct("<ddd")            # timestamp, rate, price (NaN if unknown)
+GROW_SLOTS = 256
+
+Sample = Tuple[float, float, float]
+
+
+class HistoryStore:
+    def __init__(self, path: str, capacity: int = 4096, heartbeat: float = 60.0, price_tolerance: float = 1e-3):
+        self.path = path
+        self.capacity = capacity
+        # A series only gets a new sample when the rate changed, the price moved by more than
+        # `price_tolerance` (relative), or `heartbeat` seconds passed. Prices tick every fetch;
+        # sampling on every tick would cycle the rings in minutes
+        self.heartbeat = heartbeat
+        self.price_tolerance = price_tolerance
+        self.slot_size = SLOT_HEADER.size + capacity * RECORD.size
+
+        self._lock = threading.Lock()
+        self._slots: Dict[str, int] = {}
+        self._by_symbol: Dict[str, set] = {}
+        self._last: Dict[str, Sample] = {}
+        self._rejected: set = set()     # Keys too long for a slot header: never stored, never truncated
+        self._allocated = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._open()
+
+    # STORAGE
+
+    def _open(self):
+        exists = os.path.exists(self.path) and os.path.getsize(self.path) >= FILE_HEADER.size
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+
+        if exists:
+            with open(self.path, "rb") as f:
+                magic, capacity, allocated = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} is not a history file")
+            if capacity != self.capacity:
+                logger.info(f"History file uses capacity {capacity}, ignoring requested {self.capacity}")
+                self.capacity = capacity
+                self.slot_size = SLOT_HEADER.size + capacity * RECORD.size
+            self._allocated = allocated
+        else:
+            os.ftruncate(self._fd, self._file_size(GROW_SLOTS))
+
+        self._mm = mmap.mmap(self._fd, 0)
+        if not exists:
+            FILE_HEADER.pack_into(self._mm, 0, MAGIC, self.capacity, 0)
+
+        # Rebuild the key index from slot headers only
+        for slot in range(self._allocated):
+            raw, _ = SLOT_HEADER.unpack_from(self._mm, self._slot_offset(slot))
+            self._index(raw.rstrip(b"\0").decode(errors="ignore"), slot)
+
+    def _file_size(self, slots: int) -> int:
+        return FILE_HEADER.size + slots * self.slot_size
+
+    def _slot_offset(self, slot: int) -> int:
+        return FILE_HEADER.size + slot * self.slot_size
+
+    def _index(self, key: str, slot: int):
+        self._slots[key] = slot
+        exchange, symbol = key.split("|", 1)
+        self._by_symbol.setdefault(symbol, set()).add(exchange)
+
+    def _allocate(self, key: str, raw_key: bytes) -> int:
+        slot = self._allocated
+        if self._file_size(slot + 1) > len(self._mm):
+            self._mm.resize(self._file_size(slot + GROW_SLOTS))
+        SLOT_HEADER.pack_into(self._mm, self._slot_offset(slot), raw_key, 0)
+        self._allocated += 1
+        FILE_HEADER.pack_into(self._mm, 0, MAGIC, self.capacity, self._allocated)
+        self._index(key, slot)
+        return slot
+
+    def _last_sample(self, slot: int) -> Optional[Sample]:
+        base = self._slot_offset(slot)
+        _, count = SLOT_HEADER.unpack_from(self._mm, base)
+        if count == 0:
+            return None
+        pos = (count - 1) % self.capacity
+        return RECORD.unpack_from(self._mm, base + SLOT_HEADER.size + pos * RECORD.size)
+
+    # WRITE
+
+    def append(self, exchange: str, symbol: str, ts: float, rate: float, price: Optional[float] = None) -> bool:
+        key = f"{exchange}|{symbol}"
+        price = math.nan if price is None else price
+        with self._lock:
+            if self._mm is None:
+                return False
+            slot = self._slots.get(key)
+            if slot is None:
+                if key in self._rejected:
+                    return False
+                # A truncated key would not match itself after a restart and get a new slot each time
+                raw_key = key.encode()
+                if len(raw_key) > KEY_BYTES:
+                    self._rejected.add(key)
+                    logger.warning(f"Not recording {key!r}: longer than {KEY_BYTES} bytes")
+                    return False
+                slot = self._allocate(key, raw_key)
+
+            last = self._last.get(key)
+            if last is None:
+                last = self._last_sample(slot)
+            if last is not None and ts - last[0] < self.heartbeat and last[1] == rate and (
+                    abs(price - last[2]) <= self.price_tolerance * abs(last[2])
+                    or (math.isnan(last[2]) and math.isnan(price))):
+                return False
+
+            base = self._slot_offset(slot)
+            raw, count = SLOT_HEADER.unpack_from(self._mm, base)
+            pos = count % self.capacity
+            RECORD.pack_into(self._mm, base + SLOT_HEADER.size + pos * RECORD.size, ts, rate, price)
+            SLOT_HEADER.pack_into(self._mm, base, raw, count + 1)
+            self._last[key] = (ts, rate, price)
+            return True
+
+    def record(self, rates: List) -> int:
+        written = 0
+        for r in rates:
+            price = getattr(r, 'price', None)
+            if self.append(r.exchange, r.symbol, r.timestamp, r.rate, price if isinstance(price, (int, float)) else None):
+                written += 1
+        return written
+
+    # READ
+
+    def read(self, exchange: str, symbol: str, since: float = 0.0) -> List[Sample]:
+        with self._lock:
+            slot = self._slots.get(f"{exchange}|{symbol}")
+            if slot is None or self._mm is None:
+                return []
+            base = self._slot_offset(slot)
+            _, count = SLOT_HEADER.unpack_from(self._mm, base)
+            n = min(count, self.capacity)
+            start = count - n
+            out = []
+            # Walk newest -> oldest so a recent `since` stops early
+            for i in range(count - 1, start - 1, -1):
+                pos = i % self.capacity
+                sample = RECORD.unpack_from(self._mm, base + SLOT_HEADER.size + pos * RECORD.size)
+                if sample[0] < since:
+                    break
+                out.append(sample)
+        out.reverse()
+        return out
+
+    def exchanges_for(self, symbol: str) -> List[str]:
+        with self._lock:
+            return sorted(self._by_symbol.get(symbol, ()))
+
+    def persistence(self, exchange: str, symbol: str, window: float, now: float) -> Dict[str, float]:
+        """Share of samples with positive funding and the mean rate over the last `window` seconds."""
+        samples = self.read(exchange, symbol, since=now - window)
+        if not samples:
+            return {"samples": 0, "positive_ratio": 0.0, "mean_rate": 0.0}
+        rates = [s[1] for s in samples]
+        return {
+            "samples": len(rates),
+            "positive_ratio": sum(1 for r in rates if r > 0) / len(rates),
+            "mean_rate": sum(rates) / len(rates),
+        }
+
+    def flush(self):
+        with self._lock:
+            self._mm.flush()
+
+    def close(self):
+        with self._lock:
+            if self._mm is not None:
+                self._mm.flush()
+                self._mm.close()
+                os.close(self._fd)
+                self._mm = None
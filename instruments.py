@@ -0,0 +1,67 @@
+from typing import Dict, NamedTuple, Optional
+
+# Canonical instruments. Every venue's perp is named BASE + QUOTE for linear contracts (BTCUSDT,
+# BTCUSDC, BTCUSD) and BASE + QUOTE + "_INV" for inverse, coin-margined ones (BTCUSD_INV), with
+# the venue's own base aliases resolved (XBT -> BTC). Different quotes and inverse contracts are
+# different instruments: they never share a symbol, and whatever compares venues across them
+# (validation consensus, spread alerts) joins explicitly on the base asset.
+#
+# The symbol is the only thing stored per row (rows, archive, bus, history), so base / quote are
+# derived from it on demand through a cache, and venue names are resolved to it through another:
+# one dict lookup per row either way once the universe has been seen.
+
+QUOTES = ("USDT", "USDC", "USD")     # Checked in this order: USDT / USDC before their prefix USD
+INVERSE_SUFFIX = "_INV"
+ALIASES = {"XBT": "BTC"}
+
+
+class Instrument(NamedTuple):
+    base: str
+    quote: str          # "" when the symbol ends in no known quote
+    inverse: bool
+
+
+def symbol(base: str, quote: str, inverse: bool = False) -> str:
+    base = ALIASES.get(base, base)
+    return f"{base}{quote}{INVERSE_SUFFIX}" if inverse else base + quote
+
+
+_parsed: Dict[str, Instrument] = {}
+
+
+def parse(sym: str) -> Instrument:
+    cached = _parsed.get(sym)
+    if cached is not None:
+        return cached
+    inverse = sym.endswith(INVERSE_SUFFIX)
+    name = sym[:-len(INVERSE_SUFFIX)] if inverse else sym
+    inst = Instrument(name, "", inverse)
+    for quote in QUOTES:
+        if name.endswith(quote) and len(name) > len(quote):
+            inst = Instrument(name[:-len(quote)], quote, inverse)
+            break
+    _parsed[sym] = inst
+    return inst
+
+
+def base(sym: str) -> str:
+    return parse(sym).base
+
+
+_named = ({}, {})     # [inverse] venue name -> canonical symbol, or None
+
+
+def from_name(name: str, inverse: bool = False) -> Optional[str]:
+    """Canonical symbol for a venue name that ends in its quote (XBTUSD, BTC_USDC), or None if none matches."""
+    cache = _named[inverse]
+    try:
+        return cache[name]
+    except KeyError:
+        pass
+    out = None
+    for quote in QUOTES:
+        if name.endswith(quote) and len(name) > len(quote):
+            out = symbol(name[:-len(quote)].rstrip("-_/"), quote, inverse)
+            break
+    cache[name] = out
+    return out
@@ -1,50 +1,161 @@
+import time
+_T0 = time.perf_counter()  # Before any other import, for the startup timing log
+
 import asyncio
 import os
 import threading
 import signal
 import sys
-import time
 from collections import defaultdict
+from datetime import datetime
 from typing import List
+import argparse
+import logging
 from dotenv import load_dotenv
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich import box
 
+# Subsystems a given mode may not need (fetcher/aiohttp, history, archive, Flask, Rich) are
+# imported where they are first used; see `python bench_startup.py` for import costs.
 from models import Opportunity
-from fetcher import AsyncFetcher
-from web_dashboard import start_flask_app, update_dashboard_data
+from web_dashboard import update_dashboard_data, attach_history, attach_shared_snapshot
 from notifier import TelegramNotifier
+from dispatcher import AlertDispatcher
+import metrics
+import checkpoint
+import freshness
+from scheduler import to_8h_basis
 
 load_dotenv()
-console = Console()
+logger = logging.getLogger("Bot")
+logger.setLevel(logging.INFO)
 
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 FETCH_INTERVAL = int(os.getenv("FETCH_INTERVAL", 0.0001))
 MIN_SPREAD = float(os.getenv("MIN_SPREAD", 0.025))
+HISTORY_PATH = os.getenv("HISTORY_PATH", "data/history.ring")
+HISTORY_CAPACITY = int(os.getenv("HISTORY_CAPACITY", 4096))
+HISTORY_HEARTBEAT = float(os.getenv("HISTORY_HEARTBEAT", 60))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "data/archive")  # Empty disables the snapshot archive
+TUI_REFRESH = float(os.getenv("TUI_REFRESH", 2))          # Max terminal redraws per second
+STATUS_INTERVAL = float(os.getenv("STATUS_INTERVAL", 60))  # Seconds between headless status log lines
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "data/checkpoint.json")  # Empty disables warm restarts
+CHECKPOINT_INTERVAL = float(os.getenv("CHECKPOINT_INTERVAL", 60))
+BUS_PUBLISH = os.getenv("BUS_PUBLISH", "")      # e.g. tcp://0.0.0.0:7700 or unix:///run/funding.sock
+BUS_SUBSCRIBE = os.getenv("BUS_SUBSCRIBE", "")  # Take snapshots from a publisher instead of the venues
+POLL_SCHEDULE = os.getenv("POLL_SCHEDULE", "1") != "0"  # Poll around funding settlements instead of continuously
+POLL_WINDOW = float(os.getenv("POLL_WINDOW", 900))   # Seconds before settlement that polling is dense
+POLL_AFTER = float(os.getenv("POLL_AFTER", 60))      # ...and after it, while the next round's rate appears
+POLL_NEAR = float(os.getenv("POLL_NEAR", 5))         # Seconds between polls inside the window
+POLL_FAR = float(os.getenv("POLL_FAR", 300))         # Max seconds between polls outside it
+VALIDATE = os.getenv("VALIDATE", "1") != "0"     # Cross-venue outlier / unit check before anything else sees a snapshot
+OUTLIER_K = float(os.getenv("OUTLIER_K", 10))   # Scaled MADs from the cross-venue median before a rate is dropped
+OUTLIER_FLOOR = float(os.getenv("OUTLIER_FLOOR", 0.5))  # ...but never within this many % per round of it
+MAX_FUNDING_RATE = float(os.getenv("MAX_FUNDING_RATE", 5))  # % per round; anything above is a bad quote
+DEPTH_TOP_K = int(os.getenv("DEPTH_TOP_K", 20))      # Order books fetched for the best K candidates; 0 disables
+DEPTH_TTL = float(os.getenv("DEPTH_TTL", 30))        # Seconds a fetched book is reused
+DEPTH_BAND = float(os.getenv("DEPTH_BAND", 0.5))     # % below the best bid counted as depth
+DEPTH_SIZE = float(os.getenv("DEPTH_SIZE", 10000))   # USD position the executable APR is sized for
+ROLLING = os.getenv("ROLLING", "1") != "0"     # Streaming per-(exchange, symbol) rate statistics
+ROLLING_HALFLIFE = float(os.getenv("ROLLING_HALFLIFE", 28800))  # Seconds for the EWMA / variance weight to halve
+PERSISTENCE_Z = float(os.getenv("PERSISTENCE_Z", 1))  # Std devs taken off the rate for the persistence-adjusted APR
+RANK_BY = os.getenv("RANK_BY", "rate")          # "rate" or "persistence" (persistence-adjusted APR)
+SHM_SNAPSHOT = os.getenv("SHM_SNAPSHOT", "")    # e.g. /dev/shm/funding-snapshot, for `web_dashboard.py --workers`
+
+STAGE_SECONDS = metrics.histogram("cycle_stage_seconds", "Time per run_cycle stage", ["stage"])
+CYCLE_ROWS = metrics.gauge("cycle_rows", "Funding rows returned by the last fetch")
 
 class ArbitrageBot:
-    def __init__(self):
-        self.fetcher = AsyncFetcher(USER_AGENT)
-        self.notifier = TelegramNotifier()
+    def __init__(self, fetcher=None, notifier=None, persist: bool = True, background_alerts: bool = True,
+                 publish: str = ""):
+        if fetcher is None:
+            from fetcher import AsyncFetcher
+            fetcher = AsyncFetcher(USER_AGENT)
+        self.fetcher = fetcher
+        self.notifier = notifier or TelegramNotifier()
+        # Alerts go through a coalescing background worker; replay delivers inline to stay deterministic
+        self.dispatcher = AlertDispatcher(self.notifier) if background_alerts else None
+        self.history = None
+        self.archive = None
+        self.checkpoint_path = None
+        if persist:
+            from history import HistoryStore
+            self.history = HistoryStore(HISTORY_PATH, capacity=HISTORY_CAPACITY, heartbeat=HISTORY_HEARTBEAT)
+            attach_history(self.history)
+            if ARCHIVE_DIR:
+                from archive import SnapshotArchive
+                self.archive = SnapshotArchive(ARCHIVE_DIR)
+            self.checkpoint_path = CHECKPOINT_PATH or None
+        self.shared = []
+        if persist and SHM_SNAPSHOT:
+            from shm_snapshot import SharedSnapshot
+            self.shared = [SharedSnapshot(SHM_SNAPSHOT, writer=True),
+                           SharedSnapshot(SHM_SNAPSHOT + ".metrics", writer=True, slot_size=1024 * 1024),
+                           SharedSnapshot(SHM_SNAPSHOT + ".matrix", writer=True)]
+            attach_shared_snapshot(*self.shared)
+        self._checkpoint_at = time.monotonic()
+        self._checkpoint_task = None
+        # Only a fetcher that polls venues itself can be scheduled per venue (not replay / bus)
+        self.scheduler = None
+        if POLL_SCHEDULE and hasattr(self.fetcher, "adapters"):
+            from scheduler import PollScheduler
+            self.scheduler = PollScheduler(self.fetcher.adapters(), window=POLL_WINDOW, near=POLL_NEAR,
+                                           far=POLL_FAR, after=POLL_AFTER)
+        self.validator = None
+        self.last_validation = None
+        if VALIDATE:
+            from validation import Validator
+            self.validator = Validator(k=OUTLIER_K, floor=OUTLIER_FLOOR, max_abs=MAX_FUNDING_RATE)
+        self.rolling = None
+        self.rank_by = RANK_BY if ROLLING else "rate"
+        if ROLLING:
+            from rolling import RollingStats
+            self.rolling = RollingStats(halflife=ROLLING_HALFLIFE, z=PERSISTENCE_Z)
+        # Books come from the venues, so only a live fetcher can enrich (not replay / bus)
+        self.depth = None
+        if DEPTH_TOP_K > 0 and hasattr(self.fetcher, "adapters"):
+            from depth import DepthEnricher
+            self.depth = DepthEnricher(self.fetcher, k=DEPTH_TOP_K, ttl=DEPTH_TTL, band=DEPTH_BAND, size=DEPTH_SIZE,
+                                       rank_field="persistent_apr" if self.rank_by == "persistence" else "annualized_spread")
+        self.bus = None
+        if publish:
+            from bus import BusPublisher
+            self.bus = BusPublisher(publish)
+        self.clock = time.time      # Replay swaps in the recorded snapshot time
+        self.min_spread = 0.0       # Rates must be strictly above this to count
         self.running = True
         self.latest_opportunities = []
+        self.stage_times = {}
+        self.cycles = 0
+        self.last_status = {}
+        self.freshness = {}     # venue -> {age, latency, source} as of its last poll
 
-    def calculate_arbitrage(self, rates: List) -> List[Opportunity]:
+    def calculate_arbitrage(self, rates: List, stats=None) -> List[Opportunity]:
+        """`stats` (a rolling.RollingView aligned with `rates`) adds rolling statistics to each opportunity."""
         
         opps = []
         
         # 1. Filter for POSITIVE rates (> 0)
-        positives = [r for r in rates if r.rate > 0]
+        min_spread = self.min_spread
+        positives = [i for i, r in enumerate(rates) if r.rate > min_spread]
         
-        # 2. Sort DESCENDING (Most positive first: 5.0, 2.0, 0.1)
-        positives.sort(key=lambda x: x.rate, reverse=True)
+        # 2. Sort DESCENDING (Most positive first: 5.0, 2.0, 0.1), or by persistence-adjusted APR
+        if stats is not None:
+            ewma, stddev = stats.ewma.tolist(), stats.std.tolist()
+            lo, hi = stats.min_24h.tolist(), stats.max_24h.tolist()
+            streak, persistent = stats.streak.tolist(), stats.persistent_apr.tolist()
+        if stats is not None and self.rank_by == "persistence":
+            positives.sort(key=persistent.__getitem__, reverse=True)
+        else:
+            positives.sort(key=lambda i: rates[i].rate, reverse=True)
+
+        # 3. Basis (mark vs index, perp vs spot) for the whole snapshot in one vectorized pass
+        from basis import compute as compute_basis, as_optional    # numpy; kept off the startup path
+        premium, basis = compute_basis(rates)
+        premium, basis = as_optional(premium), as_optional(basis)
 
-        for r in positives:
-            # Check if 'price' exists on the FundingRate object, else N/A
-            price_val = getattr(r, 'price', 'N/A')
-            price_str = f"${price_val}" if price_val != 'N/A' else "N/A"
+        for i in positives:
+            r = rates[i]
+            price_val = r.price
+            price_str = f"${price_val}" if price_val is not None else "N/A"
 
             opp = Opportunity(
                 symbol=r.symbol,
@@ -53,98 +164,250 @@ class ArbitrageBot:
                 short_exchange=price_str,  # Storing Price here
                 short_rate=0.0,
                 spread=r.rate,
-                annualized_spread=r.rate * 3 * 365
+                annualized_spread=r.rate * 3 * 365,
+                price=price_val,
+                premium=premium[i],
+                basis=basis[i],
+                **({} if stats is None else {"ewma": ewma[i], "stddev": stddev[i], "min_24h": lo[i], "max_24h": hi[i],
+                                             "streak": streak[i], "persistent_apr": persistent[i]})
             )
             
             opps.append(opp)
         
         return opps
 
+    async def run_cycle(self, only=None):
+        """
+        One fetch -> calculate -> publish pass. Returns (rates, total_pairs, elapsed).
+        `only` polls just those venues; the rest reuse their last rows for calculation and the
+        dashboard, but are not archived, recorded or folded into the rolling stats again.
+        """
+        start_time = time.perf_counter()
+        
+        # 1. Fetch
+        all_rates = await (self.fetcher.fetch_all() if only is None else self.fetcher.fetch_all(only=only))
+        now = self.clock()
+        t_fetch = time.perf_counter()
+        polled = None if only is None else set(only)
+        
+        # Raw rates go out on the bus and into the archive, so subscribers and replay validate for themselves
+        if self.bus:
+            self.bus.publish(now, all_rates, getattr(self.fetcher, "venue_counts", {}),
+                             getattr(self.fetcher, "venue_dates", {}))
+        if self.archive:
+            self.archive.submit(now, all_rates if polled is None else [r for r in all_rates if r.exchange in polled])
+        if self.validator:
+            all_rates, self.last_validation = self.validator.run(all_rates)
+        t_validate = time.perf_counter()
+        if self.history:
+            self.history.record(all_rates if polled is None else [r for r in all_rates if r.exchange in polled])
+
+        # 2. Stats
+        total_pairs = len(set(r.symbol for r in all_rates))
+        
+        # 3. Calculate. Rolling stats follow each venue's own settlements; everything from here on
+        # compares rates per 8h round, so hourly venues are scaled up once
+        stats = self.rolling.update(all_rates, now, polled) if self.rolling is not None else None
+        all_rates = to_8h_basis(all_rates)
+        self.latest_opportunities = self.calculate_arbitrage(all_rates, stats)
+        t_calc = time.perf_counter()
+        if self.depth:
+            self.latest_opportunities = await self.depth.enrich(self.latest_opportunities)
+        t_depth = time.perf_counter()
+        
+        # 4. Notify & Web
+        update_dashboard_data(self.latest_opportunities, total_pairs, timestamp=now, rates=all_rates,
+                              venues=self.venue_status())
+        t_web = time.perf_counter()
+        if hasattr(self.fetcher, "venue_dates"):
+            # Data age / pipeline latency for the venues polled this cycle, as published
+            polled = self.fetcher.venue_counts if only is None else only
+            self.freshness.update(freshness.observe(self.fetcher.venue_rows, polled, self.fetcher.venue_dates,
+                                                    time.time()))
+        if self.dispatcher:
+            self.dispatcher.submit(self.latest_opportunities, now=datetime.fromtimestamp(now), rates=all_rates)
+        else:
+            await self.notifier.process(self.latest_opportunities, now=datetime.fromtimestamp(now), rates=all_rates)
+        t_notify = time.perf_counter()
+        
+        self.stage_times = {
+            "fetch": t_fetch - start_time,
+            "validate": t_validate - t_fetch,
+            "calculate": t_calc - t_validate,
+            "depth": t_depth - t_calc,
+            "dashboard": t_web - t_depth,
+            "notify": t_notify - t_web,
+        }
+        for stage, seconds in self.stage_times.items():
+            STAGE_SECONDS.observe(seconds, stage=stage)
+        CYCLE_ROWS.set(len(all_rates))
+        self.cycles += 1
+        self.last_status = {"rates": len(all_rates), "pairs": total_pairs, "elapsed": t_notify - start_time, "timestamp": now}
+        self._maybe_checkpoint()
+        return all_rates, total_pairs, t_notify - start_time
+
+    def venue_status(self):
+        """
+        Rows, data age (seconds, as of the venue's last publish) and breaker state per venue for the
+        dashboard, e.g. {"Binance": {"rows": 412, "age": 0.8, "state": "closed", "reason": ""}}.
+        """
+        counts = getattr(self.fetcher, "venue_counts", {})
+        health = self.fetcher.venue_health() if hasattr(self.fetcher, "venue_health") else {}
+        return {name: {"rows": count if isinstance(count, int) else 0,
+                       "age": self.freshness.get(name, {}).get("age"),
+                       **health.get(name, {"state": "closed", "reason": ""})}
+                for name, count in counts.items()}
+
     async def run_loop(self):
         await self.fetcher.start_session()
-        console.print(Panel.fit("[bold green]📈 Positive Funding Monitor Active[/bold green]", border_style="green"))
+        if self.bus:
+            await self.bus.start()
         
         while self.running:
-            start_time = time.perf_counter()
-            
-            # 1. Fetch
-            all_rates = await self.fetcher.fetch_all()
-            
-            # 2. Stats
-            total_pairs = len(set(r.symbol for r in all_rates))
-            
-            # 3. Calculate
-            self.latest_opportunities = self.calculate_arbitrage(all_rates)
-            
-            # 4. Notify & Web
-            update_dashboard_data(self.latest_opportunities, total_pairs)
-            await self.notifier.process(self.latest_opportunities)
-            
-            elapsed = time.perf_counter() - start_time
-            
-            # 5. Output
-            self._print_dashboard(len(all_rates), total_pairs, len(self.latest_opportunities), elapsed)
+            due = None
+            if self.scheduler:
+                await asyncio.sleep(self.scheduler.next_wake(time.time()))
+                due = self.scheduler.due(time.time())
+                if not due:
+                    continue    # Woke early: nothing to poll, and nothing changed
+            all_rates, total_pairs, elapsed = await self.run_cycle(only=due)
+            if self.scheduler:
+                now = time.time()
+                for name in due:
+                    count = self.fetcher.venue_counts.get(name)
+                    ok = isinstance(count, int) and count > 0   # Adapters turn request errors into []
+                    self.scheduler.observe(name, self.fetcher.venue_rows.get(name) if ok else None, now)
             
+            # Output is drawn by TerminalView / log_status on their own schedule
             sleep_time = max(0, FETCH_INTERVAL - elapsed)
             await asyncio.sleep(sleep_time)
 
-    def _print_dashboard(self, total_rates, total_pairs, opp_count, latency):
-        summary = Table(box=box.SIMPLE, show_header=False)
-        summary.add_column("Key", style="cyan")
-        summary.add_column("Val", style="bold white")
-        summary.add_row("⏱️ Latency", f"{latency:.3f}s")
-        summary.add_row("📡 Points", f"{total_rates}")
-        summary.add_row("📈 Positives", f"{opp_count}")
-        
-        # Display Table: Highest Positive Funding
-        opp_table = Table(title="📈 HIGHEST FUNDING RATES (Positive to 0)", box=box.ROUNDED)
-        opp_table.add_column("#", style="dim")
-        opp_table.add_column("Symbol", style="bold white")
-        opp_table.add_column("Exchange", style="cyan")
-        opp_table.add_column("Funding Rate", justify="right", style="bold green")
-        opp_table.add_column("Price", justify="right", style="yellow")
-        
-        # Display top 20
-        for i, o in enumerate(self.latest_opportunities[:20], 1):
-            # o.short_exchange is where we stored the price string
-            opp_table.add_row(
-                str(i), 
-                o.symbol, 
-                o.long_exchange, 
-                f"{o.long_rate:.4f}%", 
-                o.short_exchange 
-            )
+    async def log_status(self, interval: float = STATUS_INTERVAL):
+        """Headless replacement for the terminal view: one summary line every `interval` seconds."""
+        last = 0
+        while True:
+            await asyncio.sleep(interval)
+            s = self.last_status
+            logger.info(f"cycles={self.cycles - last} rows={s.get('rates', 0)} pairs={s.get('pairs', 0)} "
+                        f"positives={len(self.latest_opportunities)} last_cycle={s.get('elapsed', 0.0):.3f}s")
+            last = self.cycles
 
-        console.print(Panel(summary, title="Status"))
-        if self.latest_opportunities:
-            console.print(opp_table)
-        else:
-            console.print("[yellow]No positive funding rates found.[/yellow]")
+    def restore_checkpoint(self) -> bool:
+        """Publishes the last saved snapshot (marked stale) so consumers have data before the first fetch."""
+        if not self.checkpoint_path:
+            return False
+        state = checkpoint.load(self.checkpoint_path)
+        if state is None:
+            return False
+        self.latest_opportunities = state["opportunities"]
+        self.last_status = {"rates": state["meta"].get("rates", 0), "pairs": state["total_pairs"],
+                            "elapsed": 0.0, "timestamp": state["timestamp"], "stale": True}
+        update_dashboard_data(self.latest_opportunities, state["total_pairs"], timestamp=state["timestamp"], stale=True)
+        logger.info(f"Restored {len(self.latest_opportunities)} opportunities from checkpoint "
+                    f"({time.time() - state['timestamp']:.0f}s old)")
+        return True
+
+    def _checkpoint_state(self):
+        s = self.last_status
+        return checkpoint.snapshot(self.latest_opportunities, s.get("pairs", 0), s.get("timestamp", 0.0),
+                                   {"rates": s.get("rates", 0), "venue_counts": getattr(self.fetcher, "venue_counts", {})})
+
+    def _maybe_checkpoint(self):
+        # Periodic so crash restarts are warm too; serialisation and fsync run off the loop
+        if not self.checkpoint_path or self.last_status.get("stale"):
+            return
+        if time.monotonic() - self._checkpoint_at < CHECKPOINT_INTERVAL:
+            return
+        if self._checkpoint_task and not self._checkpoint_task.done():
+            return
+        self._checkpoint_at = time.monotonic()
+        loop = asyncio.get_running_loop()
+        self._checkpoint_task = loop.run_in_executor(None, checkpoint.save, self.checkpoint_path, self._checkpoint_state())
+
+    def save_checkpoint(self):
+        if self.checkpoint_path and self.cycles:
+            checkpoint.save(self.checkpoint_path, self._checkpoint_state())
 
     async def close(self):
+        if self._checkpoint_task:
+            await self._checkpoint_task
+        self.save_checkpoint()
+        if self.bus:
+            await self.bus.close()
+        if self.depth:
+            await self.depth.close()
         await self.fetcher.close()
+        if self.dispatcher:
+            await self.dispatcher.close()
+        await self.notifier.close()
+        if self.history:
+            self.history.close()
+        if self.archive:
+            self.archive.close()
+        for shared in self.shared:
+            shared.close()
 
 def signal_handler(sig, frame):
     print("\n[INFO] Shutting down...")
     sys.exit(0)
 
-async def main():
-    bot = ArbitrageBot()
+async def main(headless: bool = False, web: bool = True, publish: str = "", subscribe: str = ""):
+    fetcher = None
+    if subscribe:
+        from bus import BusSubscriber
+        fetcher = BusSubscriber(subscribe)
+    bot = ArbitrageBot(fetcher=fetcher, publish=publish)
+    bot.restore_checkpoint()
+    if web:
+        from web_dashboard import start_flask_app
+        threading.Thread(target=start_flask_app, daemon=True).start()
+    if headless:
+        view = None
+        status = asyncio.ensure_future(bot.log_status())
+    else:
+        from terminal import TerminalView   # Rich is only imported when someone is watching
+        view = TerminalView(bot, refresh_hz=TUI_REFRESH)
+        view.start()
+        status = None
+    logger.info(f"Ready in {(time.perf_counter() - _T0) * 1000:.0f}ms")
     try:
         await bot.run_loop()
     finally:
+        if status:
+            status.cancel()
+        if view:
+            await view.stop()
         await bot.close()
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Positive funding rate monitor")
+    parser.add_argument("--headless", action="store_true",
+                        help="no terminal UI (Rich is not imported); log a status line every STATUS_INTERVAL seconds. "
+                             "Default when stdout is not a TTY.")
+    parser.add_argument("--tui", action="store_true", help="force the terminal UI even without a TTY")
+    parser.add_argument("--no-web", action="store_true", help="do not start the dashboard (Flask is not imported)")
+    parser.add_argument("--publish", default=BUS_PUBLISH, metavar="ADDR",
+                        help="broadcast every snapshot on tcp://host:port or unix:///path")
+    parser.add_argument("--subscribe", default=BUS_SUBSCRIBE, metavar="ADDR",
+                        help="drive this bot from a publisher's snapshots instead of polling venues")
+    args = parser.parse_args()
+    args.headless = not args.tui and (args.headless or not sys.stdout.isatty())
+    return args
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.headless:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
     signal.signal(signal.SIGINT, signal_handler)
-    
-    flask_thread = threading.Thread(target=start_flask_app, daemon=True)
-    flask_thread.start()
+    signal.signal(signal.SIGTERM, signal_handler)   # systemd / docker stop: still save the checkpoint
     
     try:
         if sys.platform != 'win32':
-            import uvloop
-            uvloop.install()
-        asyncio.run(main())
+            try:
+                import uvloop
+                uvloop.install()
+            except ImportError:
+                pass
+        asyncio.run(main(args.headless, web=not args.no_web, publish=args.publish, subscribe=args.subscribe))
     except KeyboardInterrupt:
         pass
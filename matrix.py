@@ -0,0 +1,63 @@
+import struct
+import sys
+from array import array
+from typing import Iterable, List, NamedTuple
+
+from models import FundingRate
+
+# Dense exchange x symbol funding-rate matrix, built once per cycle and served as-is at /api/matrix.
+#
+# Layout (little-endian):
+#   header  <8sIIdI  magic, exchanges, symbols, snapshot timestamp, names length
+#   names   UTF-8, exchange names then symbol names, '\n'-separated, zero-padded to 4 bytes
+#   matrix  float32[exchanges][symbols], row-major, % per 8h round; NaN where a venue has no listing
+#
+# The matrix starts at a 4-byte aligned offset, so a client maps it without parsing, e.g.
+#   np.frombuffer(body, "<f4", count=ne * ns, offset=matrix_offset).reshape(ne, ns)
+MAGIC = b"DNMTX001"
+HEADER = struct.Struct("<8sIIdI")
+NAN = float("nan")
+
+
+class Matrix(NamedTuple):
+    timestamp: float
+    exchanges: List[str]
+    symbols: List[str]
+    values: array   # float32, len(exchanges) * len(symbols)
+
+    def rate(self, exchange: str, symbol: str) -> float:
+        return self.values[self.exchanges.index(exchange) * len(self.symbols) + self.symbols.index(symbol)]
+
+
+def encode(timestamp: float, rates: Iterable[FundingRate]) -> bytes:
+    rates = list(rates)
+    exchanges = sorted({r.exchange for r in rates})
+    symbols = sorted({r.symbol for r in rates})
+    ex_index = {name: i * len(symbols) for i, name in enumerate(exchanges)}
+    sym_index = {name: i for i, name in enumerate(symbols)}
+
+    values = array("f", [NAN]) * (len(exchanges) * len(symbols))
+    for r in rates:
+        values[ex_index[r.exchange] + sym_index[r.symbol]] = r.rate
+    if sys.byteorder != "little":
+        values.byteswap()
+
+    names = "\n".join(exchanges + symbols).encode()
+    names += b"\0" * (-(HEADER.size + len(names)) % 4)
+    return HEADER.pack(MAGIC, len(exchanges), len(symbols), timestamp, len(names)) + names + values.tobytes()
+
+
+def matrix_offset(payload: bytes) -> int:
+    return HEADER.size + HEADER.unpack_from(payload, 0)[4]
+
+
+def decode(payload: bytes) -> Matrix:
+    magic, n_ex, n_sym, timestamp, names_len = HEADER.unpack_from(payload, 0)
+    if magic != MAGIC:
+        raise ValueError("not a funding matrix")
+    names = payload[HEADER.size:HEADER.size + names_len].rstrip(b"\0").decode().split("\n") if n_ex else []
+    values = array("f")
+    values.frombytes(payload[HEADER.size + names_len:HEADER.size + names_len + 4 * n_ex * n_sym])
+    if sys.byteorder != "little":
+        values.byteswap()
+    return Matrix(timestamp, names[:n_ex], names[n_ex:], values)
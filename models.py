@@ -1,11 +1,35 @@
 from pydantic import BaseModel
 from typing import Optional
 
+import instruments
+
 class FundingRate(BaseModel):
     exchange: str
-    symbol: str
+    symbol: str             # Canonical instrument, see instruments.py (BTCUSDT, BTCUSD, BTCUSD_INV)
     rate: float
-    timestamp: float
+    timestamp: float        # Receive time: when the response was parsed (local clock)
+    # Perp prices from the same payload as the rate, when the venue returns them
+    mark_price: Optional[float] = None
+    index_price: Optional[float] = None
+    last_price: Optional[float] = None
+    next_funding_time: Optional[float] = None   # Unix seconds of the next settlement, when the venue says
+    venue_ts: Optional[float] = None    # Exchange-side time of the quote, when the payload carries one
+
+    @property
+    def price(self) -> Optional[float]:
+        return self.last_price if self.last_price is not None else self.mark_price
+
+    @property
+    def base(self) -> str:
+        return instruments.parse(self.symbol).base
+
+    @property
+    def quote(self) -> str:
+        return instruments.parse(self.symbol).quote
+
+    @property
+    def inverse(self) -> bool:
+        return instruments.parse(self.symbol).inverse
 
 class Opportunity(BaseModel):
     symbol: str
@@ -15,6 +39,26 @@ class Opportunity(BaseModel):
     short_rate: float
     spread: float
     annualized_spread: float
+    price: Optional[float] = None
+    premium: Optional[float] = None     # mark vs index, %
+    basis: Optional[float] = None       # perp vs spot (index), %
+    depth: Optional[float] = None       # USD bid notional near the top of the book (top-K only)
+    executable_apr: Optional[float] = None  # APR scaled by the share of the sized position the book absorbs
+    # Rolling statistics of this (exchange, symbol), see rolling.py
+    ewma: Optional[float] = None        # time-decayed mean rate, % per round
+    stddev: Optional[float] = None
+    min_24h: Optional[float] = None
+    max_24h: Optional[float] = None
+    streak: Optional[int] = None        # consecutive positive settlements
+    persistent_apr: Optional[float] = None  # APR of the part of the rate that has held up
+
+    @property
+    def base(self) -> str:
+        return instruments.parse(self.symbol).base
+
+    @property
+    def quote(self) -> str:
+        return instruments.parse(self.symbol).quote
 
     class Config:
         frozen = True  # Immutable for thread safety
@@ -1,95 +1,165 @@
 import os
+import json
+import time
+import random
 import asyncio
-import aiohttp
 import logging
-from datetime import datetime, timedelta
-from typing import List
-from models import Opportunity
+from datetime import datetime
+from typing import List, Optional
+from models import FundingRate, Opportunity
+from alert_rules import AlertEvent, RuleEngine, PERIODS_PER_YEAR
 
 # Configure Logging
 logger = logging.getLogger("Notifier")
 logger.setLevel(logging.INFO)
 
+class TokenBucket:
+    """Allows `rate` acquisitions per second with bursts up to `burst`."""
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        # Telegram said "retry_after": push the refill out so every sender waits. Several 429s
+        # arriving together name the same wait, so a pause extends the current one, never adds to it
+        now = time.monotonic()
+        tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.tokens = min(tokens, -seconds * self.rate)
+        self.updated = now
+
+
 class TelegramNotifier:
     def __init__(self):
         self.token = os.getenv("TELEGRAM_BOT_TOKEN")
+        self.api_base = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")
         
         # Chat ID parsing (handles spaces/commas)
         chat_ids_str = os.getenv("TELEGRAM_CHAT_IDS", "")
         self.chat_ids = [cid.strip() for cid in chat_ids_str.replace(" ", ",").split(",") if cid.strip()]
         
         self.last_sent = datetime.min
-        self.interval = timedelta(hours=1) # Send every 1 hour
-        self.top_count = 10
+        self.rules = RuleEngine.from_env()
+        self.max_events = 15    # Per message; the rest are summarised
+
+        # Telegram limits: ~30 msg/s per bot overall, ~1 msg/s into any single chat
+        self.global_limit = TokenBucket(float(os.getenv("TELEGRAM_GLOBAL_RATE", 30)), burst=30)
+        self.chat_rate = float(os.getenv("TELEGRAM_CHAT_RATE", 1))
+        self.chat_limits = {}
+        self.max_retries = 5
+        self.session = None     # aiohttp.ClientSession, created on first send
+
+    def _get_session(self):
+        # One pooled session for the life of the bot: keep-alive connections, one TLS handshake
+        if self.session is None or self.session.closed:
+            import aiohttp
+            # SSL=False to bypass local network restriction/certificate errors
+            connector = aiohttp.TCPConnector(ssl=False, limit=30, keepalive_timeout=60)
+            timeout = aiohttp.ClientTimeout(total=15)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self.session
+
+    def _chat_limit(self, chat_id: str) -> TokenBucket:
+        bucket = self.chat_limits.get(chat_id)
+        if bucket is None:
+            bucket = self.chat_limits[chat_id] = TokenBucket(self.chat_rate)
+        return bucket
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
 
     async def send_message(self, message: str):
         if not self.token or not self.chat_ids: 
             return
         
-        url = f"https://api.telegram.org/bot{self.token}/sendMessage"
-        
-        # SSL=False to bypass local network restriction/certificate errors
-        connector = aiohttp.TCPConnector(ssl=False)
-        
-        async with aiohttp.ClientSession(connector=connector) as session:
-            for chat_id in self.chat_ids:
-                payload = {
-                    'chat_id': chat_id,
-                    'text': message,
-                    'parse_mode': 'Markdown',
-                    'disable_web_page_preview': True
-                }
-                try:
-                    async with session.post(url, json=payload) as resp:
-                        if resp.status != 200:
-                            err_text = await resp.text()
-                            logger.error(f"Telegram Failed ({resp.status}): {err_text}")
-                except Exception as e:
-                    logger.error(f"Telegram Connection Error: {e}")
-
-    async def process(self, opportunities: List[Opportunity]):
-        if not opportunities: return
-        
-        now = datetime.now()
-        # Check if 1 hour has passed since last alert
-        if now - self.last_sent < self.interval:
+        url = f"{self.api_base}/bot{self.token}/sendMessage"
+        session = self._get_session()
+        await asyncio.gather(*(self._send_to(session, url, chat_id, message) for chat_id in self.chat_ids))
+
+    async def _send_to(self, session, url: str, chat_id: str, message: str) -> bool:
+        payload = {
+            'chat_id': chat_id,
+            'text': message,
+            'parse_mode': 'Markdown',
+            'disable_web_page_preview': True
+        }
+        chat_limit = self._chat_limit(chat_id)
+        delay = 1.0
+        for attempt in range(self.max_retries + 1):
+            await chat_limit.acquire()
+            await self.global_limit.acquire()
+            try:
+                async with session.post(url, json=payload) as resp:
+                    if resp.status == 200:
+                        return True
+                    err_text = await resp.text()
+                    if resp.status == 429:
+                        retry_after = self._retry_after(err_text, delay)
+                        logger.warning(f"Telegram rate limited chat {chat_id}; retrying in {retry_after:.0f}s")
+                        # The bot as a whole is being throttled, not just this chat
+                        chat_limit.pause(retry_after)
+                        self.global_limit.pause(retry_after)
+                        continue
+                    if resp.status < 500:
+                        logger.error(f"Telegram Failed ({resp.status}): {err_text}")
+                        return False
+                    logger.warning(f"Telegram {resp.status} for chat {chat_id} (attempt {attempt + 1})")
+            except Exception as e:
+                logger.error(f"Telegram Connection Error: {e}")
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            delay = min(delay * 2, 30.0)
+        logger.error(f"Telegram gave up on chat {chat_id} after {self.max_retries + 1} attempts")
+        return False
+
+    @staticmethod
+    def _retry_after(body: str, default: float) -> float:
+        try:
+            return float(json.loads(body)["parameters"]["retry_after"])
+        except (ValueError, KeyError, TypeError):
+            return default
+
+    async def process(self, opportunities: List[Opportunity], now: Optional[datetime] = None,
+                      rates: Optional[List[FundingRate]] = None):
+        now = now or datetime.now()
+        events = self.rules.evaluate(opportunities, rates, now.timestamp())
+        if not events:
             return
-        
-        # 1. Header with Stats
-        top_spread = opportunities[0].spread
-        msg = f"⚡ *ARB SIGNAL DETECTED* ⚡\n"
+        await self.send_message(self.format_alerts(events, now))
+        self.last_sent = now
+
+    def format_alerts(self, events: List[AlertEvent], now: datetime) -> str:
+        msg = f"⚡ *FUNDING ALERTS* ⚡\n"
         msg += f"───────────────────\n"
         msg += f"🕒 `{now.strftime('%H:%M UTC')}`\n"
-        msg += f"💎 Best Spread: `+{top_spread:.4f}%`\n"
-        msg += f"📊 Opportunities: `{len(opportunities)}`\n\n"
 
-        # 2. List Top Opportunities
-        msg += f"*🏆 TOP {self.top_count} PER ROUND (8H)*\n"
-        
-        for i, opp in enumerate(opportunities[:self.top_count], 1):
-            # Rank Emojis
-            if i == 1: rank = "🥇"
-            elif i == 2: rank = "🥈"
-            elif i == 3: rank = "🥉"
-            else: rank = f"#{i}"
-
-            # Calculate Spread
-            spread_str = f"+{opp.spread:.4f}%"
-            
-            # Format Rates
-            # Long: We want Negative (Receives). 
-            l_val = f"{opp.long_rate:+.4f}%"
-            # Short: We want Positive (Receives).
-            s_val = f"{opp.short_rate:+.4f}%"
-
-            msg += f"\n{rank} *{opp.symbol}* │ `{spread_str}`\n"
-            msg += f"       L: {opp.long_exchange} (`{l_val}`)\n"
-            msg += f"       S: {opp.short_exchange} (`{s_val}`)\n"
-
-        # 3. Footer
+        for e in events[:self.max_events]:
+            if e.kind == "rate":
+                msg += f"\n🔥 *{e.symbol}* on {e.exchange} │ `{e.value:+.4f}%` (APR `{e.value * PERIODS_PER_YEAR:.1f}%`)\n"
+            elif e.kind == "persistent_apr":
+                msg += f"\n📌 *{e.symbol}* on {e.exchange} │ persistent APR `{e.value:.1f}%` ({e.detail})\n"
+            elif e.kind == "spread":
+                msg += f"\n↔️ *{e.symbol}* {e.exchange} │ spread `+{e.value:.4f}%` ({e.detail})\n"
+            else:
+                msg += f"\n🆕 *{e.symbol}* on {e.exchange} entered top {int(e.threshold)} at {e.detail} │ `{e.value:+.4f}%`\n"
+        if len(events) > self.max_events:
+            msg += f"\n…and {len(events) - self.max_events} more\n"
+
+        # Footer
         msg += f"\n───────────────────\n"
         msg += f"🖥️ [Live Command Center](http://51.20.6.77/bot/)"
-        
-        # Send and update timer
-        await self.send_message(msg)
-        self.last_sent = now
+        return msg
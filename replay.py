@@ -0,0 +1,172 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Tuple
+
+from models import FundingRate
+from notifier import TelegramNotifier
+from archive import ArchiveReader, Row, parse_date
+from main import ArbitrageBot
+
+
+class RecordedFetcher:
+    """
+    Drop-in for AsyncFetcher that serves archived snapshots in order instead of calling venues.
+    `current_ts` is the recorded time of the snapshot last returned. A scheduled poll archives only
+    the venues it polled, so, as in the live loop, the others contribute their last rows.
+    """
+    def __init__(self, snapshots: Iterator[Tuple[float, List[Row]]]):
+        self._it = iter(snapshots)
+        self._next = next(self._it, None)
+        self.current_ts = 0.0
+        self.rows = 0
+        self.venue_rows: Dict[str, List[FundingRate]] = {}
+
+    @property
+    def exhausted(self) -> bool:
+        return self._next is None
+
+    async def start_session(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def next_venues(self) -> List[str]:
+        """Venues polled in the snapshot the next `fetch_all` returns."""
+        return [] if self._next is None else sorted({row[1] for row in self._next[1]})
+
+    async def fetch_all(self, only=None) -> List[FundingRate]:
+        if self._next is None:
+            return []
+        ts, rows = self._next
+        self._next = next(self._it, None)
+        self.current_ts = ts
+        self.rows += len(rows)
+        polled: Dict[str, List[FundingRate]] = {}
+        # The archive keeps one price per row (last trade, else mark); it comes back as last_price
+        for _, ex, sym, rts, rate, price in rows:
+            polled.setdefault(ex, []).append(FundingRate(exchange=ex, symbol=sym, rate=rate, timestamp=rts,
+                                                         last_price=None if price != price else price))
+        self.venue_rows.update(polled)
+        return [r for venue_rows in self.venue_rows.values() for r in venue_rows]
+
+
+class ReplayNotifier(TelegramNotifier):
+    """Runs the real alert decision logic but records messages instead of sending them."""
+    def __init__(self):
+        super().__init__()
+        self.sent: List[str] = []
+
+    async def send_message(self, message: str):
+        self.sent.append(message)
+
+
+def _cycle_digest(opportunities, messages: List[str]) -> str:
+    h = hashlib.sha256()
+    for o in opportunities:
+        h.update(f"{o.symbol}|{o.long_exchange}|{o.long_rate!r}|{o.annualized_spread!r}\n".encode())
+    for m in messages:
+        h.update(m.encode())
+    return h.hexdigest()[:16]
+
+
+async def replay(reader: ArchiveReader, start: float, end: float, min_spread: float = 0.0,
+                 exchanges: List[str] = None) -> Dict:
+    fetcher = RecordedFetcher(reader.snapshots(start, end, exchanges))
+    notifier = ReplayNotifier()
+    bot = ArbitrageBot(fetcher=fetcher, notifier=notifier, persist=False, background_alerts=False)
+    bot.clock = lambda: fetcher.current_ts
+    bot.min_spread = min_spread
+
+    digests, timestamps = [], []
+    stage_totals: Dict[str, float] = {}
+    opp_total = 0
+    t0 = time.perf_counter()
+    while not fetcher.exhausted:
+        sent_before = len(notifier.sent)
+        await bot.run_cycle(only=fetcher.next_venues())
+        for stage, seconds in bot.stage_times.items():
+            stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+        opp_total += len(bot.latest_opportunities)
+        digests.append(_cycle_digest(bot.latest_opportunities, notifier.sent[sent_before:]))
+        timestamps.append(fetcher.current_ts)
+    wall = time.perf_counter() - t0
+
+    cycles = len(digests)
+    return {
+        "min_spread": min_spread,
+        "cycles": cycles,
+        "rows": fetcher.rows,
+        "wall": wall,
+        "cycles_per_sec": cycles / wall if wall else 0.0,
+        "avg_opportunities": opp_total / cycles if cycles else 0.0,
+        "alerts": len(notifier.sent),
+        "stage_totals": stage_totals,
+        "digest": hashlib.sha256("".join(digests).encode()).hexdigest()[:16],
+        "digests": digests,
+        "timestamps": timestamps,
+    }
+
+
+def _compare(result: Dict, reference: Dict) -> str:
+    if result["digest"] == reference["digest"]:
+        return "IDENTICAL"
+    for i, (a, b) in enumerate(zip(result["digests"], reference["digests"])):
+        if a != b:
+            return f"DIVERGES at cycle {i} (snapshot_ts={result['timestamps'][i]})"
+    return f"DIVERGES in length ({result['cycles']} vs {reference['cycles']} cycles)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay archived snapshots through ArbitrageBot at full speed")
+    parser.add_argument("--archive", default=os.getenv("ARCHIVE_DIR", "data/archive"))
+    parser.add_argument("--start", required=True, help="YYYY-MM-DD (UTC)")
+    parser.add_argument("--end", required=True, help="YYYY-MM-DD (UTC, inclusive)")
+    parser.add_argument("--exchange", action="append", help="limit to these venues (repeatable)")
+    parser.add_argument("--min-spread", default="0", help="comma-separated thresholds to backtest, e.g. 0,0.01,0.025")
+    parser.add_argument("--save", help="write per-cycle output digests to this file")
+    parser.add_argument("--compare", help="compare output against digests saved by --save")
+    args = parser.parse_args()
+
+    if sys.platform != 'win32':
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
+
+    reader = ArchiveReader(args.archive)
+    start, end = parse_date(args.start), parse_date(args.end) + 86400 - 1e-6
+    thresholds = [float(x) for x in args.min_spread.split(",")]
+    reference = {}
+    if args.compare:
+        with open(args.compare) as f:
+            reference = json.load(f)["runs"]
+
+    runs = {}
+    print(f"{'MIN_SPREAD':>10s} {'cycles':>8s} {'rows':>10s} {'cyc/s':>9s} {'avg opps':>9s} {'alerts':>7s}  digest")
+    for threshold in thresholds:
+        res = asyncio.run(replay(reader, start, end, threshold, args.exchange))
+        runs[repr(threshold)] = res
+        line = (f"{threshold:>10.4f} {res['cycles']:>8d} {res['rows']:>10d} {res['cycles_per_sec']:>9.1f} "
+                f"{res['avg_opportunities']:>9.1f} {res['alerts']:>7d}  {res['digest']}")
+        if repr(threshold) in reference:
+            line += "  " + _compare(res, reference[repr(threshold)])
+        print(line)
+
+    for threshold, res in runs.items():
+        stages = "  ".join(f"{k}={v * 1000 / max(res['cycles'], 1):.3f}ms" for k, v in res["stage_totals"].items())
+        print(f"   stages/cycle @ {threshold}: {stages}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"start": args.start, "end": args.end, "runs": runs}, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import math
+from typing import Dict, Iterable, List, Optional
+
+import metrics
+from models import FundingRate
+
+# Settlement-aware polling: a venue is polled every `near` seconds from `window` seconds (at most
+# an eighth of its funding period, so hourly venues are not dense a quarter of the time) before
+# its next funding settlement until `after` seconds past it (when the next round's predicted rate
+# appears), and every `far` seconds otherwise, never sleeping past the start of the next window.
+#
+# The next settlement comes from the rows' next_funding_time where the venue reports it (the
+# earliest upcoming one across its symbols), else from the venue's funding interval on the UTC
+# grid (00:00 / 08:00 / 16:00 for 8h venues, every hour for hourly ones). A venue whose poll
+# failed or returned no rows is retried after `near` seconds, doubling with each consecutive
+# failure up to `far`, so a venue that is down or empty does not cost a request every `near`.
+
+FUNDING_HOURS = {"Hyperliquid": 1, "dYdX": 1, "Coinbase": 1, "Kraken": 1, "CryptoCom": 1}
+DEFAULT_FUNDING_HOURS = 8
+
+POLLS = metrics.counter("poll_requests_total", "Scheduled venue polls", ["exchange"])
+NEXT_SETTLEMENT = metrics.gauge("poll_next_settlement_seconds", "Seconds to the venue's next funding settlement", ["exchange"])
+POLL_INTERVAL = metrics.gauge("poll_interval_seconds", "Current polling interval for the venue", ["exchange"])
+
+
+def per_round(exchange: str) -> float:
+    """Factor taking `exchange`'s rate (percent per its own funding interval) to percent per 8h round."""
+    return DEFAULT_FUNDING_HOURS / FUNDING_HOURS.get(exchange, DEFAULT_FUNDING_HOURS)
+
+
+def to_8h_basis(rates: List[FundingRate]) -> List[FundingRate]:
+    """`rates` with the rows of venues on other funding intervals rescaled to percent per 8h round."""
+    return [r.model_copy(update={"rate": r.rate * per_round(r.exchange)}) if r.exchange in FUNDING_HOURS else r
+            for r in rates]
+
+
+class PollScheduler:
+    def __init__(self, venues: Iterable[str], window: float = 900.0, near: float = 5.0, far: float = 300.0,
+                 after: float = 60.0):
+        self.window = window
+        self.near = near
+        self.far = max(far, near)
+        self.after = after
+        self.next_poll: Dict[str, float] = {name: 0.0 for name in venues}    # All due at start
+        self.settlement: Dict[str, float] = {}
+        self.last_settlement: Dict[str, float] = {}
+        self.failures: Dict[str, int] = {}      # Consecutive failed / empty polls
+
+    def due(self, now: float) -> List[str]:
+        return [name for name, at in self.next_poll.items() if at <= now]
+
+    def next_wake(self, now: float) -> float:
+        """Seconds until the next venue is due (0 if one already is)."""
+        return max(0.0, min(self.next_poll.values(), default=now + self.far) - now)
+
+    @staticmethod
+    def _period(name: str) -> float:
+        return FUNDING_HOURS.get(name, DEFAULT_FUNDING_HOURS) * 3600
+
+    def _calendar(self, name: str, now: float) -> float:
+        period = self._period(name)
+        return (math.floor(now / period) + 1) * period
+
+    def observe(self, name: str, rows: Optional[List[FundingRate]], now: float):
+        """Records a poll of `name` (rows, or None / [] if it failed) and schedules the next one."""
+        POLLS.inc(exchange=name)
+        if not rows:
+            failures = self.failures[name] = self.failures.get(name, 0) + 1
+            interval = min(self.near * 2 ** min(failures - 1, 32), self.far)
+            self.next_poll[name] = now + interval
+            POLL_INTERVAL.set(interval, exchange=name)
+            return
+        self.failures.pop(name, None)
+
+        upcoming = [r.next_funding_time for r in rows if r.next_funding_time and r.next_funding_time > now]
+        settlement = min(upcoming) if upcoming else self._calendar(name, now)
+        previous = self.settlement.get(name)
+        if previous is not None and previous <= now:
+            self.last_settlement[name] = previous
+        self.settlement[name] = settlement
+
+        since = now - self.last_settlement.get(name, -math.inf)
+        until = settlement - now
+        window = min(self.window, self._period(name) / 8)
+        if until <= window or since < self.after:
+            interval = self.near
+        else:
+            interval = min(self.far, max(self.near, until - window))
+        self.next_poll[name] = now + interval
+        NEXT_SETTLEMENT.set(until, exchange=name)
+        POLL_INTERVAL.set(interval, exchange=name)
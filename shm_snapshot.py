@@ -0,0 +1,142 @@
+import mmap
+import os
+import struct
+import time
+from typing import Optional, Tuple
+
+# Latest pre-serialized snapshot in shared memory, for dashboard workers in other processes.
+#
+# Layout (one file, normally under /dev/shm, memory-mapped by the writer and every reader):
+#   [file header][slot 0][slot 1]...
+#   slot = [slot header][slot_size bytes]
+# The writer is the only process that modifies the file. Publication k goes to slot k % slots:
+# the slot's generation is zeroed, the payload and length written, the generation set to k,
+# and finally the header sequence set to k. Readers never lock: they pick the slot named by
+# the sequence, read it, and accept the bytes only if the slot generation was k both before
+# and after (a per-slot seqlock). With two or more slots the writer is always filling a slot
+# readers are not being pointed at, so a retry only happens if a reader stalls for a full cycle.
+MAGIC = b"DNSHM001"
+FILE_HEADER = struct.Struct("<8sQII40x")   # magic, sequence, slots, slot size
+SLOT_HEADER = struct.Struct("<QI4x")       # generation, payload length
+DEFAULT_SLOT_SIZE = 16 * 1024 * 1024
+
+
+class SharedSnapshot:
+    def __init__(self, path: str, writer: bool = False, slots: int = 2, slot_size: int = DEFAULT_SLOT_SIZE):
+        self.path = path
+        self.writer = writer
+        if writer:
+            # Build a fresh file and rename it into place: readers still mapping a previous
+            # writer's file are never truncated under them, and reattach on the inode change
+            self.slots, self.slot_size = slots, slot_size
+            tmp = f"{path}.{os.getpid()}.tmp"
+            fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.ftruncate(fd, FILE_HEADER.size + slots * (SLOT_HEADER.size + slot_size))
+                self._mm = mmap.mmap(fd, 0)
+            finally:
+                os.close(fd)
+            FILE_HEADER.pack_into(self._mm, 0, MAGIC, 0, slots, slot_size)
+            os.replace(tmp, path)
+            self.seq = 0
+        else:
+            self._attach()
+        self._view = memoryview(self._mm)
+
+    def _attach(self):
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            self._ino = os.fstat(fd).st_ino
+            self._mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        self._checked = time.monotonic()
+        magic, _, self.slots, self.slot_size = FILE_HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a shared snapshot")
+
+    def _maybe_reattach(self):
+        # At most once a second: has a restarted writer replaced the file?
+        now = time.monotonic()
+        if now - self._checked < 1.0:
+            return
+        self._checked = now
+        try:
+            if os.stat(self.path).st_ino == self._ino:
+                return
+        except FileNotFoundError:
+            return
+        self._attach()
+        self._view = memoryview(self._mm)   # Old mapping is left to views still in use
+
+    @classmethod
+    def open_reader(cls, path: str, wait: float = 0.0) -> "SharedSnapshot":
+        """Attaches to a writer's file, waiting up to `wait` seconds for it to appear."""
+        deadline = time.monotonic() + wait
+        while True:
+            try:
+                return cls(path)
+            except (FileNotFoundError, ValueError):
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.1)
+
+    def _slot_offset(self, slot: int) -> int:
+        return FILE_HEADER.size + slot * (SLOT_HEADER.size + self.slot_size)
+
+    # WRITER
+
+    def publish(self, payload: bytes) -> bool:
+        if len(payload) > self.slot_size:
+            return False
+        k = self.seq + 1
+        off = self._slot_offset(k % self.slots)
+        SLOT_HEADER.pack_into(self._mm, off, 0, 0)
+        data = off + SLOT_HEADER.size
+        self._mm[data:data + len(payload)] = payload
+        SLOT_HEADER.pack_into(self._mm, off, k, len(payload))
+        struct.pack_into("<Q", self._mm, 8, k)
+        self.seq = k
+        return True
+
+    # READERS
+
+    def sequence(self) -> int:
+        return struct.unpack_from("<Q", self._mm, 8)[0]
+
+    def read_view(self) -> Optional[Tuple[int, memoryview]]:
+        """
+        (sequence, zero-copy view of the payload), or None before the first publish. The view is
+        only guaranteed intact while `valid(sequence)` holds; copy it if it must outlive that.
+        """
+        self._maybe_reattach()
+        while True:
+            k = self.sequence()
+            if k == 0:
+                return None
+            off = self._slot_offset(k % self.slots)
+            gen, length = SLOT_HEADER.unpack_from(self._mm, off)
+            if gen == k:
+                data = off + SLOT_HEADER.size
+                return k, self._view[data:data + length]
+
+    def valid(self, k: int) -> bool:
+        return SLOT_HEADER.unpack_from(self._mm, self._slot_offset(k % self.slots))[0] == k
+
+    def read(self) -> Optional[bytes]:
+        """A consistent copy of the latest payload (the only copy made on the read path)."""
+        while True:
+            got = self.read_view()
+            if got is None:
+                return None
+            k, view = got
+            data = bytes(view)
+            if self.valid(k):
+                return data
+
+    def close(self):
+        self._view.release()
+        try:
+            self._mm.close()
+        except BufferError:
+            pass    # A caller still holds a read_view(); the mapping goes when it does
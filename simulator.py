@@ -0,0 +1,473 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import random
+import time
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from aiohttp import web
+
+from circuit import PROBE_URLS
+
+logger = logging.getLogger("Simulator")
+logger.setLevel(logging.INFO)
+
+# Local stand-in for every venue endpoint used by fetcher.AsyncFetcher.
+# Point the fetcher at it with AsyncFetcher(..., base_url="http://127.0.0.1:<port>"): requests arrive
+# as /<original host>/<original path> and are answered from pre-serialized payloads.
+
+BASES = ["BTC", "ETH", "SOL", "XRP", "DOGE", "ADA", "AVAX", "LINK", "DOT", "LTC",
+         "BCH", "NEAR", "APT", "ARB", "OP", "SUI", "SEI", "TIA", "INJ", "WIF"]
+
+
+def synthetic_bases(n: int) -> List[str]:
+    # Real majors first so cross-venue matches look realistic, then synthetic listings
+    return (BASES + [f"X{i:04d}" for i in range(n)])[:n]
+
+
+class Market:
+    """Deterministic synthetic quotes for one venue."""
+    def __init__(self, bases: List[str], rng: random.Random):
+        self.bases = bases
+        self.now_ms = int(time.time() * 1000)
+        self.next_funding_ms = (self.now_ms // 28_800_000 + 1) * 28_800_000
+        self.rows = []
+        for b in bases:
+            # One spot price per base across venues (seeded by name); each venue's index composite is near it
+            index = round(random.Random(b).uniform(0.01, 60000) * (1 + rng.uniform(-0.0005, 0.0005)), 4)
+            mark = round(index * (1 + rng.uniform(-0.002, 0.002)), 4)
+            last = round(mark * (1 + rng.uniform(-0.0005, 0.0005)), 4)
+            rate = round(rng.gauss(0.0001, 0.0003), 8)
+            self.rows.append((b, rate, mark, index, last))
+        # Every fourth base is also listed in the venue's other quotes (USDC, USD, inverse) where it has them
+        self.extra = self.rows[::4]
+
+
+# PAYLOAD BUILDERS: (host, path) -> builder(market) returning the decoded JSON body
+
+def _binance(m: Market):
+    rows = [(f"{r[0]}USDT",) + r[1:] for r in m.rows] + [(f"{r[0]}USDC",) + r[1:] for r in m.extra]
+    return [{"symbol": sym, "markPrice": str(mark), "indexPrice": str(idx), "estimatedSettlePrice": str(idx),
+             "lastFundingRate": str(rate), "interestRate": "0.00010000", "nextFundingTime": m.next_funding_ms,
+             "time": m.now_ms} for sym, rate, mark, idx, last in rows]
+
+
+def _bybit(m: Market):
+    rows = [(f"{r[0]}USDT",) + r[1:] for r in m.rows] + [(f"{r[0]}PERP",) + r[1:] for r in m.extra]
+    return {"retCode": 0, "retMsg": "OK", "result": {"category": "linear", "list": [
+        {"symbol": sym, "lastPrice": str(last), "markPrice": str(mark), "indexPrice": str(idx),
+         "fundingRate": str(rate), "nextFundingTime": str(m.next_funding_ms), "volume24h": "1000",
+         "turnover24h": "1000000", "openInterest": "5000"} for sym, rate, mark, idx, last in rows]},
+        "retExtInfo": {}, "time": m.now_ms}
+
+
+def _gateio(m: Market):
+    return [{"contract": f"{b}_USDT", "last": str(last), "mark_price": str(mark), "index_price": str(idx),
+             "funding_rate": str(rate), "funding_rate_indicative": str(rate), "volume_24h": "1000"}
+            for b, rate, mark, idx, last in m.rows]
+
+
+def _okx(m: Market):
+    rows = ([(f"{r[0]}-USDT-SWAP",) + r[1:] for r in m.rows] + [(f"{r[0]}-USDC-SWAP",) + r[1:] for r in m.extra]
+            + [(f"{r[0]}-USD-SWAP",) + r[1:] for r in m.extra])
+    return {"code": "0", "msg": "", "data": [
+        {"instType": "SWAP", "instId": inst, "last": str(last), "markPx": str(mark), "idxPx": str(idx),
+         "fundingRate": str(rate), "nextFundingTime": str(m.next_funding_ms), "ts": str(m.now_ms)}
+        for inst, rate, mark, idx, last in rows]}
+
+
+def _kucoin(m: Market):
+    rows = [r + ("USDT",) for r in m.rows] + [r + ("USD",) for r in m.extra]
+    return {"code": "200000", "data": [
+        {"symbol": f"{'XBT' if b == 'BTC' else b}{quote}M", "baseCurrency": "XBT" if b == "BTC" else b,
+         "quoteCurrency": quote, "isInverse": quote == "USD",
+         "fundingFeeRate": rate, "markPrice": mark, "indexPrice": idx, "lastTradePrice": last,
+         "nextFundingRateTime": m.next_funding_ms - m.now_ms} for b, rate, mark, idx, last, quote in rows]}
+
+
+def _bitget(m: Market):
+    return {"code": "00000", "msg": "success", "requestTime": m.now_ms, "data": [
+        {"symbol": f"{b}USDT", "lastPr": str(last), "markPrice": str(mark), "indexPrice": str(idx),
+         "fundingRate": str(rate), "ts": str(m.now_ms)} for b, rate, mark, idx, last in m.rows]}
+
+
+def _mexc(m: Market):
+    rows = [(f"{r[0]}_USDT",) + r[1:] for r in m.rows] + [(f"{r[0]}_USD",) + r[1:] for r in m.extra]
+    return {"success": True, "code": 0, "data": [
+        {"symbol": sym, "lastPrice": last, "fairPrice": mark, "indexPrice": idx,
+         "fundingRate": rate, "timestamp": m.now_ms} for sym, rate, mark, idx, last in rows]}
+
+
+def _huobi(m: Market):
+    return {"status": "ok", "ts": m.now_ms, "data": [
+        {"contract_code": f"{b}-USDT", "symbol": b, "funding_rate": str(rate), "estimated_rate": str(rate),
+         "funding_time": str(m.next_funding_ms), "next_funding_time": None} for b, rate, mark, idx, last in m.rows]}
+
+
+def _bingx(m: Market):
+    return {"code": 0, "msg": "", "data": [
+        {"symbol": f"{b}-USDT", "markPrice": str(mark), "indexPrice": str(idx), "lastFundingRate": str(rate),
+         "nextFundingTime": m.next_funding_ms} for b, rate, mark, idx, last in m.rows]}
+
+
+def _kraken(m: Market):
+    iso = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(m.now_ms / 1000))
+    rows = [("PF_",) + r for r in m.rows] + [("PI_",) + r for r in m.extra]
+    return {"result": "success", "serverTime": iso, "tickers": [
+        {"symbol": f"{kind}{'XBT' if b == 'BTC' else b}USD", "last": last, "markPrice": mark, "indexPrice": idx,
+         "fundingRate": rate / 8 * mark, "fundingRatePrediction": rate / 8 * mark, "relativeFundingRate": rate / 8,
+         "relativeFundingRatePrediction": rate / 8, "lastTime": iso, "tag": "perpetual"}
+        for kind, b, rate, mark, idx, last in rows]}
+
+
+def _dydx(m: Market):
+    return {"markets": {f"{b}-USD": {"ticker": f"{b}-USD", "status": "ACTIVE", "oraclePrice": str(idx),
+                                     "nextFundingRate": str(rate / 8)} for b, rate, mark, idx, last in m.rows}}
+
+
+def _bitmex(m: Market):
+    iso = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(m.now_ms / 1000))
+    nxt = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(m.next_funding_ms / 1000))
+    out = []
+    for b, rate, mark, idx, last in m.rows:
+        sym = "XBTUSD" if b == "BTC" else ("ETHUSD" if b == "ETH" else f"{b}USDT")
+        out.append({"symbol": sym, "typ": "FFWCSX", "fundingRate": rate, "markPrice": mark, "indicativeSettlePrice": idx,
+                    "lastPrice": last, "fundingTimestamp": nxt, "timestamp": iso})
+    return out
+
+
+def _phemex(m: Market):
+    return {"error": None, "id": 0, "result": [
+        {"symbol": f"{b}USDT", "fundingRate": int(rate * 1e8), "markPrice": int(mark * 1e4),
+         "indexPrice": int(idx * 1e4), "close": int(last * 1e4), "timestamp": m.now_ms * 1_000_000}
+        for b, rate, mark, idx, last in m.rows]}
+
+
+def _crypto_com(m: Market):
+    return {"id": -1, "code": 0, "result": {"data": [
+        {"i": f"{b}USD-PERP", "v": str(rate / 8), "t": m.now_ms} for b, rate, mark, idx, last in m.rows]}}
+
+
+def _coinbase(m: Market):
+    return {"results": [
+        {"symbol": f"{b}-PERP", "type": "PERPETUAL", "funding_rate": str(rate / 8), "mark_price": str(mark),
+         "index_price": str(idx)} for b, rate, mark, idx, last in m.rows]}
+
+
+def _coinbase_adv(m: Market):
+    return {"products": []}
+
+
+def _hyperliquid(m: Market):
+    universe = {"universe": [{"name": b, "szDecimals": 2, "maxLeverage": 50} for b, *_ in m.rows]}
+    ctxs = [{"funding": str(rate / 8), "markPx": str(mark), "oraclePx": str(idx), "midPx": str(last),
+             "openInterest": "1000"} for b, rate, mark, idx, last in m.rows]
+    return [universe, ctxs]
+
+
+def _coinex(m: Market):
+    return {"code": 0, "message": "OK", "data": {"date": m.now_ms, "ticker": {
+        f"{b}USDT": {"last": str(last), "sign_price": str(mark), "index_price": str(idx),
+                     "funding_rate_next": str(rate), "funding_rate_last": str(rate),
+                     "funding_time": 480} for b, rate, mark, idx, last in m.rows}}}
+
+
+def _bitunix(m: Market):
+    return {"code": 0, "msg": "Success", "data": [
+        {"symbol": f"{b}USDT", "fundingRate": str(rate * 100), "markPrice": str(mark), "lastPrice": str(last)}
+        for b, rate, mark, idx, last in m.rows]}
+
+
+def _bitstamp_pairs(m: Market):
+    return [{"name": f"{b}/USD-PERP", "url_symbol": f"{b.lower()}usd-perp", "description": f"{b} / USD Perpetual"}
+            for b, *_ in m.rows[:25]]
+
+
+def _bitstamp_funding(m: Market, sym: str):
+    base = sym.split("usd")[0].upper()
+    for b, rate, mark, idx, last in m.rows:
+        if b == base:
+            return {"market": sym, "funding_rate": str(rate), "timestamp": str(m.now_ms // 1000)}
+    return None
+
+
+# venue -> [(host, path, builder)]
+ENDPOINTS: Dict[str, List[Tuple[str, str, Callable]]] = {
+    "Binance": [("fapi.binance.com", "/fapi/v1/premiumIndex", _binance)],
+    "Bybit": [("api.bybit.com", "/v5/market/tickers", _bybit)],
+    "OKX": [("www.okx.com", "/priapi/v5/public/tickers", _okx)],
+    "GateIO": [("api.gateio.ws", "/api/v4/futures/usdt/tickers", _gateio)],
+    "KuCoin": [("api-futures.kucoin.com", "/api/v1/contracts/active", _kucoin)],
+    "Bitget": [("api.bitget.com", "/api/v2/mix/market/tickers", _bitget)],
+    "MEXC": [("contract.mexc.com", "/api/v1/contract/ticker", _mexc)],
+    "Huobi": [("api.hbdm.vn", "/linear-swap-api/v1/swap_batch_funding_rate", _huobi)],
+    "BingX": [("open-api.bingx.com", "/openApi/swap/v2/quote/premiumIndex", _bingx)],
+    "Kraken": [("futures.kraken.com", "/derivatives/api/v3/tickers", _kraken)],
+    "dYdX": [("indexer.dydx.trade", "/v4/perpetualMarkets", _dydx)],
+    "BitMEX": [("www.bitmex.com", "/api/v1/instrument/active", _bitmex)],
+    "Phemex": [("api.phemex.com", "/md/v2/ticker/24hr", _phemex)],
+    "HTX": [("api.hbdm.com", "/linear-swap-api/v1/swap_batch_funding_rate", _huobi)],
+    "CryptoCom": [("deriv-api.crypto.com", "/v1/public/get-valuations", _crypto_com)],
+    "Coinbase": [("api.international.coinbase.com", "/api/v1/instruments", _coinbase),
+                 ("api.coinbase.com", "/api/v3/brokerage/products", _coinbase_adv)],
+    "Hyperliquid": [("api.hyperliquid.xyz", "/info", _hyperliquid)],
+    "CoinEx": [("api.coinex.com", "/perpetual/v1/market/ticker/all", _coinex)],
+    "BitUnix": [("fapi.bitunix.com", "/api/v1/futures/market/funding_rate/batch", _bitunix),
+                ("fapi.bitunix.com", "/api/v1/futures/market/tickers", _bitunix)],
+    "Bitstamp": [("www.bitstamp.net", "/api/v2/trading-pairs-info/", _bitstamp_pairs)],
+}
+BITSTAMP_FUNDING_PREFIX = ("www.bitstamp.net", "/api/v2/funding_rate/")
+
+
+# ORDER BOOKS (depth.py): bids only, seeded per (venue, base) so liquidity differs across listings
+
+def book_levels(venue: str, base: str, levels: int = 20) -> List[Tuple[float, float]]:
+    rng = random.Random(f"book-{venue}-{base}")
+    price = random.Random(base).uniform(0.01, 60000)
+    liquidity = 10 ** rng.uniform(3, 7)     # USD over the first `levels` levels
+    return [(round(price * (1 - 0.0005 * i), 6), round(liquidity / levels / price * rng.uniform(0.5, 1.5), 6))
+            for i in range(levels)]
+
+
+def _str_levels(levels):
+    return [[str(p), str(q)] for p, q in levels]
+
+
+# (host, path) -> (venue, base from the query, body builder from the levels)
+BOOK_ENDPOINTS: Dict[Tuple[str, str], Tuple[str, Callable, Callable]] = {
+    ("fapi.binance.com", "/fapi/v1/depth"): ("Binance", lambda q: q.get("symbol", "")[:-4],
+                                             lambda lv: {"lastUpdateId": 1, "bids": _str_levels(lv), "asks": []}),
+    ("api.bybit.com", "/v5/market/orderbook"): ("Bybit", lambda q: q.get("symbol", "")[:-4],
+                                                lambda lv: {"retCode": 0, "result": {"b": _str_levels(lv), "a": []}}),
+    ("api.bitget.com", "/api/v2/mix/market/merge-depth"): ("Bitget", lambda q: q.get("symbol", "")[:-4],
+                                                           lambda lv: {"code": "00000", "data": {"bids": _str_levels(lv), "asks": []}}),
+    ("open-api.bingx.com", "/openApi/swap/v2/quote/depth"): ("BingX", lambda q: q.get("symbol", "").split("-")[0],
+                                                             lambda lv: {"code": 0, "data": {"bids": _str_levels(lv), "asks": []}}),
+}
+DYDX_BOOK_PREFIX = ("indexer.dydx.trade", "/v4/orderbooks/perpetualMarket/")
+TELEGRAM_HOST = "api.telegram.org"
+
+
+def build_payloads(symbols: int = 500, seed: int = 7) -> Dict[str, object]:
+    """Decoded synthetic payloads keyed by venue name (first endpoint of each venue)."""
+    rng = random.Random(seed)
+    bases = synthetic_bases(symbols)
+    return {venue: eps[0][2](Market(bases, rng)) for venue, eps in ENDPOINTS.items()}
+
+
+class VenueProfile:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 500, symbols: int = 500):
+        self.latency = latency          # seconds
+        self.jitter = jitter            # seconds, uniform +/-
+        self.error_rate = error_rate    # 0..1 probability of answering with error_status
+        self.error_status = error_status
+        self.symbols = symbols
+
+
+class ExchangeSimulator:
+    def __init__(self, default: VenueProfile = None, overrides: Dict[str, VenueProfile] = None,
+                 recorded_dir: Optional[str] = None, seed: int = 7):
+        self.default = default or VenueProfile()
+        self.overrides = overrides or {}
+        self.rng = random.Random(seed)
+        self.requests: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+        # (host, path) -> (venue, body bytes)
+        self.routes: Dict[Tuple[str, str], Tuple[str, bytes]] = {}
+        self.markets: Dict[str, Market] = {}
+        for venue, eps in ENDPOINTS.items():
+            profile = self.profile(venue)
+            market = Market(synthetic_bases(profile.symbols), random.Random(f"{seed}-{venue}"))
+            self.markets[venue] = market
+            for host, path, builder in eps:
+                body = self._recorded(recorded_dir, host, path) or json.dumps(builder(market)).encode()
+                self.routes[(host, path)] = (venue, body)
+        # Circuit-breaker health probes; they share the venue's latency / error profile
+        for venue, url in PROBE_URLS.items():
+            host, _, path = url.split("://", 1)[1].partition("/")
+            self.routes[(host, "/" + path)] = (venue, b"{}")
+
+    def profile(self, venue: str) -> VenueProfile:
+        return self.overrides.get(venue, self.default)
+
+    @staticmethod
+    def recorded_name(host: str, path: str) -> str:
+        return quote(f"{host}{path}", safe="") + ".json"
+
+    def _recorded(self, directory: Optional[str], host: str, path: str) -> Optional[bytes]:
+        if not directory:
+            return None
+        p = os.path.join(directory, self.recorded_name(host, path))
+        if os.path.exists(p):
+            with open(p, "rb") as f:
+                return f.read()
+        return None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        host = request.match_info["host"]
+        path = "/" + request.match_info["path"]
+        route = self.routes.get((host, path))
+        if route is None and (host, path.rstrip("/") + "/") in self.routes:
+            route = self.routes[(host, path.rstrip("/") + "/")]
+
+        if route is None and (host, path[:len(BITSTAMP_FUNDING_PREFIX[1])]) == BITSTAMP_FUNDING_PREFIX:
+            sym = path[len(BITSTAMP_FUNDING_PREFIX[1]):].strip("/")
+            payload = _bitstamp_funding(self.markets["Bitstamp"], sym)
+            route = ("Bitstamp", json.dumps(payload).encode()) if payload else None
+        book = BOOK_ENDPOINTS.get((host, path))
+        if book is not None:
+            venue, base, build = book
+            route = (venue, json.dumps(build(book_levels(venue, base(request.query)))).encode())
+        if route is None and (host, path[:len(DYDX_BOOK_PREFIX[1])]) == DYDX_BOOK_PREFIX:
+            base = path[len(DYDX_BOOK_PREFIX[1]):].split("-")[0]
+            bids = [{"price": str(p), "size": str(q)} for p, q in book_levels("dYdX", base)]
+            route = ("dYdX", json.dumps({"bids": bids, "asks": []}).encode())
+        if host == "api.hyperliquid.xyz" and request.method == "POST" and request.can_read_body:
+            query = await request.json()
+            if query.get("type") == "l2Book":
+                bids = [{"px": str(p), "sz": str(q), "n": 1} for p, q in book_levels("Hyperliquid", query.get("coin", ""))]
+                route = ("Hyperliquid", json.dumps({"coin": query.get("coin"), "levels": [bids, []]}).encode())
+        if route is None and host == TELEGRAM_HOST and path.endswith("/sendMessage"):
+            route = ("Telegram", b'{"ok": true, "result": {}}')
+        if route is None:
+            return web.Response(status=404)
+
+        venue, body = route
+        self.requests[venue] = self.requests.get(venue, 0) + 1
+        profile = self.profile(venue)
+        delay = profile.latency + (self.rng.uniform(-profile.jitter, profile.jitter) if profile.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if profile.error_rate and self.rng.random() < profile.error_rate:
+            self.errors[venue] = self.errors.get(venue, 0) + 1
+            return web.Response(status=profile.error_status, text='{"error": "simulated"}', content_type="application/json")
+        return web.Response(body=body, content_type="application/json")
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/{host}/{path:.*}", self.handle)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> Tuple[web.AppRunner, str]:
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        bound = site._server.sockets[0].getsockname()[1]
+        return runner, f"http://{host}:{bound}"
+
+
+def parse_overrides(values: List[str], default: VenueProfile) -> Dict[str, VenueProfile]:
+    """--venue Binance:latency=0.2,jitter=0.05,error_rate=0.1,symbols=2000"""
+    out = {}
+    for spec in values or []:
+        venue, _, opts = spec.partition(":")
+        profile = VenueProfile(default.latency, default.jitter, default.error_rate, default.error_status, default.symbols)
+        for kv in filter(None, opts.split(",")):
+            k, v = kv.split("=")
+            setattr(profile, k, int(v) if k in ("symbols", "error_status") else float(v))
+        out[venue] = profile
+    return out
+
+
+def add_profile_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--symbols", type=int, default=500, help="listings per venue")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="uniform +/- seconds on top of latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of an error response")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--venue", action="append", help="per-venue override, e.g. Binance:latency=0.2,symbols=2000")
+    parser.add_argument("--recorded", help="directory of recorded payloads (see `capture`)")
+    parser.add_argument("--seed", type=int, default=7)
+
+
+def simulator_from_args(args) -> ExchangeSimulator:
+    default = VenueProfile(args.latency, args.jitter, args.error_rate, args.error_status, args.symbols)
+    return ExchangeSimulator(default, parse_overrides(args.venue, default), args.recorded, args.seed)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _serve_forever(args, port: int):
+    async def run():
+        await simulator_from_args(args).start("127.0.0.1", port)
+        while True:
+            await asyncio.sleep(3600)
+    asyncio.run(run())
+
+
+def start_in_subprocess(args, timeout: float = 30.0) -> Tuple[multiprocessing.Process, str]:
+    """Runs the simulator in its own process (so it never shares the loop under test)."""
+    port = free_port()
+    proc = multiprocessing.Process(target=_serve_forever, args=(args, port), daemon=True)
+    proc.start()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return proc, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.05)
+    proc.terminate()
+    raise RuntimeError("simulator did not start")
+
+
+async def capture(directory: str):
+    """Saves one real response per endpoint so the simulator can serve recorded payloads offline."""
+    import aiohttp
+    os.makedirs(directory, exist_ok=True)
+    async with aiohttp.ClientSession() as session:
+        for venue, eps in ENDPOINTS.items():
+            for host, path, _ in eps:
+                url = f"https://{host}{path}"
+                try:
+                    if host == "api.hyperliquid.xyz":
+                        resp = await session.post(url, json={"type": "metaAndAssetCtxs"})
+                    else:
+                        resp = await session.get(url, ssl=False)
+                    body = await resp.read()
+                    if resp.status == 200:
+                        with open(os.path.join(directory, ExchangeSimulator.recorded_name(host, path)), "wb") as f:
+                            f.write(body)
+                    print(f"   {venue:12s} {resp.status} {len(body)} bytes")
+                except Exception as e:
+                    print(f"   {venue:12s} failed: {e}")
+
+
+async def _serve(args):
+    sim = simulator_from_args(args)
+    runner, url = await sim.start(args.host, args.port)
+    print(f"Simulator listening on {url} ({len(sim.routes)} endpoints)")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local exchange simulator")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    serve_p = sub.add_parser("serve")
+    serve_p.add_argument("--host", default="127.0.0.1")
+    serve_p.add_argument("--port", type=int, default=8900)
+    add_profile_args(serve_p)
+    cap_p = sub.add_parser("capture", help="record live payloads for --recorded")
+    cap_p.add_argument("directory")
+    args = parser.parse_args()
+
+    if args.cmd == "serve":
+        asyncio.run(_serve(args))
+    else:
+        asyncio.run(capture(args.directory))
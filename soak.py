@@ -0,0 +1,304 @@
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from simulator import add_profile_args, start_in_subprocess
+from bench_fetch import percentile
+
+# Long-running soak of the full ArbitrageBot (fetch -> history/archive -> calculate -> dashboard ->
+# Telegram) against the local simulator. Samples RSS, open fds, tasks and tracemalloc snapshots
+# over time and reports per-site allocation growth, cycle latency drift and event-loop lag.
+
+
+def parse_duration(text: str) -> float:
+    text = text.strip().lower()
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # peak, not current
+
+
+def open_fds() -> int:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return -1
+
+
+def slope_per_hour(xs: List[float], ys: List[float]) -> float:
+    """Least-squares slope of ys against xs (seconds), scaled to units per hour."""
+    n = len(xs)
+    if n < 2:
+        return 0.0
+    mx, my = sum(xs) / n, sum(ys) / n
+    var = sum((x - mx) ** 2 for x in xs)
+    if not var:
+        return 0.0
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var * 3600
+
+
+def make_soak_fetcher(venue_count: int):
+    from fetcher import AsyncFetcher
+
+    class SoakFetcher(AsyncFetcher):
+        """Fans the 20 real adapters out to `venue_count` venues by aliasing them (Binance-2, ...)."""
+        def adapters(self):
+            real = super().adapters()
+            out = dict(real)
+            names = list(real)
+            k = 0
+            while len(out) < venue_count:
+                name = names[k % len(names)]
+                alias = f"{name}-{k // len(names) + 2}"
+                out[alias] = self._aliased(real[name], alias)
+                k += 1
+            return out
+
+        @staticmethod
+        def _aliased(fn, alias):
+            async def run():
+                rows = await fn()
+                for r in rows:
+                    r.exchange = alias
+                return rows
+            return run
+
+    return SoakFetcher
+
+
+class LoopLagMonitor:
+    """Wakes every `interval` seconds and records how late the loop let it run."""
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.samples: List[float] = []
+        self.skip_next = False
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - expected
+            if self.skip_next:      # the sampler itself blocked the loop; not the bot's fault
+                self.skip_next = False
+                continue
+            self.samples.append(lag)
+
+    def drain(self) -> List[float]:
+        out, self.samples = self.samples, []
+        return out
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+
+async def soak(base_url: str, duration: float, venue_count: int, sample_every: float, warmup: int,
+               alert_rules: Optional[str], data_dir: Optional[str], trace: bool, top: int) -> Dict:
+    from notifier import TelegramNotifier
+    from alert_rules import RuleEngine, load_rule_specs
+    from main import ArbitrageBot, USER_AGENT
+    from history import HistoryStore
+    from archive import SnapshotArchive
+    from web_dashboard import attach_history
+
+    fetcher = make_soak_fetcher(venue_count)(USER_AGENT, base_url=base_url)
+    notifier = TelegramNotifier()
+    notifier.token, notifier.chat_ids = "soak", ["1", "2"]
+    notifier.api_base = f"{base_url}/api.telegram.org"
+    if alert_rules:
+        notifier.rules = RuleEngine(load_rule_specs(alert_rules))
+    bot = ArbitrageBot(fetcher=fetcher, notifier=notifier, persist=False)
+    if data_dir:
+        bot.history = HistoryStore(os.path.join(data_dir, "history.ring"))
+        attach_history(bot.history)
+        bot.archive = SnapshotArchive(os.path.join(data_dir, "archive"))
+    await fetcher.start_session()
+
+    lag = LoopLagMonitor()
+    lag.start()
+    cycles: List[float] = []
+    cycle_at: List[float] = []
+    samples: List[Dict] = []
+    rows = 0
+
+    try:
+        for _ in range(warmup):
+            await bot.run_cycle()
+        lag.drain()
+        gc.collect()
+        baseline = tracemalloc.take_snapshot() if trace else None
+        t0 = time.monotonic()
+        samples.append(_sample(0.0, [], [], rss_bytes(), tracemalloc.get_traced_memory()[0] if trace else 0))
+        _print_sample(samples[-1])
+        next_sample, mark = sample_every, 0
+
+        while time.monotonic() - t0 < duration:
+            rates, _, elapsed = await bot.run_cycle()
+            now = time.monotonic() - t0
+            cycles.append(elapsed)
+            cycle_at.append(now)
+            rows += len(rates)
+            await asyncio.sleep(0)  # let the lag monitor observe the gap between cycles
+
+            if now >= next_sample:
+                traced = tracemalloc.get_traced_memory()[0] if trace else 0
+                samples.append(_sample(now, cycles[mark:], lag.drain(), rss_bytes(), traced))
+                _print_sample(samples[-1])
+                lag.skip_next = True
+                next_sample, mark = now + sample_every, len(cycles)
+    finally:
+        lag.stop()
+        await bot.close()
+
+    growth = []
+    if trace:
+        gc.collect()
+        final = tracemalloc.take_snapshot()
+        grown = sorted((s for s in final.compare_to(baseline, "lineno") if s.size_diff > 0),
+                       key=lambda s: s.size_diff, reverse=True)
+        for stat in grown[:top]:
+            frame = stat.traceback[0]
+            growth.append({"site": f"{os.path.relpath(frame.filename)}:{frame.lineno}",
+                           "size_diff": stat.size_diff, "count_diff": stat.count_diff, "size": stat.size})
+
+    later = samples[1:]
+    wall = sum(cycles)
+    tenth = max(1, len(cycles) // 10)
+    all_lag = [x for s in later for x in s.get("_lag", [])]
+    return {
+        "venues": venue_count,
+        "duration": time.monotonic() - t0,
+        "cycles": len(cycles),
+        "rows_per_cycle": rows / len(cycles) if cycles else 0,
+        "rows_per_sec": rows / wall if wall else 0.0,
+        "cycle": {
+            "p50_ms": percentile(cycles, 0.5) * 1000,
+            "p99_ms": percentile(cycles, 0.99) * 1000,
+            "first_p50_ms": percentile(cycles[:tenth], 0.5) * 1000,
+            "last_p50_ms": percentile(cycles[-tenth:], 0.5) * 1000,
+            "drift_ms_per_hour": slope_per_hour(cycle_at, [c * 1000 for c in cycles]),
+        },
+        "loop_lag": {"p99_ms": percentile(all_lag, 0.99) * 1000, "max_ms": max(all_lag, default=0.0) * 1000},
+        "rss": {
+            "start_mb": samples[0]["rss_mb"] if samples else 0.0,
+            "end_mb": samples[-1]["rss_mb"] if samples else 0.0,
+            "slope_mb_per_hour": slope_per_hour([s["t"] for s in later], [s["rss_mb"] for s in later]),
+        },
+        "fds": {"start": samples[0]["fds"] if samples else 0, "end": samples[-1]["fds"] if samples else 0},
+        "growth": growth,
+        "samples": [{k: v for k, v in s.items() if not k.startswith("_")} for s in samples],
+    }
+
+
+def _sample(t: float, window: List[float], lag_window: List[float], rss: int, traced: int) -> Dict:
+    return {
+        "t": t,
+        "cycles": len(window),
+        "cycle_p50_ms": percentile(window, 0.5) * 1000,
+        "lag_p99_ms": percentile(lag_window, 0.99) * 1000,
+        "lag_max_ms": max(lag_window, default=0.0) * 1000,
+        "rss_mb": rss / 1e6,
+        "traced_mb": traced / 1e6,
+        "fds": open_fds(),
+        "tasks": len(asyncio.all_tasks()),
+        "_lag": lag_window,
+    }
+
+
+def _print_sample(s: Dict):
+    print(f"   t={s['t']:>8.0f}s  cycles={s['cycles']:>5d}  cycle p50 {s['cycle_p50_ms']:>8.1f}ms  "
+          f"lag p99 {s['lag_p99_ms']:>7.1f}ms max {s['lag_max_ms']:>7.1f}ms  rss {s['rss_mb']:>8.1f}MB  "
+          f"traced {s['traced_mb']:>8.1f}MB  fds {s['fds']:>4d}  tasks {s['tasks']:>3d}", flush=True)
+
+
+def print_report(report: Dict):
+    c, r = report["cycle"], report["rss"]
+    print(f"\n🧪 {report['venues']} venues  |  {report['cycles']} cycles in {report['duration']:.0f}s  |  "
+          f"{report['rows_per_cycle']:,.0f} rows/cycle  |  {report['rows_per_sec']:,.0f} rows/s")
+    print(f"   cycle p50 {c['p50_ms']:.1f}ms p99 {c['p99_ms']:.1f}ms  |  first→last p50 "
+          f"{c['first_p50_ms']:.1f}→{c['last_p50_ms']:.1f}ms  |  drift {c['drift_ms_per_hour']:+.1f}ms/h")
+    print(f"   loop lag p99 {report['loop_lag']['p99_ms']:.1f}ms max {report['loop_lag']['max_ms']:.1f}ms")
+    print(f"   rss {r['start_mb']:.1f}→{r['end_mb']:.1f}MB  |  slope {r['slope_mb_per_hour']:+.1f}MB/h  |  "
+          f"fds {report['fds']['start']}→{report['fds']['end']}")
+    if report["growth"]:
+        print(f"\n   {'ALLOCATION SITE':52s} {'Δ size':>12s} {'Δ blocks':>10s} {'now':>12s}")
+        for g in report["growth"]:
+            print(f"   {g['site'][-52:]:52s} {g['size_diff']:>+12,d} {g['count_diff']:>+10,d} {g['size']:>12,d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak ArbitrageBot against the local simulator and track growth")
+    parser.add_argument("--duration", default="10m", help="e.g. 90s, 30m, 6h")
+    parser.add_argument("--venue-count", type=int, default=50, help="real adapters are aliased up to this many venues")
+    parser.add_argument("--sample-every", default="30s")
+    parser.add_argument("--warmup", type=int, default=5, help="cycles before the baseline snapshot")
+    parser.add_argument("--alert-rules", help="ALERT_RULES override (inline JSON or file) for the soaked notifier")
+    parser.add_argument("--data-dir", help="history/archive location (default: a temp dir)")
+    parser.add_argument("--no-persist", action="store_true", help="skip history and archive writes")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="RSS only; tracing slows cycles 2-3x")
+    parser.add_argument("--trace-frames", type=int, default=1)
+    parser.add_argument("--top", type=int, default=15, help="allocation sites to report")
+    parser.add_argument("--max-rss-slope", type=float, help="exit non-zero if RSS grows faster than this (MB/h)")
+    parser.add_argument("--json", help="also write the report to this file")
+    add_profile_args(parser)
+    parser.set_defaults(symbols=2000)
+    args = parser.parse_args()
+
+    if sys.platform != 'win32':
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
+
+    trace = not args.no_tracemalloc
+    if trace:
+        tracemalloc.start(args.trace_frames)
+
+    proc, url = start_in_subprocess(args)
+    tmp = None
+    data_dir = None
+    if not args.no_persist:
+        data_dir = args.data_dir or (tmp := tempfile.TemporaryDirectory(prefix="soak-")).name
+    try:
+        report = asyncio.run(soak(url, parse_duration(args.duration), args.venue_count,
+                                  parse_duration(args.sample_every), args.warmup, args.alert_rules,
+                                  data_dir, trace, args.top))
+    finally:
+        proc.terminate()
+        proc.join()
+        if tmp:
+            tmp.cleanup()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.max_rss_slope is not None and report["rss"]["slope_mb_per_hour"] > args.max_rss_slope:
+        print(f"\n❌ RSS slope {report['rss']['slope_mb_per_hour']:+.1f}MB/h exceeds {args.max_rss_slope}MB/h")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import asyncio
+
+from rich import box
+from rich.columns import Columns
+from rich.console import Console, Group
+from rich.live import Live
+from rich.panel import Panel
+from rich.table import Table
+from rich.text import Text
+
+# Interactive terminal view. Runs as its own task and redraws in place at most `refresh_hz`
+# times per second, and only when a new cycle has completed, so the fetch loop never pays for
+# the TUI. Not imported at all in --headless mode.
+
+
+class TerminalView:
+    def __init__(self, bot, refresh_hz: float = 2.0, rows: int = 20):
+        self.bot = bot
+        self.interval = 1.0 / max(refresh_hz, 0.1)
+        self.rows = rows
+        self.console = Console()
+        self.live = Live(console=self.console, auto_refresh=False, transient=False)
+        self._task = None
+        self._drawn = -1
+
+    def start(self):
+        self.console.print(Panel.fit("[bold green]📈 Positive Funding Monitor Active[/bold green]", border_style="green"))
+        self.live.start()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            if self.bot.cycles != self._drawn:
+                self._drawn = self.bot.cycles
+                self.live.update(self.render(), refresh=True)
+
+    def render(self):
+        bot = self.bot
+        status = bot.last_status
+        summary = Table(box=box.SIMPLE, show_header=False)
+        summary.add_column("Key", style="cyan")
+        summary.add_column("Val", style="bold white")
+        summary.add_row("⏱️ Latency", f"{status.get('elapsed', 0.0):.3f}s")
+        summary.add_row("📡 Points", f"{status.get('rates', 0)}")
+        summary.add_row("📈 Positives", f"{len(bot.latest_opportunities)}")
+        summary.add_row("🔁 Cycles", f"{bot.cycles}")
+        if bot.stage_times:
+            summary.add_row("🧩 Stages", "  ".join(f"{k} {v * 1000:.1f}ms" for k, v in bot.stage_times.items()))
+
+        # Fetch report: one cell per venue
+        cells = []
+        health = bot.fetcher.venue_health() if hasattr(bot.fetcher, "venue_health") else {}
+        for name, count in getattr(bot.fetcher, "venue_counts", {}).items():
+            ok = isinstance(count, int) and count > 0
+            breaker = health.get(name, {})
+            if breaker.get("state", "closed") != "closed":
+                # Open (skipped) or half-open (on trial), with the failure that tripped it
+                style = "red" if breaker["state"] == "open" else "yellow"
+                cells.append(Text(f"{name} ⛔ {breaker['state']} ({breaker['reason']})", style=style))
+                continue
+            age = bot.freshness.get(name, {}).get("age") if hasattr(bot, "freshness") else None
+            age = "" if age is None else f" {age:.1f}s"
+            cells.append(Text(f"{name} {'✅' if ok else '❌'} {count}{age}", style="green" if ok else "red"))
+        venues = Columns(cells, padding=(0, 3))
+
+        parts = [Panel(summary, title="Status"), Panel(venues, title="🔍 Fetch Report")]
+
+        # Display Table: Highest Positive Funding
+        if bot.latest_opportunities:
+            opp_table = Table(title="📈 HIGHEST FUNDING RATES (Positive to 0)", box=box.ROUNDED)
+            opp_table.add_column("#", style="dim")
+            opp_table.add_column("Symbol", style="bold white")
+            opp_table.add_column("Exchange", style="cyan")
+            opp_table.add_column("Funding Rate", justify="right", style="bold green")
+            opp_table.add_column("Price", justify="right", style="yellow")
+            opp_table.add_column("Basis", justify="right")
+            opp_table.add_column("Depth", justify="right", style="cyan")
+            opp_table.add_column("Streak / Persist.", justify="right", style="magenta")
+            for i, o in enumerate(bot.latest_opportunities[:self.rows], 1):
+                # o.short_exchange is where we stored the price string
+                basis = "" if o.basis is None else f"[{'green' if o.basis >= 0 else 'red'}]{o.basis:+.3f}%[/]"
+                depth = "" if o.depth is None else f"${o.depth:,.0f} ({o.executable_apr:.1f}%)"
+                persist = "" if o.persistent_apr is None else f"{o.streak} / {o.persistent_apr:.1f}%"
+                opp_table.add_row(str(i), o.symbol, o.long_exchange, f"{o.long_rate:.4f}%", o.short_exchange, basis, depth,
+                                  persist)
+            parts.append(opp_table)
+        else:
+            parts.append(Text("No positive funding rates found.", style="yellow"))
+        return Group(*parts)
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.live.stop()
@@ -0,0 +1,56 @@
+from alert_rules import RuleEngine
+from models import FundingRate
+
+
+def rate(exchange, symbol, value):
+    return FundingRate(exchange=exchange, symbol=symbol, rate=value, timestamp=0.0)
+
+
+def fired(engine, rows, now):
+    return [(e.kind, e.symbol, e.exchange) for e in engine.evaluate([], rows, now)]
+
+
+def test_rate_rule_fires_once_then_rearms_below_the_band():
+    engine = RuleEngine([{"type": "rate", "min": 0.1, "cooldown": 0, "hysteresis": 0.2}])
+    assert fired(engine, [rate("A", "XUSDT", 0.2)], 0) == [("rate", "XUSDT", "A")]
+    assert fired(engine, [rate("A", "XUSDT", 0.3)], 1) == []
+    assert fired(engine, [rate("A", "XUSDT", 0.09)], 2) == []     # Inside the band: still armed
+    assert fired(engine, [rate("A", "XUSDT", 0.2)], 3) == []
+    assert fired(engine, [rate("A", "XUSDT", 0.05)], 4) == []     # Below 0.08: re-armed
+    assert fired(engine, [rate("A", "XUSDT", 0.2)], 5) == [("rate", "XUSDT", "A")]
+
+
+def test_cooldown_suppresses_a_quick_refire():
+    engine = RuleEngine([{"type": "rate", "min": 0.1, "cooldown": 60}])
+    assert fired(engine, [rate("A", "XUSDT", 0.2)], 0)
+    fired(engine, [rate("A", "XUSDT", 0.0)], 10)
+    assert fired(engine, [rate("A", "XUSDT", 0.2)], 20) == []
+    fired(engine, [rate("A", "XUSDT", 0.0)], 70)
+    assert fired(engine, [rate("A", "XUSDT", 0.2)], 80) == [("rate", "XUSDT", "A")]
+
+
+def test_row_missing_from_the_snapshot_rearms():
+    engine = RuleEngine([{"type": "rate", "min": 0.1, "cooldown": 0}])
+    other = rate("B", "YUSDT", 0.0)
+    assert fired(engine, [rate("A", "XUSDT", 0.2), other], 0) == [("rate", "XUSDT", "A")]
+    assert fired(engine, [other], 1) == []                           # Venue A down / quarantined
+    assert engine.armed_rows == set() and engine.active == {}
+    assert fired(engine, [rate("A", "XUSDT", 0.2), other], 2) == [("rate", "XUSDT", "A")]
+
+
+def test_spread_joins_instruments_on_the_base_and_rearms_when_missing():
+    engine = RuleEngine([{"type": "spread", "min": 0.05, "cooldown": 0, "symbols": ["BTCUSDT"]}])
+    rows = [rate("A", "BTCUSDT", 0.01), rate("B", "BTCUSD_INV", 0.08), rate("C", "ETHUSDT", 0.5),
+            rate("D", "ETHUSDC", -0.5)]
+    events = engine.evaluate([], rows, 0)
+    assert [(e.symbol, e.exchange) for e in events] == [("BTC", "B/A")]    # ETH is filtered out
+    assert events[0].detail.startswith("BTCUSD_INV")
+    assert engine.evaluate([], rows, 1) == []
+    assert engine.evaluate([], rows[2:], 2) == []                           # BTC gone
+    assert [e.symbol for e in engine.evaluate([], rows, 3)] == ["BTC"]
+
+
+def test_symbol_filters_accept_a_base_asset():
+    engine = RuleEngine([{"type": "rate", "min": 0.1, "cooldown": 0, "symbols": ["BTC"]}])
+    rows = [rate("A", "BTCUSDC", 0.2), rate("A", "ETHUSDT", 0.2)]
+    assert fired(engine, rows, 0) == [("rate", "BTCUSDC", "A")]
@@ -0,0 +1,129 @@
+import os
+from array import array
+
+from archive import (COLUMNS, SEGMENT_SUFFIX, ArchiveReader, Segment, _level, compact_partitions, parse_date,
+                     write_segment)
+
+DAY = "2025-01-01"
+T0 = parse_date(DAY)
+
+
+def flush(directory, n, snapshots, symbols=("BTCUSDT", "ETHUSDT")):
+    """One level-0 segment holding `snapshots` (absolute times) for `symbols`."""
+    blocks = {}
+    for sym in symbols:
+        blocks[sym] = {"snapshot_ts": array("d", snapshots), "ts": array("d", [t + 0.5 for t in snapshots]),
+                       "rate": array("d", [t / 1e6 for t in snapshots]), "price": array("d", [1.0] * len(snapshots))}
+    write_segment(os.path.join(directory, f"seg-{1000 + n:013d}-abcdef{SEGMENT_SUFFIX}"), blocks)
+
+
+def partition(root, exchange="Binance"):
+    directory = os.path.join(root, DAY, exchange)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def listing(directory):
+    return sorted(os.listdir(directory))
+
+
+def test_level_names():
+    assert _level("seg-1-abc.dcol") == 0
+    assert _level("seg-1-abc-c.dcol") == 1        # Written before levels existed
+    assert _level("seg-1-abc-c1.dcol") == 1
+    assert _level("seg-1-abc-c3.dcol") == 3
+    assert _level("seg-1700000000000-c01234.dcol") == 0     # A flushed uuid that starts with c
+    assert _level("seg-1700000000000-c01234-c2.dcol") == 2
+
+
+def test_flushed_segment_with_a_c_digits_uuid_is_merged_and_keeps_its_name(tmp_path):
+    directory = partition(tmp_path)
+    names = ["seg-1700000000000-c01234", "seg-1700000000001-abcdef"]
+    for n, name in enumerate(names):
+        write_segment(os.path.join(directory, name + SEGMENT_SUFFIX),
+                      {"BTCUSDT": {c: array("d", [T0 + n]) for c in COLUMNS}})
+    assert compact_partitions(str(tmp_path), 2) == 2
+    assert listing(directory) == [f"seg-1700000000000-c01234-c1{SEGMENT_SUFFIX}"]
+
+
+def test_below_min_segments_nothing_is_merged(tmp_path):
+    directory = partition(tmp_path)
+    for n in range(3):
+        flush(directory, n, [T0 + n])
+    assert compact_partitions(str(tmp_path), 4) == 0
+    assert len(listing(directory)) == 3
+
+
+def test_compacted_segments_are_not_rewritten_by_later_passes(tmp_path):
+    directory = partition(tmp_path)
+    for n in range(4):
+        flush(directory, n, [T0 + n])
+    assert compact_partitions(str(tmp_path), 4) == 4
+    [first] = listing(directory)
+    assert _level(first) == 1
+    before = os.stat(os.path.join(directory, first)).st_mtime_ns
+
+    # Three more flushes: below the threshold for level 0, and the level-1 segment stays as is
+    for n in range(4, 7):
+        flush(directory, n, [T0 + n])
+    assert compact_partitions(str(tmp_path), 4) == 0
+    assert os.stat(os.path.join(directory, first)).st_mtime_ns == before
+
+
+def test_levels_cascade(tmp_path):
+    directory = partition(tmp_path)
+    n = 0
+    for _ in range(4):
+        for _ in range(4):
+            flush(directory, n, [T0 + n])
+            n += 1
+        compact_partitions(str(tmp_path), 4)
+    [only] = listing(directory)
+    assert _level(only) == 2
+    seg = Segment(os.path.join(directory, only))
+    cols = seg.read("BTCUSDT")
+    seg.close()
+    assert list(cols["snapshot_ts"]) == [T0 + i for i in range(16)]
+
+
+def test_merge_restores_snapshot_order_across_columns(tmp_path):
+    directory = partition(tmp_path)
+    flush(directory, 0, [T0 + 10, T0 + 11])
+    flush(directory, 1, [T0 + 2, T0 + 3])      # Flushed later but older (e.g. a backfill)
+    compact_partitions(str(tmp_path), 2)
+    [merged] = listing(directory)
+    seg = Segment(os.path.join(directory, merged))
+    cols = seg.read("ETHUSDT")
+    seg.close()
+    assert list(cols["snapshot_ts"]) == [T0 + 2, T0 + 3, T0 + 10, T0 + 11]
+    assert list(cols["ts"]) == [t + 0.5 for t in cols["snapshot_ts"]]
+    assert list(cols["rate"]) == [t / 1e6 for t in cols["snapshot_ts"]]
+    assert set(cols) == set(COLUMNS)
+
+
+def test_reader_sees_same_rows_before_and_after_compaction(tmp_path):
+    for exchange in ("Binance", "OKX"):
+        directory = partition(tmp_path, exchange)
+        for n in range(5):
+            flush(directory, n, [T0 + 2 * n, T0 + 2 * n + 1])
+    reader = ArchiveReader(str(tmp_path))
+    before_scan = list(reader.scan("BTCUSDT", T0, T0 + 86399))
+    before_snapshots = list(reader.snapshots(T0, T0 + 86399))
+    assert compact_partitions(str(tmp_path), 2) == 10
+    assert list(reader.scan("BTCUSDT", T0, T0 + 86399)) == before_scan
+    assert list(reader.snapshots(T0, T0 + 86399)) == before_snapshots
+    assert len(before_scan) == 20 and len(before_snapshots) == 10
+
+
+def test_segment_listed_before_a_compaction_stays_readable(tmp_path):
+    directory = partition(tmp_path)
+    for n in range(2):
+        flush(directory, n, [T0 + n])
+    reader = ArchiveReader(str(tmp_path))
+    listed = list(reader.segments(T0, T0 + 86399))
+    compact_partitions(str(tmp_path), 2)       # Removes both files the query already listed
+    rows = []
+    for _, seg in listed:
+        rows.extend(seg.read("BTCUSDT")["snapshot_ts"])
+        seg.close()
+    assert rows == [T0, T0 + 1]
@@ -0,0 +1,102 @@
+import struct
+
+import pytest
+
+from bus import _HEAD, _LEN, DELTA, KEYFRAME, Decoder, _Encoder, encode_frame
+from models import FundingRate
+
+
+def rows_v1():
+    # Binance: one payload stamp for every row; OKX: per-row stamps; dYdX: none, no prices
+    return [
+        FundingRate(exchange="Binance", symbol="BTCUSDT", rate=0.01, timestamp=100.0, mark_price=60000.0,
+                    index_price=59990.0, last_price=60001.0, next_funding_time=28800.0, venue_ts=99.5),
+        FundingRate(exchange="Binance", symbol="ETHUSDT", rate=-0.002, timestamp=100.0, mark_price=3000.0,
+                    next_funding_time=28800.0, venue_ts=99.5),
+        FundingRate(exchange="OKX", symbol="BTCUSDT", rate=0.012, timestamp=100.2, last_price=60002.0,
+                    next_funding_time=28800.0, venue_ts=99.1),
+        FundingRate(exchange="OKX", symbol="BTCUSD_INV", rate=0.011, timestamp=100.2, venue_ts=98.7),
+        FundingRate(exchange="OKX", symbol="ETHUSDT", rate=0.003, timestamp=100.2),
+        FundingRate(exchange="dYdX", symbol="BTCUSD", rate=0.001, timestamp=100.4),
+    ]
+
+
+def roundtrip(encoder, decoder, seq, rates, keyframe, counts=None, dates=None):
+    counts = counts if counts is not None else {r.exchange: 1 for r in rates}
+    body, _ = encoder.encode(rates, counts, keyframe, dates)
+    frame = encode_frame(KEYFRAME if keyframe else DELTA, seq, 123.0, body)
+    decoder.apply(frame[_LEN.size:])
+    return decoder.rates()
+
+
+def assert_same(decoded, expected):
+    key = lambda r: (r.exchange, r.symbol)
+    decoded, expected = sorted(decoded, key=key), sorted(expected, key=key)
+    assert len(decoded) == len(expected)
+    for got, want in zip(decoded, expected):
+        for field in FundingRate.model_fields:
+            assert getattr(got, field) == getattr(want, field), (want.exchange, want.symbol, field)
+
+
+def test_keyframe_roundtrip_keeps_every_field():
+    encoder, decoder = _Encoder(), Decoder()
+    assert_same(roundtrip(encoder, decoder, 0, rows_v1(), True), rows_v1())
+
+
+def test_deltas_track_moving_stamps_and_settlements():
+    encoder, decoder = _Encoder(), Decoder()
+    roundtrip(encoder, decoder, 0, rows_v1(), True)
+
+    # Next poll: payload stamp and receive time move, prices do not, one settlement passes, one
+    # OKX row loses its stamp, one row disappears
+    rows = [r.model_copy(update={"timestamp": r.timestamp + 5}) for r in rows_v1()[:-1]]
+    rows[0] = rows[0].model_copy(update={"venue_ts": 104.5})
+    rows[1] = rows[1].model_copy(update={"venue_ts": 104.5, "next_funding_time": 57600.0})
+    rows[3] = rows[3].model_copy(update={"venue_ts": None})
+    body, upserted = encoder.encode(rows, {"Binance": 2, "OKX": 3, "dYdX": "ERR"}, False)
+    decoder.apply(encode_frame(DELTA, 1, 124.0, body)[_LEN.size:])
+    assert_same(decoder.rates(), rows)
+    # BTCUSDT on Binance inherits the venue stamp and is not re-sent; ETHUSDT's settlement is
+    assert upserted == 2
+    assert decoder.venue_counts() == {"Binance": 2, "OKX": 3, "dYdX": "ERR"}
+
+
+def test_small_price_moves_are_not_resent():
+    encoder, decoder = _Encoder(), Decoder()
+    roundtrip(encoder, decoder, 0, rows_v1(), True)
+    rows = rows_v1()
+    rows[0] = rows[0].model_copy(update={"mark_price": 60000.5})
+    _, upserted = encoder.encode(rows, {r.exchange: 1 for r in rows}, False)
+    assert upserted == 0
+
+
+def test_venue_dates_ride_along():
+    encoder, decoder = _Encoder(), Decoder()
+    roundtrip(encoder, decoder, 0, rows_v1(), True, dates={"dYdX": 99.0})
+    assert decoder.venue_dates() == {"dYdX": 99.0}
+
+
+def test_names_longer_than_255_bytes_roundtrip():
+    rows = [FundingRate(exchange="É" * 200, symbol="S" * 300 + "USDT", rate=0.01, timestamp=100.0)]
+    encoder, decoder = _Encoder(), Decoder()
+    assert_same(roundtrip(encoder, decoder, 0, rows, True), rows)
+
+
+def test_late_joiner_keyframe_from_full_state():
+    encoder = _Encoder()
+    roundtrip(encoder, Decoder(), 0, rows_v1(), True)
+    late = Decoder()
+    late.apply(encode_frame(KEYFRAME, 0, 123.0, encoder.full_state())[_LEN.size:])
+    assert_same(late.rates(), rows_v1())
+
+
+def test_out_of_sequence_and_foreign_version_frames_are_rejected():
+    encoder, decoder = _Encoder(), Decoder()
+    roundtrip(encoder, decoder, 0, rows_v1(), True)
+    body, _ = encoder.encode(rows_v1(), {}, False)
+    with pytest.raises(ValueError):
+        decoder.apply(encode_frame(DELTA, 5, 124.0, body)[_LEN.size:])
+    old = struct.pack("<BBQd", 1, KEYFRAME, 0, 0.0)
+    assert len(old) == _HEAD.size
+    with pytest.raises(ValueError):
+        Decoder().apply(old)
@@ -0,0 +1,44 @@
+from circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def test_opens_after_the_threshold_for_the_kind():
+    breaker = CircuitBreaker("A")
+    breaker.failure("timeout", 0)
+    breaker.failure("timeout", 1)
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.failure("timeout", 2)
+    assert breaker.state == OPEN and not breaker.allow()
+    assert 2 + 30 * 0.8 <= breaker.probe_at <= 2 + 30 * 1.2
+
+    blocked = CircuitBreaker("B")
+    blocked.failure("blocked", 0)
+    blocked.failure("blocked", 0)
+    assert blocked.state == OPEN and blocked.reason == "blocked"
+
+
+def test_success_resets_the_streak():
+    breaker = CircuitBreaker("A")
+    breaker.failure("timeout", 0)
+    breaker.failure("timeout", 1)
+    breaker.success()
+    breaker.failure("timeout", 2)
+    assert breaker.state == CLOSED and breaker.streak == 1
+
+
+def test_probe_then_trial_closes_or_reopens_with_a_longer_wait():
+    breaker = CircuitBreaker("A")
+    for t in range(3):
+        breaker.failure("http", t)
+    assert not breaker.probe_due(breaker.probe_at - 1) and breaker.probe_due(breaker.probe_at)
+
+    breaker.probed(False, "connection", 100)
+    assert breaker.state == OPEN and 100 + 60 * 0.8 <= breaker.probe_at <= 100 + 60 * 1.2
+
+    breaker.probed(True, "", 200)
+    assert breaker.state == HALF_OPEN and breaker.allow()
+    breaker.failure("http", 201)         # A failed trial reopens at once
+    assert breaker.state == OPEN and 201 + 120 * 0.8 <= breaker.probe_at <= 201 + 120 * 1.2
+
+    breaker.probed(True, "", 400)
+    breaker.success()
+    assert breaker.state == CLOSED and breaker.opened == 0 and breaker.snapshot() == {"state": CLOSED, "reason": ""}
@@ -0,0 +1,36 @@
+from history import KEY_BYTES, HistoryStore
+
+
+def test_series_keep_their_slot_across_restarts(tmp_path):
+    path = str(tmp_path / "history.bin")
+    store = HistoryStore(path, capacity=8)
+    assert store.append("Binance", "BTCUSDT", 1.0, 0.01)
+    assert store.append("OKX", "ÉTHUSDT", 1.0, 0.02)     # Multibyte names round-trip
+    store.close()
+
+    store = HistoryStore(path, capacity=8)
+    assert store.append("Binance", "BTCUSDT", 100.0, 0.03)
+    assert store.append("OKX", "ÉTHUSDT", 100.0, 0.04)
+    assert store._allocated == 2
+    assert [s[1] for s in store.read("Binance", "BTCUSDT")] == [0.01, 0.03]
+    assert [s[1] for s in store.read("OKX", "ÉTHUSDT")] == [0.02, 0.04]
+    assert store.exchanges_for("ÉTHUSDT") == ["OKX"]
+    store.close()
+
+
+def test_keys_longer_than_a_slot_header_are_rejected(tmp_path):
+    path = str(tmp_path / "history.bin")
+    store = HistoryStore(path, capacity=8)
+    symbol = "Ü" * KEY_BYTES      # 2 bytes per character: truncation would split one
+    assert not store.append("Binance", symbol, 1.0, 0.01)
+    assert not store.append("Binance", symbol, 2.0, 0.02)
+    assert store.read("Binance", symbol) == []
+    fits = "X" * (KEY_BYTES - len("Binance|"))
+    assert store.append("Binance", fits, 1.0, 0.01)
+    store.close()
+
+    store = HistoryStore(path, capacity=8)
+    assert not store.append("Binance", symbol, 3.0, 0.03)
+    assert store.append("Binance", fits, 100.0, 0.02)
+    assert store._allocated == 1
+    store.close()
@@ -0,0 +1,47 @@
+import instruments
+from bench_parsers import build_cases
+from fetcher import AsyncFetcher
+from instruments import Instrument, base, from_name, parse, symbol
+
+
+def test_symbol_resolves_aliases_and_marks_inverse():
+    assert symbol("XBT", "USD") == "BTCUSD"
+    assert symbol("BTC", "USD", inverse=True) == "BTCUSD_INV"
+    assert symbol("ETH", "USDC") == "ETHUSDC"
+
+
+def test_parse_prefers_the_longest_quote():
+    assert parse("BTCUSDT") == Instrument("BTC", "USDT", False)
+    assert parse("BTCUSDC") == Instrument("BTC", "USDC", False)
+    assert parse("BTCUSD") == Instrument("BTC", "USD", False)
+    assert parse("BTCUSD_INV") == Instrument("BTC", "USD", True)
+    assert parse("USDT") == Instrument("USDT", "", False)       # A bare quote is not base + quote
+    assert parse("FOO") == Instrument("FOO", "", False)
+
+
+def test_base_joins_every_quote_and_inverse():
+    assert {base(s) for s in ("BTCUSDT", "BTCUSDC", "BTCUSD", "BTCUSD_INV")} == {"BTC"}
+
+
+def test_from_name_strips_separators_and_caches_misses():
+    assert from_name("XBTUSD") == "BTCUSD"
+    assert from_name("BTC_USDC") == "BTCUSDC"
+    assert from_name("BTC-USD", inverse=True) == "BTCUSD_INV"
+    assert from_name("BTCEUR") is None
+    assert "BTCEUR" in instruments._named[False]
+    assert from_name("XBTUSD", inverse=True) == "BTCUSD_INV"      # Separate cache per kind
+
+
+def test_parsers_keep_quotes_and_inverse_contracts_apart():
+    cases = build_cases(AsyncFetcher.__new__(AsyncFetcher), 20)
+    btc = {venue: {r.symbol for r in fn() if base(r.symbol) == "BTC"} for venue, fn in cases.items()}
+    assert btc["OKX"] == {"BTCUSDT", "BTCUSDC", "BTCUSD_INV"}
+    assert btc["Binance"] == {"BTCUSDT", "BTCUSDC"}
+    assert btc["Kraken"] == {"BTCUSD", "BTCUSD_INV"}
+    assert btc["BitMEX"] == {"BTCUSD_INV"}
+    assert btc["Coinbase"] == {"BTCUSDC"}
+    for venue, fn in cases.items():
+        rows = fn()
+        assert rows, venue
+        assert all(parse(r.symbol).quote for r in rows), venue
+        assert len({r.symbol for r in rows}) == len(rows), venue       # One row per instrument
@@ -0,0 +1,34 @@
+import math
+
+import numpy as np
+
+from matrix import decode, encode, matrix_offset
+from models import FundingRate
+
+
+def rows():
+    return [FundingRate(exchange="OKX", symbol="BTCUSDT", rate=0.01, timestamp=0.0),
+            FundingRate(exchange="Binance", symbol="ETHUSDT", rate=-0.25, timestamp=0.0),
+            FundingRate(exchange="Binance", symbol="BTCUSDT", rate=0.5, timestamp=0.0)]
+
+
+def test_roundtrip_with_gaps():
+    m = decode(encode(123.5, rows()))
+    assert m.timestamp == 123.5
+    assert m.exchanges == ["Binance", "OKX"] and m.symbols == ["BTCUSDT", "ETHUSDT"]
+    assert m.rate("Binance", "BTCUSDT") == 0.5 and m.rate("Binance", "ETHUSDT") == -0.25
+    assert abs(m.rate("OKX", "BTCUSDT") - 0.01) < 1e-8
+    assert math.isnan(m.rate("OKX", "ETHUSDT"))
+
+
+def test_matrix_is_aligned_for_a_zero_copy_view():
+    body = encode(0.0, rows())
+    offset = matrix_offset(body)
+    assert offset % 4 == 0
+    view = np.frombuffer(body, "<f4", count=4, offset=offset).reshape(2, 2)
+    assert view[0, 0] == 0.5 and np.isnan(view[1, 1])
+
+
+def test_empty_snapshot():
+    m = decode(encode(1.0, []))
+    assert m.exchanges == [] and m.symbols == [] and len(m.values) == 0
@@ -0,0 +1,58 @@
+import asyncio
+
+from notifier import TelegramNotifier, TokenBucket
+
+
+class Response:
+    def __init__(self, status, body=""):
+        self.status, self.body = status, body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def text(self):
+        return self.body
+
+
+class Session:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.posts = []
+
+    def post(self, url, json):
+        self.posts.append(json["chat_id"])
+        return Response(*self.responses.pop(0))
+
+
+def test_pause_extends_but_does_not_stack():
+    bucket = TokenBucket(10.0, burst=10)
+    bucket.pause(2.0)
+    bucket.pause(2.0)
+    assert -20.5 < bucket.tokens <= -20.0
+
+
+def test_rate_limit_pauses_every_chat():
+    notifier = TelegramNotifier()
+    notifier.global_limit = TokenBucket(1000.0, burst=1000)
+    notifier.chat_rate = 1000.0
+    session = Session([(429, '{"parameters": {"retry_after": 0.3}}'), (200,), (200,)])
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        times = {}
+
+        async def send(chat_id, after):
+            await asyncio.sleep(after)
+            assert await notifier._send_to(session, "url", chat_id, "hi")
+            times[chat_id] = loop.time()
+
+        start = loop.time()
+        await asyncio.gather(send("1", 0.0), send("2", 0.05))
+        return {chat_id: t - start for chat_id, t in times.items()}
+
+    times = asyncio.run(run())
+    assert sorted(session.posts) == ["1", "1", "2"]
+    assert times["1"] >= 0.3 and times["2"] >= 0.3       # Chat 2 waits out the bot-wide pause too
@@ -0,0 +1,25 @@
+from fetcher import AsyncFetcher
+
+
+def fetcher():
+    return AsyncFetcher.__new__(AsyncFetcher)      # Parsers need no session
+
+
+def kraken(**ticker):
+    return {"result": "success", "serverTime": "2025-01-01T00:00:00.000Z", "tickers": [ticker]}
+
+
+def test_kraken_rate_is_relative_to_the_mark():
+    # fundingRate is USD per contract per hour: 6 USD on a 60000 mark is 0.01%
+    [row] = fetcher().parse_kraken(kraken(symbol="PF_XBTUSD", fundingRate=6.0, markPrice=60000.0))
+    assert row.symbol == "BTCUSD" and abs(row.rate - 0.01) < 1e-12 and row.mark_price == 60000.0
+
+
+def test_kraken_prefers_relative_funding_rate():
+    [row] = fetcher().parse_kraken(kraken(symbol="PI_ETHUSD", fundingRate=0.3, relativeFundingRate=0.0002,
+                                          markPrice=3000.0))
+    assert row.symbol == "ETHUSD_INV" and abs(row.rate - 0.02) < 1e-12
+
+
+def test_kraken_row_without_a_mark_or_relative_rate_is_skipped():
+    assert fetcher().parse_kraken(kraken(symbol="PF_XBTUSD", fundingRate=6.0)) == []
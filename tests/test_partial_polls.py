@@ -0,0 +1,53 @@
+import asyncio
+
+from main import ArbitrageBot
+from models import FundingRate
+from replay import RecordedFetcher
+
+
+class Fetcher:
+    """Serves fixed rows per venue; venues not polled keep their last rows, like AsyncFetcher."""
+    def __init__(self, rows):
+        self.rows = rows
+        self.venue_rows = {}
+
+    async def fetch_all(self, only=None):
+        for name in (self.rows if only is None else only):
+            self.venue_rows[name] = self.rows[name]
+        return [r for rows in self.venue_rows.values() for r in rows]
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, ts, rates):
+        self.calls.append(sorted(r.exchange for r in rates))
+
+    def record(self, rates):
+        self.calls.append(sorted(r.exchange for r in rates))
+
+
+def rate(exchange, value):
+    return FundingRate(exchange=exchange, symbol="BTCUSDT", rate=value, timestamp=0.0)
+
+
+def test_only_polled_venues_are_archived_and_recorded():
+    bot = ArbitrageBot(fetcher=Fetcher({"A": [rate("A", 0.01)], "B": [rate("B", 0.02)]}), persist=False,
+                       background_alerts=False)
+    bot.archive, bot.history = Recorder(), Recorder()
+    asyncio.run(bot.run_cycle())
+    rates, _, _ = asyncio.run(bot.run_cycle(only=["B"]))
+    assert sorted(r.exchange for r in rates) == ["A", "B"]             # Calculation sees both
+    assert bot.archive.calls == [["A", "B"], ["B"]]
+    assert bot.history.calls == [["A", "B"], ["B"]]
+
+
+def test_replay_carries_venues_missing_from_a_snapshot_forward():
+    row = lambda ts, ex, rate: (ts, ex, "BTCUSDT", ts, rate, float("nan"))
+    fetcher = RecordedFetcher(iter([(1.0, [row(1.0, "A", 0.01), row(1.0, "B", 0.02)]), (2.0, [row(2.0, "B", 0.03)])]))
+    asyncio.run(fetcher.fetch_all())
+    assert fetcher.next_venues() == ["B"]
+    rates = asyncio.run(fetcher.fetch_all())
+    assert {(r.exchange, r.rate) for r in rates} == {("A", 0.01), ("B", 0.03)}
+    assert fetcher.exhausted and fetcher.next_venues() == []
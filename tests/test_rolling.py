@@ -0,0 +1,43 @@
+import pytest
+
+from models import FundingRate
+from rolling import RollingStats
+
+
+def row(exchange, rate):
+    return FundingRate(exchange=exchange, symbol="BTCUSD", rate=rate, timestamp=0.0)
+
+
+def test_persistent_apr_uses_each_venues_funding_interval():
+    stats = RollingStats(z=0.0)
+    # 0.01% per 8h and 0.01% per hour: 3 and 24 settlements a day
+    view = stats.update([row("Binance", 0.01), row("Hyperliquid", 0.01)], 1000.0)
+    assert view.persistent_apr[0] == pytest.approx(0.01 * 3 * 365)
+    assert view.persistent_apr[1] == pytest.approx(0.01 * 24 * 365)
+
+
+def test_streak_counts_positive_settlements():
+    stats = RollingStats()
+    t = 8 * 3600.0
+    for n, rate in enumerate([0.01, 0.02, -0.01, 0.01, 0.01]):
+        view = stats.update([row("Binance", rate)], t * n + 1)
+    assert list(view.streak) == [1]
+
+
+def test_view_reports_rates_per_8h_round():
+    stats = RollingStats()
+    view = stats.update([row("Binance", 0.01), row("Hyperliquid", 0.01)], 1000.0)
+    assert list(view.ewma) == pytest.approx([0.01, 0.08])
+    assert list(view.max_24h) == pytest.approx([0.01, 0.08])
+
+
+def test_rows_of_venues_not_polled_are_read_but_not_folded_in():
+    stats = RollingStats()
+    rows = [row("Binance", 0.01), row("OKX", 0.01)]
+    stats.update(rows, 1000.0)
+    later = [row("Binance", 0.03), row("OKX", 0.01)]
+    view = stats.update(later, 1000.0 + 8 * 3600, polled={"Binance"})
+    assert list(view.streak) == [1, 0]               # OKX's settlement was never observed
+    assert stats.last_t[stats._ids["OKX"]["BTCUSD"]] == 1000.0
+    assert view.max_24h[1] == pytest.approx(0.01)
+    assert view.max_24h[0] == pytest.approx(0.03)
@@ -0,0 +1,44 @@
+from models import FundingRate
+from scheduler import PollScheduler, to_8h_basis
+
+
+def rows(next_funding_time):
+    return [FundingRate(exchange="Binance", symbol="BTCUSDT", rate=0.01, timestamp=0.0,
+                        next_funding_time=next_funding_time)]
+
+
+def intervals(scheduler, name, results, now=1000.0):
+    out = []
+    for result in results:
+        scheduler.observe(name, result, now)
+        out.append(scheduler.next_poll[name] - now)
+        now = scheduler.next_poll[name]
+    return out
+
+
+def test_failed_and_empty_polls_back_off_up_to_far():
+    scheduler = PollScheduler(["Binance"], near=5, far=60)
+    assert intervals(scheduler, "Binance", [None, [], None, [], [], []]) == [5, 10, 20, 40, 60, 60]
+
+
+def test_a_poll_with_rows_resets_the_backoff():
+    scheduler = PollScheduler(["Binance"], window=900, near=5, far=300)
+    intervals(scheduler, "Binance", [None, None, None])
+    scheduler.observe("Binance", rows(1000.0 + 10000), 1000.0)
+    assert scheduler.failures == {}
+    assert scheduler.next_poll["Binance"] == 1000.0 + 300      # Far from settlement
+    scheduler.observe("Binance", [], 2000.0)
+    assert scheduler.next_poll["Binance"] == 2000.0 + 5
+
+
+def test_polls_near_settlement_every_near_seconds():
+    scheduler = PollScheduler(["Binance"], window=900, near=5, far=300)
+    scheduler.observe("Binance", rows(1000.0 + 600), 1000.0)
+    assert scheduler.next_poll["Binance"] == 1000.0 + 5
+
+
+def test_hourly_venues_are_scaled_to_the_8h_round():
+    rows = [FundingRate(exchange=name, symbol="BTCUSD", rate=0.01, timestamp=0.0) for name in ("Binance", "Kraken")]
+    out = to_8h_basis(rows)
+    assert out[0] is rows[0]
+    assert abs(out[1].rate - 0.08) < 1e-12 and rows[1].rate == 0.01
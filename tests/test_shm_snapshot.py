@@ -0,0 +1,45 @@
+from shm_snapshot import SharedSnapshot
+
+
+def test_reader_sees_each_publication(tmp_path):
+    path = str(tmp_path / "snap")
+    writer = SharedSnapshot(path, writer=True, slots=2, slot_size=64)
+    reader = SharedSnapshot.open_reader(path)
+    assert reader.read() is None
+    for k in range(1, 5):
+        assert writer.publish(b"payload %d" % k)
+        assert reader.sequence() == k and reader.read() == b"payload %d" % k
+    assert not writer.publish(b"x" * 65)     # Larger than a slot: refused, previous one stays
+    assert reader.read() == b"payload 4"
+    reader.close()
+    writer.close()
+
+
+def test_view_is_invalidated_when_its_slot_is_reused(tmp_path):
+    path = str(tmp_path / "snap")
+    writer = SharedSnapshot(path, writer=True, slots=2, slot_size=64)
+    reader = SharedSnapshot(path)
+    writer.publish(b"first")
+    k, view = reader.read_view()
+    assert bytes(view) == b"first" and reader.valid(k)
+    writer.publish(b"second")                # Other slot: the view is still intact
+    assert reader.valid(k)
+    writer.publish(b"third")                 # Same slot as `first`
+    assert not reader.valid(k)
+    del view
+    reader.close()
+    writer.close()
+
+
+def test_reader_reattaches_after_a_writer_restart(tmp_path):
+    path = str(tmp_path / "snap")
+    old = SharedSnapshot(path, writer=True, slots=2, slot_size=64)
+    reader = SharedSnapshot(path)
+    old.publish(b"old")
+    assert reader.read() == b"old"
+    new = SharedSnapshot(path, writer=True, slots=2, slot_size=64)
+    new.publish(b"new")
+    reader._checked -= 2                     # Past the once-a-second inode check
+    assert reader.read() == b"new"
+    for snap in (reader, old, new):
+        snap.close()
@@ -0,0 +1,91 @@
+import random
+
+import numpy as np
+
+from models import FundingRate
+from validation import Validator, group_median
+
+VENUES_8H = ["Binance", "Bybit", "OKX", "Bitget", "GateIO", "MEXC"]
+
+
+def snapshot(symbols=40, hourly=("Hyperliquid",), scaled=None, seed=1):
+    """Rows for every venue and symbol; hourly venues quote r / 8, `scaled` = (venue, factor)."""
+    rng = random.Random(seed)
+    rows = []
+    for s in range(symbols):
+        base = rng.uniform(-0.02, 0.05)
+        for venue in VENUES_8H + list(hourly):
+            rate = base + rng.gauss(0, 0.002)
+            if venue in hourly:
+                rate /= 8
+            if scaled and venue == scaled[0]:
+                rate *= scaled[1]
+            rows.append(FundingRate(exchange=venue, symbol=f"S{s}USDT", rate=rate, timestamp=0.0))
+    return rows
+
+
+def test_hourly_venues_are_not_rescaled():
+    rows = snapshot(hourly=("Hyperliquid", "dYdX"))
+    clean, report = Validator().run(rows)
+    assert report.scales == {}
+    assert report.quarantined_venues == []
+    assert len(clean) == len(rows)
+    assert [r.rate for r in clean] == [r.rate for r in rows]
+
+
+def test_power_of_ten_unit_error_is_corrected_on_an_hourly_venue_too():
+    rows = snapshot(hourly=("Hyperliquid", "dYdX"), scaled=("dYdX", 100))
+    clean, report = Validator().run(rows)
+    assert report.scales == {"dYdX": 0.01}
+    original = {(r.exchange, r.symbol): r.rate for r in snapshot(hourly=("Hyperliquid", "dYdX"))}
+    for r in clean:
+        assert abs(r.rate - original[(r.exchange, r.symbol)]) < 1e-12
+
+
+def test_ratio_far_from_a_power_of_ten_is_not_rescaled():
+    # A venue on an interval we do not know (2h: 1/4 of consensus) rounds to 10^-1 but is 0.4
+    # decades away from it; a 1/8 ratio is too close to 10^-1 to tell, hence FUNDING_HOURS
+    rows = snapshot(hourly=(), scaled=("OKX", 1 / 4))
+    _, report = Validator().run(rows)
+    assert "OKX" not in report.scales
+
+
+def test_outlier_is_quarantined_and_reported_on_the_venues_basis():
+    rows = snapshot()
+    bad = rows[3].model_copy(update={"rate": 3.0})
+    rows[3] = bad
+    clean, report = Validator().run(rows)
+    assert (bad.exchange, bad.symbol) not in {(r.exchange, r.symbol) for r in clean}
+    assert [o[:3] for o in report.outliers] == [(bad.exchange, bad.symbol, 3.0)]
+
+
+def test_rates_over_max_abs_and_non_finite_rates_are_dropped():
+    rows = [FundingRate(exchange="A", symbol="XUSDT", rate=9.0, timestamp=0.0),
+            FundingRate(exchange="B", symbol="XUSDT", rate=float("nan"), timestamp=0.0),
+            FundingRate(exchange="C", symbol="XUSDT", rate=0.01, timestamp=0.0)]
+    clean, _ = Validator().run(rows)
+    assert [r.exchange for r in clean] == ["C"]
+
+
+def test_consensus_joins_quotes_on_the_base_asset():
+    rows = [FundingRate(exchange=v, symbol=s, rate=0.01, timestamp=0.0)
+            for v, s in [("A", "BTCUSDT"), ("B", "BTCUSDC"), ("C", "BTCUSD_INV")]]
+    rows.append(FundingRate(exchange="D", symbol="BTCUSD", rate=2.0, timestamp=0.0))
+    clean, report = Validator().run(rows)
+    assert report.consensus_symbols == 1
+    assert [o[0] for o in report.outliers] == ["D"]
+
+
+def test_group_median_is_exact_with_an_extreme_value():
+    groups = np.repeat(np.arange(1500), 3)
+    values = np.tile([0.01, 0.03, 0.05], 1500).astype(np.float64)
+    values[0] = 1e12
+    median, counts = group_median(groups, values, 1501)
+    assert median[0] == 0.05
+    assert np.all(median[1:1500] == 0.03)
+    assert np.isnan(median[1500]) and counts[1500] == 0
+
+
+def test_group_median_even_counts():
+    median, _ = group_median(np.array([0, 0, 1, 1, 1, 1]), np.array([4.0, 2.0, 1.0, 9.0, 3.0, 5.0]), 2)
+    assert list(median) == [3.0, 4.0]
@@ -0,0 +1,168 @@
+import logging
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+import instruments
+import metrics
+from models import FundingRate
+from scheduler import per_round as round_factor
+
+# Cross-venue sanity check on every snapshot, before anything is calculated, stored or alerted.
+# One vectorized pass per stage over the whole snapshot:
+#   1. per-asset consensus: median and MAD of the rate across every venue and instrument on the
+#      same base (BTCUSDT, BTCUSDC and BTCUSD_INV agree closely enough to vouch for each other)
+#   2. per-venue scale: the median log10(rate / consensus) over that venue's rows. A venue whose
+#      rates sit consistently a power of ten away (a missing * 100, an extra / 1e8) is rescaled
+#   3. consensus again on the rescaled rates; rows further than max(k * MAD, floor) from it, or
+#      beyond max_abs outright, are quarantined, and so is a whole venue when most of its
+#      comparable rows are outliers (a unit that is not a fixed factor at all)
+# Rates are percent per funding round; venues that settle hourly (scheduler.FUNDING_HOURS) are
+# compared on the 8h basis, so their 1/8-size rates are not mistaken for a unit error. A venue is
+# only rescaled when its median ratio to consensus sits near a whole power of ten. Assets with
+# fewer than `min_venues` rows have no consensus and only face the max_abs cap (per 8h).
+
+logger = logging.getLogger("Validation")
+
+OUTLIERS = metrics.counter("validation_outliers_total", "Rows quarantined as cross-venue outliers", ["exchange"])
+QUARANTINED = metrics.gauge("validation_quarantined_rows", "Rows dropped from the last snapshot")
+VENUE_SCALE = metrics.gauge("validation_venue_scale", "Detected scale correction applied to a venue's rates", ["exchange"])
+VENUE_QUARANTINED = metrics.gauge("validation_venue_quarantined", "1 while a venue's whole snapshot is quarantined", ["exchange"])
+
+MAD_SIGMA = 1.4826   # MAD -> standard deviation for normal data
+
+
+class ValidationReport(NamedTuple):
+    outliers: List[Tuple[str, str, float, float]]   # (exchange, symbol, rate, consensus on the venue's basis)
+    scales: Dict[str, float]                        # venue -> factor applied to its rates
+    quarantined_venues: List[str]
+    consensus_symbols: int                          # base assets with a consensus
+
+
+def group_median(groups: np.ndarray, values: np.ndarray, n_groups: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(median per group, count per group); NaN for empty groups."""
+    # By value, then a stable sort by group: exact, and a radix sort when groups fit in 16 bits
+    # (~4x faster than lexsort). A single float key (group + scaled value) loses resolution once
+    # one extreme row widens the range, which is exactly when the medians matter.
+    by_value = np.argsort(values)
+    keys = groups[by_value]
+    if n_groups <= 1 << 16:
+        keys = keys.astype(np.uint16)
+    v = values[by_value[np.argsort(keys, kind="stable")]]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    has = counts > 0
+    median = np.full(n_groups, np.nan)
+    median[has] = (v[starts[has] + (counts[has] - 1) // 2] + v[starts[has] + counts[has] // 2]) / 2
+    return median, counts
+
+
+class Validator:
+    def __init__(self, k: float = 10.0, floor: float = 0.5, max_abs: float = 5.0, min_venues: int = 3,
+                 min_rows: int = 10):
+        self.k = k                      # MADs (scaled to sigma) from consensus before a row is an outlier
+        self.floor = floor              # ...but never closer than this many percentage points
+        self.max_abs = max_abs          # no venue pays more than this per round
+        self.min_venues = min_venues
+        self.min_rows = min_rows        # comparable rows needed before judging a whole venue
+        self._sym_ids: Dict[str, int] = {}     # symbol -> base asset id. Kept across cycles: the universe barely changes
+        self._base_ids: Dict[str, int] = {}
+        self._ex_ids: Dict[str, int] = {}
+        self._scales: Dict[str, float] = {}
+        self._quarantined: set = set()
+
+    def _consensus(self, sym: np.ndarray, rate: np.ndarray, n_sym: int):
+        median, counts = group_median(sym, rate, n_sym)
+        mad, _ = group_median(sym, np.abs(rate - median[sym]), n_sym)
+        return median, mad, counts >= self.min_venues
+
+    @staticmethod
+    def _ids(ids: Dict[str, int], names: List[str]) -> np.ndarray:
+        try:
+            return np.array([ids[n] for n in names], np.int64)
+        except KeyError:
+            for n in names:
+                ids.setdefault(n, len(ids))
+            return np.array([ids[n] for n in names], np.int64)
+
+    def _bases(self, symbols: List[str]) -> np.ndarray:
+        ids = self._sym_ids
+        try:
+            return np.array([ids[s] for s in symbols], np.int64)
+        except KeyError:
+            for s in symbols:
+                if s not in ids:
+                    ids[s] = self._base_ids.setdefault(instruments.base(s), len(self._base_ids))
+            return np.array([ids[s] for s in symbols], np.int64)
+
+    def run(self, rates: Sequence[FundingRate]) -> Tuple[List[FundingRate], ValidationReport]:
+        if not rates:
+            QUARANTINED.set(0)
+            return list(rates), ValidationReport([], {}, [], 0)
+
+        sym = self._bases([r.symbol for r in rates])
+        ex = self._ids(self._ex_ids, [r.exchange for r in rates])
+        rate = np.array([r.rate for r in rates], np.float64)
+        exchanges = list(self._ex_ids)
+        n_sym, n_ex = len(self._base_ids), len(exchanges)
+        finite = np.isfinite(rate)
+        per_round = np.array([round_factor(name) for name in exchanges])[ex]
+        rate = np.where(finite, rate, 0.0) * per_round
+        sym = np.where(finite, sym, n_sym)     # NaN / inf rows go to a spare group outside every consensus
+        n_sym += 1
+
+        # Scale detection against the raw consensus
+        median, _, has_consensus = self._consensus(sym, rate, n_sym)
+        cons = median[sym]
+        comparable = finite & has_consensus[sym] & (np.abs(cons) > 1e-4) & (rate * cons > 0)
+        log_ratio = np.log10(np.abs(rate[comparable] / cons[comparable]))
+        venue_log, venue_rows = group_median(ex[comparable], log_ratio, n_ex)
+        venue_log = np.nan_to_num(venue_log)
+        whole = np.abs(venue_log - np.rint(venue_log)) < 0.2
+        exponent = np.where((venue_rows >= self.min_rows) & whole, np.rint(venue_log), 0)
+        close = np.abs(log_ratio - exponent[ex[comparable]]) < 0.5
+        agreeing = np.bincount(ex[comparable][close], minlength=n_ex)
+        exponent[agreeing < 0.6 * np.maximum(venue_rows, 1)] = 0
+        factor = 10.0 ** -exponent
+        if (exponent != 0).any():
+            rate = rate * factor[ex]
+
+        # Outliers against the corrected consensus
+        median, mad, has_consensus = self._consensus(sym, rate, n_sym)
+        judged = finite & has_consensus[sym]
+        tolerance = np.maximum(self.k * MAD_SIGMA * mad, self.floor)[sym]
+        outlier = judged & (np.abs(rate - median[sym]) > tolerance)
+        drop = outlier | ~finite | (np.abs(rate) > self.max_abs)
+
+        judged_rows = np.bincount(ex[judged], minlength=n_ex)
+        outlier_rows = np.bincount(ex[outlier], minlength=n_ex)
+        bad_venue = (judged_rows >= self.min_rows) & (outlier_rows > 0.5 * judged_rows)
+        drop |= bad_venue[ex]
+
+        # Report, and rebuild only the rows that changed
+        scales = {exchanges[i]: float(factor[i]) for i in np.flatnonzero(exponent)}
+        quarantined_venues = [exchanges[i] for i in np.flatnonzero(bad_venue)]
+        self._log_changes(scales, quarantined_venues)
+        for i, name in enumerate(exchanges):
+            VENUE_SCALE.set(float(factor[i]), exchange=name)
+            VENUE_QUARANTINED.set(1 if bad_venue[i] else 0, exchange=name)
+        outliers = []
+        for i in np.flatnonzero(outlier & ~bad_venue[ex]):
+            r = rates[i]
+            outliers.append((r.exchange, r.symbol, r.rate, float(median[sym[i]] / per_round[i])))
+            OUTLIERS.inc(exchange=r.exchange)
+        QUARANTINED.set(int(drop.sum()))
+
+        rescaled = factor[ex] != 1.0
+        clean = []
+        for i in np.flatnonzero(~drop):
+            r = rates[i]
+            clean.append(r.model_copy(update={"rate": float(rate[i] / per_round[i])}) if rescaled[i] else r)
+        return clean, ValidationReport(outliers, scales, quarantined_venues, int(has_consensus[:-1].sum()))
+
+    def _log_changes(self, scales: Dict[str, float], quarantined: List[str]):
+        for name in scales.keys() - self._scales.keys():
+            logger.warning(f"{name} rates sit {1 / scales[name]:g}x the cross-venue consensus; multiplying by {scales[name]:g}")
+        for name in set(quarantined) - self._quarantined:
+            logger.warning(f"{name} rates disagree with the other venues; quarantining its snapshot")
+        self._scales, self._quarantined = scales, set(quarantined)
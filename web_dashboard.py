@@ -1,14 +1,25 @@
+import argparse
+import gzip
+import json
 import logging
-from flask import Flask, render_template_string, jsonify
+import math
+import os
+import signal
+import socket
+import sys
 from threading import Lock
 import time
 from collections import Counter
 
+import matrix
+import metrics
+
 # Silence Flask logs
 log = logging.getLogger('werkzeug')
 log.setLevel(logging.ERROR)
 
-app = Flask(__name__)
+# Flask is only imported by create_app(), so modes without the web server never load it
+app = None
 
 # Thread-safe Data Store
 data_lock = Lock()
@@ -23,57 +34,217 @@ latest_data = {
     }
 }
 
-def update_dashboard_data(opportunities, total_pairs_count=0):
+latest_json = json.dumps(latest_data).encode()    # /api/data body, serialised once per update
+latest_matrix = matrix.encode(0, [])               # /api/matrix body, every venue x symbol rate
+_matrix_gzip = (b"", b"")                          # (matrix header, gzipped body), compressed on first request
+
+# Optional funding history (history.HistoryStore), attached by the bot
+history_store = None
+
+# Optional shm_snapshot.SharedSnapshot writers, so dashboard workers in other processes can serve
+shared_data = None
+shared_metrics = None
+shared_matrix = None
+
+def attach_history(store):
+    global history_store
+    history_store = store
+
+def attach_shared_snapshot(data_writer, metrics_writer=None, matrix_writer=None):
+    global shared_data, shared_metrics, shared_matrix
+    shared_data, shared_metrics, shared_matrix = data_writer, metrics_writer, matrix_writer
+    data_writer.publish(latest_json)
+    if matrix_writer is not None:
+        matrix_writer.publish(latest_matrix)
+
+def update_dashboard_data(opportunities, total_pairs_count=0, timestamp=None, stale=False, rates=None, venues=None):
     """
     Updates global data with Positive Funding opportunities.
+    `stale` marks data restored from a checkpoint rather than a live fetch.
+    `rates` (every FundingRate of the cycle) rebuilds the /api/matrix payload; None keeps the last one.
+    `venues` maps each venue to its rows and circuit breaker state (name -> {rows, state, reason}).
     """
-    global latest_data
-    with data_lock:
-        timestamp = time.time()
+    global latest_data, latest_json, latest_matrix
+    timestamp = timestamp or time.time()
+    
+    opps_list = []
+    short_exchanges = []
+    unique_exchanges = set()
+
+    for opp in opportunities:
+        # Logic: Positive Funding Rate (>0)
+        # Strategy: Short Perp (Receive Funding) / Long Spot
+        opps_list.append({
+            "symbol": opp.symbol,
+            "funding_rate": opp.long_rate,      # The positive rate
+            "exchange": opp.long_exchange,      # The exchange to SHORT
+            "price": opp.price,                 # Perp last trade (mark if none), null when the venue has none
+            "basis": opp.basis,                 # Perp vs spot index, %
+            "premium": opp.premium,             # Mark vs index, %
+            "depth": opp.depth,                 # USD bid depth near the top of book (top-K only)
+            "exec_apr": opp.executable_apr,     # APR on the sized position the book absorbs
+            "ewma": opp.ewma,                   # Rolling statistics (rolling.py), null until tracked
+            "stddev": opp.stddev,
+            "min_24h": opp.min_24h,
+            "max_24h": opp.max_24h,
+            "streak": opp.streak,               # Consecutive positive settlements
+            "persistent_apr": opp.persistent_apr,
+            "apr": opp.annualized_spread        # Annualized Yield
+        })
         
-        opps_list = []
-        short_exchanges = []
-        unique_exchanges = set()
-
-        for opp in opportunities:
-            # Logic: Positive Funding Rate (>0)
-            # Strategy: Short Perp (Receive Funding) / Long Spot
-            opps_list.append({
-                "symbol": opp.symbol,
-                "funding_rate": opp.long_rate,      # The positive rate
-                "exchange": opp.long_exchange,      # The exchange to SHORT
-                "price": opp.short_exchange,        # The current price (hack from main.py)
-                "apr": opp.annualized_spread        # Annualized Yield
-            })
-            
-            short_exchanges.append(opp.long_exchange)
-            unique_exchanges.add(opp.long_exchange)
-
-        top_short = Counter(short_exchanges).most_common(1)
-        top_short_name = top_short[0][0] if top_short else "N/A"
-
-        latest_data = {
-            "opportunities": opps_list,
-            "metadata": {
-                "last_update": timestamp,
-                "total_pairs_scanned": total_pairs_count,
-                "active_exchanges": len(unique_exchanges),
-                "top_short_exchange": top_short_name,
-                "count": len(opps_list)
-            }
+        short_exchanges.append(opp.long_exchange)
+        unique_exchanges.add(opp.long_exchange)
+
+    top_short = Counter(short_exchanges).most_common(1)
+    top_short_name = top_short[0][0] if top_short else "N/A"
+
+    data = {
+        "opportunities": opps_list,
+        "metadata": {
+            "last_update": timestamp,
+            "total_pairs_scanned": total_pairs_count,
+            "active_exchanges": len(unique_exchanges),
+            "top_short_exchange": top_short_name,
+            "count": len(opps_list),
+            "stale": stale,
+            "venues": venues or {}
         }
-
-@app.route('/api/data')
-def get_data():
+    }
+    # Serialised here, once, instead of per request; built outside the lock so readers never wait on it
+    payload = json.dumps(data).encode()
+    rate_matrix = matrix.encode(timestamp, rates) if rates is not None else None
     with data_lock:
-        return jsonify(latest_data)
+        latest_data, latest_json = data, payload
+        if rate_matrix is not None:
+            latest_matrix = rate_matrix
+    if shared_data is not None and not shared_data.publish(payload):
+        logging.getLogger("Dashboard").error(f"Snapshot of {len(payload)} bytes exceeds the shared slot size")
+    if shared_matrix is not None and rate_matrix is not None and not shared_matrix.publish(rate_matrix):
+        logging.getLogger("Dashboard").error(f"Matrix of {len(rate_matrix)} bytes exceeds the shared slot size")
+    if shared_metrics is not None:
+        shared_metrics.publish(metrics.render().encode())
+
+def create_app(shared=None, shared_metrics_reader=None, shared_matrix_reader=None):
+    """
+    The dashboard app. In the bot process it serves the module state; a worker process passes
+    SharedSnapshot readers instead and serves whatever the bot last published.
+    """
+    from flask import Flask, Response, render_template_string, jsonify, request
+
+    flask_app = Flask(__name__)
+
+    @flask_app.route('/api/data')
+    def get_data():
+        if shared is not None:
+            body = shared.read() or latest_json
+        else:
+            with data_lock:
+                body = latest_json
+        return Response(body, mimetype="application/json")
+
+    @flask_app.route('/api/matrix')
+    def get_matrix():
+        # Binary layout documented in matrix.py
+        if shared_matrix_reader is not None:
+            body = shared_matrix_reader.read() or latest_matrix
+        else:
+            with data_lock:
+                body = latest_matrix
+        headers = {"X-Matrix-Offset": str(matrix.matrix_offset(body)), "Vary": "Accept-Encoding"}
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            global _matrix_gzip
+            key = body[:matrix.HEADER.size]     # Timestamp and shape identify the cycle
+            if _matrix_gzip[0] != key:
+                _matrix_gzip = (key, gzip.compress(body, 1))
+            body = _matrix_gzip[1]
+            headers["Content-Encoding"] = "gzip"
+        return Response(body, mimetype="application/octet-stream", headers=headers)
+
+    @flask_app.route('/api/history')
+    def get_history():
+        symbol = request.args.get('symbol', '').upper()
+        exchange = request.args.get('exchange')
+        try:
+            since = float(request.args.get('since', 0))
+        except ValueError:
+            return jsonify({"error": "since must be a unix timestamp"}), 400
+
+        if history_store is None:
+            return jsonify({"error": "history disabled"}), 404
+        if not symbol:
+            return jsonify({"error": "symbol is required"}), 400
+
+        exchanges = [exchange] if exchange else history_store.exchanges_for(symbol)
+        series = {}
+        for ex in exchanges:
+            samples = history_store.read(ex, symbol, since)
+            if samples:
+                series[ex] = {
+                    "t": [s[0] for s in samples],
+                    "rate": [s[1] for s in samples],
+                    "price": [None if math.isnan(s[2]) else s[2] for s in samples],
+                }
+        return jsonify({"symbol": symbol, "since": since, "series": series})
+
+    @flask_app.route('/metrics')
+    def get_metrics():
+        body = shared_metrics_reader.read() if shared_metrics_reader is not None else None
+        return Response(body or metrics.render(), mimetype="text/plain; version=0.0.4")
 
-@app.route("/")
-def dashboard():
-    return render_template_string(HTML_TEMPLATE)
+    @flask_app.route("/")
+    def dashboard():
+        return render_template_string(HTML_TEMPLATE)
+
+    return flask_app
 
 def start_flask_app():
-    app.run(host="0.0.0.0", port=5000, debug=False, use_reloader=False)
+    global app
+    app = create_app()
+    app.run(host="0.0.0.0", port=int(os.getenv("WEB_PORT", 5000)), debug=False, use_reloader=False)
+
+def _serve_worker(fd: int, host: str, port: int, shm_path: str):
+    from werkzeug.serving import make_server
+    from shm_snapshot import SharedSnapshot
+
+    data = SharedSnapshot.open_reader(shm_path, wait=30)
+    metrics_reader = SharedSnapshot.open_reader(shm_path + ".metrics", wait=30)
+    matrix_reader = SharedSnapshot.open_reader(shm_path + ".matrix", wait=30)
+    make_server(host, port, create_app(data, metrics_reader, matrix_reader), threaded=True, fd=fd).serve_forever()
+
+def serve_workers(workers: int, host: str, port: int, shm_path: str):
+    """
+    Prefork dashboard server: the parent binds one listening socket and forks `workers`
+    processes that accept on it, each reading the bot's snapshot from shared memory.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _serve_worker(sock.fileno(), host, port, shm_path)
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def stop(sig, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f"Serving dashboard on {host}:{port} with {workers} workers from {shm_path}")
+    for pid in children:
+        os.waitpid(pid, 0)
 
 HTML_TEMPLATE = r"""
 <!DOCTYPE html>
@@ -245,6 +416,7 @@ HTML_TEMPLATE = r"""
                 <div>
                     <div class="text-[10px] text-gray-400 font-mono uppercase tracking-widest mb-1">Top Venue</div>
                     <div id="stat-dom-short" class="text-xl font-medium text-white truncate">Scanning...</div>
+                    <div id="venue-health" class="text-[10px] font-mono text-gray-500 truncate mt-1"></div>
                 </div>
                 <div class="flex justify-between items-end mt-2">
                     <div class="text-[10px] text-gray-500 uppercase">Short Liquidity Source</div>
@@ -276,15 +448,18 @@ HTML_TEMPLATE = r"""
                     <div class="col-span-1">#</div>
                     <div class="col-span-3">Asset</div>
                     <div class="col-span-2 text-right">Funding Rate</div>
-                    <div class="col-span-2 text-right">Yield (APR)</div>
+                    <div class="col-span-2 text-right">APR / Depth</div>
                     <div class="col-span-2 text-center">Exchange</div>
-                    <div class="col-span-2 text-right">Mark Price</div>
+                    <div class="col-span-2 text-right">Price / Basis</div>
                 </div>
 
                 <!-- List -->
-                <div id="opp-list" class="flex-1 overflow-y-auto custom-scroll p-2">
-                    <!-- Loading State -->
-                    <div class="h-full flex flex-col items-center justify-center gap-4 text-gray-600">
+                <div id="opp-list" class="flex-1 overflow-y-auto custom-scroll relative">
+                    <!-- Virtual scroll: spacer sizes the scrollbar, window holds only the visible rows -->
+                    <div id="opp-spacer"></div>
+                    <div id="opp-window" class="absolute top-0 left-0 right-0 px-2"></div>
+                    <!-- Loading / Empty State -->
+                    <div id="opp-empty" class="absolute inset-0 flex flex-col items-center justify-center gap-4 text-gray-600">
                         <span class="loader"></span>
                         <span class="font-mono text-[10px] tracking-widest">AWAITING FEED...</span>
                     </div>
@@ -297,7 +472,8 @@ HTML_TEMPLATE = r"""
                 <!-- Chart -->
                 <div class="glass-card rounded-2xl p-5 flex flex-col h-1/2">
                     <div class="flex justify-between items-center mb-4">
-                        <h3 class="text-[10px] font-mono text-gray-400 uppercase tracking-widest">Yield Distribution</h3>
+                        <h3 id="chart-title" class="text-[10px] font-mono text-gray-400 uppercase tracking-widest">Yield Distribution</h3>
+                        <button id="chart-reset" class="hidden text-[9px] font-mono text-gray-500 hover:text-accent uppercase tracking-widest">&larr; Distribution</button>
                     </div>
                     <div class="flex-1 relative">
                         <canvas id="yieldChart"></canvas>
@@ -308,7 +484,7 @@ HTML_TEMPLATE = r"""
                 <div class="glass-card rounded-2xl p-5 flex-1 flex flex-col relative overflow-hidden">
                     <div class="flex justify-between items-center mb-4">
                         <h3 class="text-[10px] font-mono text-gray-400 uppercase tracking-widest">Top 5 Leaders</h3>
-                        <div class="px-2 py-0.5 bg-success/10 border border-success/20 rounded text-[9px] text-success font-mono">LIVE</div>
+                        <div id="live-badge" class="px-2 py-0.5 bg-success/10 border border-success/20 rounded text-[9px] text-success font-mono">LIVE</div>
                     </div>
                     
                     <div id="top-5-list" class="flex-1 overflow-y-auto space-y-2 pr-1">
@@ -318,8 +494,8 @@ HTML_TEMPLATE = r"""
                     
                     <!-- Footer -->
                     <div class="mt-auto pt-3 border-t border-white/5 flex justify-between items-center text-[9px] text-gray-600 font-mono">
-                        <span>SYSTEM: OPTIMAL</span>
-                        <span>LATENCY: LOW</span>
+                        <span id="render-stats">RENDER: --</span>
+                        <span id="frame-stats">FRAME: --</span>
                     </div>
                 </div>
             </div>
@@ -330,19 +506,42 @@ HTML_TEMPLATE = r"""
     <script>
         // CONFIG
         let chartInstance = null;
+        const ROW_H = 38;          // Fixed row height (px) so the window can be computed without layout
+        const OVERSCAN = 8;        // Extra rows rendered above/below the viewport
+        const CHART_TOP = 15;
+        const params = new URLSearchParams(window.location.search);
+        const SYNTHETIC_ROWS = parseInt(params.get('synthetic') || '0', 10);
 
         const dom = {
             list: document.getElementById('opp-list'),
+            spacer: document.getElementById('opp-spacer'),
+            window: document.getElementById('opp-window'),
+            empty: document.getElementById('opp-empty'),
             stats: {
                 rate: document.getElementById('stat-max-rate'),
                 pairs: document.getElementById('stat-pairs-main'), // Updated ID
                 count: document.getElementById('stat-count'),
-                dom: document.getElementById('stat-dom-short')
+                dom: document.getElementById('stat-dom-short'),
+                health: document.getElementById('venue-health')
             },
             search: document.getElementById('table-search'),
             timer: document.getElementById('funding-timer'),
             clock: document.getElementById('utc-clock'),
-            topList: document.getElementById('top-5-list')
+            topList: document.getElementById('top-5-list'),
+            chartTitle: document.getElementById('chart-title'),
+            chartReset: document.getElementById('chart-reset'),
+            renderStats: document.getElementById('render-stats'),
+            liveBadge: document.getElementById('live-badge'),
+            frameStats: document.getElementById('frame-stats')
+        };
+
+        // Current feed state
+        const state = {
+            opps: [],
+            filtered: [],
+            filter: '',
+            received: false,
+            history: null          // {symbol, exchange} when the chart shows a funding history
         };
 
         // CHART INIT
@@ -389,7 +588,14 @@ HTML_TEMPLATE = r"""
 
         // UTILS
         const fmtPct = (n) => (n).toFixed(4) + '%';
+        const fmtPrice = (p) => p == null ? 'N/A' : '$' + p.toPrecision(6).replace(/(\.\d*?)0+$/, '$1').replace(/\.$/, '');
         const fmtApr = (n) => (n).toFixed(2) + '%';
+        const fmtUsd = (n) => n >= 1e6 ? '$' + (n / 1e6).toFixed(1) + 'M' : n >= 1e3 ? '$' + (n / 1e3).toFixed(0) + 'k' : '$' + n.toFixed(0);
+        const rowKey = (o) => o.exchange + '|' + o.symbol;
+
+        function setText(el, value) {
+            if (el.textContent !== value) el.textContent = value;
+        }
 
         function updateTime() {
             const now = new Date();
@@ -408,111 +614,355 @@ HTML_TEMPLATE = r"""
             dom.timer.innerText = `${hh}:${mm}:${ss}`;
         }
 
+        // ROW POOL
+        // Rows are keyed by exchange|symbol. A row that stays in view keeps its DOM node across
+        // updates and only has changed text patched; rows leaving the view are recycled.
+        const liveRows = new Map();
+        const freeRows = [];
+
+        function createRow() {
+            const el = document.createElement('div');
+            el.className = 'grid grid-cols-12 px-4 items-center border-b border-white/5 hover:bg-white/5 transition-colors group cursor-pointer';
+            el.style.height = ROW_H + 'px';
+            el.innerHTML = `
+                <div class="col-span-1 font-mono text-[10px]" data-f="rank"></div>
+                <div class="col-span-3 flex items-center gap-2">
+                    <div class="w-1 h-1 rounded-full" data-f="dot"></div>
+                    <span class="font-medium text-xs text-gray-200 group-hover:text-white" data-f="symbol"></span>
+                </div>
+                <div class="col-span-2 text-right">
+                    <span class="font-mono text-xs text-white font-medium" data-f="rate"></span>
+                </div>
+                <div class="col-span-2 text-right font-mono leading-tight">
+                    <div class="text-xs text-gray-400" data-f="apr"></div>
+                    <div class="text-[10px] text-gray-600" data-f="depth"></div>
+                </div>
+                <div class="col-span-2 text-center">
+                    <span class="px-1.5 py-0.5 rounded text-[8px] font-bold uppercase bg-white/5 text-gray-400 border border-white/10 group-hover:border-accent/30 group-hover:text-accent transition-all" data-f="exchange"></span>
+                </div>
+                <div class="col-span-2 text-right font-mono text-[10px] leading-tight">
+                    <div class="text-gray-500" data-f="price"></div>
+                    <div data-f="basis"></div>
+                </div>
+            `;
+            el._f = {};
+            el.querySelectorAll('[data-f]').forEach(n => { el._f[n.dataset.f] = n; });
+            el._rank = -1;
+            return el;
+        }
+
+        function patchRow(el, o, i) {
+            const f = el._f;
+            if (el._rank !== i) {
+                el._rank = i;
+                setText(f.rank, String(i + 1));
+                f.rank.className = 'col-span-1 font-mono text-[10px] ' + (i === 0 ? 'text-success font-bold' : 'text-gray-600');
+                f.dot.className = 'w-1 h-1 rounded-full ' + (i < 3 ? 'bg-success shadow-[0_0_5px_#00f0ff]' : 'bg-gray-700');
+                el.classList.toggle('bg-gradient-to-r', i < 3);
+                el.classList.toggle('from-white/[0.02]', i < 3);
+                el.classList.toggle('to-transparent', i < 3);
+            }
+            el._opp = o;
+            setText(f.symbol, o.symbol);
+            setText(f.rate, fmtPct(o.funding_rate));
+            setText(f.apr, fmtApr(o.apr));
+            // Book depth and the APR it supports, for the top-K candidates the bot checked
+            setText(f.depth, o.depth == null ? '' : fmtUsd(o.depth) + ' · ' + fmtApr(o.exec_apr));
+            setText(f.exchange, o.exchange);
+            setText(f.price, fmtPrice(o.price));
+            setText(f.basis, o.basis == null ? '' : (o.basis >= 0 ? '+' : '') + o.basis.toFixed(3) + '%');
+            f.basis.className = o.basis == null ? '' : (o.basis >= 0 ? 'text-success/70' : 'text-red-400/70');
+        }
+
+        // Renders only the rows intersecting the viewport (plus overscan)
+        function renderWindow() {
+            const rows = state.filtered;
+            const total = rows.length;
+            const height = total * ROW_H;
+            if (dom.spacer._h !== height) {
+                dom.spacer._h = height;
+                dom.spacer.style.height = height + 'px';
+            }
+
+            const viewH = dom.list.clientHeight;
+            const scrollTop = dom.list.scrollTop;
+            const start = Math.max(0, Math.floor(scrollTop / ROW_H) - OVERSCAN);
+            const end = Math.min(total, Math.ceil((scrollTop + viewH) / ROW_H) + OVERSCAN);
+
+            const wanted = new Map();
+            for (let i = start; i < end; i++) wanted.set(rowKey(rows[i]), i);
+
+            // Release rows that left the window
+            for (const [key, el] of liveRows) {
+                if (!wanted.has(key)) {
+                    liveRows.delete(key);
+                    el.remove();
+                    freeRows.push(el);
+                }
+            }
+
+            // Patch / attach rows in order; appendChild on an attached node is a move, not a rebuild
+            let cursor = dom.window.firstChild;
+            for (const [key, i] of wanted) {
+                let el = liveRows.get(key);
+                if (!el) {
+                    el = freeRows.pop() || createRow();
+                    el._rank = -1;
+                    liveRows.set(key, el);
+                }
+                patchRow(el, rows[i], i);
+                if (el !== cursor) {
+                    dom.window.insertBefore(el, cursor);
+                } else {
+                    cursor = cursor.nextSibling;
+                }
+            }
+
+            dom.window.style.transform = `translateY(${start * ROW_H}px)`;
+
+            if (total === 0) {
+                dom.empty.style.display = '';
+                if (state.received) {
+                    dom.empty.innerHTML = '<span class="font-mono text-[10px] tracking-widest">NO ASSETS DETECTED</span>';
+                }
+            } else {
+                dom.empty.style.display = 'none';
+            }
+        }
+
+        function applyFilter() {
+            const filter = state.filter;
+            state.filtered = filter ? state.opps.filter(o => o.symbol.includes(filter)) : state.opps;
+        }
+
+        // Writes points into the existing chart arrays and only redraws when something changed
+        function setChartPoints(newLabels, newValues) {
+            const labels = chartInstance.data.labels;
+            const values = chartInstance.data.datasets[0].data;
+            let changed = labels.length !== newLabels.length;
+            labels.length = newLabels.length;
+            values.length = newLabels.length;
+            for (let i = 0; i < newLabels.length; i++) {
+                if (labels[i] !== newLabels[i]) { labels[i] = newLabels[i]; changed = true; }
+                if (values[i] !== newValues[i]) { values[i] = newValues[i]; changed = true; }
+            }
+            if (changed) chartInstance.update('none');
+        }
+
+        function updateChart() {
+            if (!chartInstance || state.history) return;
+            const top = state.filtered.slice(0, CHART_TOP);
+            setChartPoints(top.map(o => o.symbol), top.map(o => o.funding_rate));
+        }
+
+        // FUNDING HISTORY (/api/history) for the selected row
+        async function updateHistory() {
+            if (!chartInstance || !state.history) return;
+            const h = state.history;
+            const since = Date.now() / 1000 - 24 * 3600;
+            const res = await fetch(`/api/history?symbol=${encodeURIComponent(h.symbol)}&exchange=${encodeURIComponent(h.exchange)}&since=${since}`);
+            if (!res.ok || state.history !== h) return;
+            const data = await res.json();
+            const s = data.series[h.exchange] || { t: [], rate: [] };
+            const labels = s.t.map(ts => new Date(ts * 1000).toISOString().substring(11, 19));
+            setChartPoints(labels, s.rate);
+        }
+
+        function showHistory(o) {
+            state.history = { symbol: o.symbol, exchange: o.exchange };
+            dom.chartTitle.textContent = `${o.symbol} @ ${o.exchange} (24h)`;
+            dom.chartReset.classList.remove('hidden');
+            updateHistory();
+        }
+
+        function showDistribution() {
+            state.history = null;
+            dom.chartTitle.textContent = 'Yield Distribution';
+            dom.chartReset.classList.add('hidden');
+            updateChart();
+        }
+
+        // Top 5 Log: five fixed nodes, patched in place
+        const topRows = [];
+        function updateTop5() {
+            const top5 = state.opps.slice(0, 5);
+            if (top5.length === 0) {
+                if (topRows.length === 0) {
+                    dom.topList.innerHTML = '<div class="text-center py-4 text-[10px] text-gray-600">Scan pending...</div>';
+                }
+                topRows.forEach(el => { el.style.display = 'none'; });
+                return;
+            }
+            if (topRows.length === 0) {
+                dom.topList.innerHTML = '';
+                for (let i = 0; i < 5; i++) {
+                    const el = document.createElement('div');
+                    el.className = 'flex justify-between items-center p-2.5 rounded-lg bg-white/5 border border-white/5 group hover:border-accent/30 transition-all';
+                    el.innerHTML = `
+                        <div class="flex items-center gap-3">
+                            <div class="flex items-center justify-center w-5 h-5 rounded bg-void border border-white/10 text-[9px] font-mono text-accent font-bold">${i+1}</div>
+                            <span class="text-xs text-gray-200 font-medium" data-f="symbol"></span>
+                        </div>
+                        <div class="text-right">
+                            <div class="text-xs text-success font-mono font-bold" data-f="rate"></div>
+                            <div class="text-[8px] text-gray-500 uppercase tracking-wide" data-f="exchange"></div>
+                        </div>
+                    `;
+                    el._f = {};
+                    el.querySelectorAll('[data-f]').forEach(n => { el._f[n.dataset.f] = n; });
+                    dom.topList.appendChild(el);
+                    topRows.push(el);
+                }
+            }
+            topRows.forEach((el, i) => {
+                const o = top5[i];
+                el.style.display = o ? '' : 'none';
+                if (!o) return;
+                setText(el._f.symbol, o.symbol);
+                setText(el._f.rate, fmtPct(o.funding_rate));
+                setText(el._f.exchange, o.exchange);
+            });
+        }
+
+        // SYNTHETIC FEED (?synthetic=5000) for checking render cost without a running bot
+        let syntheticOpps = null;
+        function syntheticData() {
+            if (!syntheticOpps) {
+                const venues = ['Binance', 'Bybit', 'OKX', 'GateIO', 'KuCoin', 'Bitget', 'MEXC', 'BingX', 'Hyperliquid', 'CoinEx'];
+                syntheticOpps = [];
+                for (let i = 0; i < SYNTHETIC_ROWS; i++) {
+                    syntheticOpps.push({
+                        symbol: 'SYN' + i + 'USDT',
+                        exchange: venues[i % venues.length],
+                        funding_rate: Math.random() * 0.5,
+                        price: Math.random() * 100,
+                        basis: (Math.random() - 0.5) * 0.4,
+                        apr: 0
+                    });
+                }
+            }
+            syntheticOpps.forEach(o => {
+                o.funding_rate = Math.max(0.0001, o.funding_rate + (Math.random() - 0.5) * 0.01);
+                o.apr = o.funding_rate * 3 * 365;
+            });
+            syntheticOpps.sort((a, b) => b.funding_rate - a.funding_rate);
+            return {
+                opportunities: syntheticOpps.slice(),
+                metadata: {
+                    count: syntheticOpps.length,
+                    top_short_exchange: 'Synthetic',
+                    total_pairs_scanned: syntheticOpps.length
+                }
+            };
+        }
+
         // CORE RENDER
         async function render() {
             try {
-                const res = await fetch('/api/data');
-                const data = await res.json();
+                let data;
+                if (SYNTHETIC_ROWS > 0) {
+                    data = syntheticData();
+                } else {
+                    const res = await fetch('/api/data');
+                    data = await res.json();
+                }
                 
                 if (!data.metadata) return;
 
+                const t0 = performance.now();
                 const meta = data.metadata;
                 const opps = data.opportunities;
+                state.opps = opps;
+                state.received = true;
 
                 // Stats
                 dom.stats.count.innerText = meta.count;
                 dom.stats.dom.innerText = meta.top_short_exchange;
                 dom.stats.pairs.innerText = meta.total_pairs_scanned.toLocaleString(); // Updated Pairs
+
+                // Venues whose circuit breaker is open (skipped) or half-open (on trial)
+                const down = Object.entries(meta.venues || {}).filter(([, v]) => v.state !== 'closed');
+                dom.stats.health.innerText = down.length
+                    ? down.map(([name, v]) => `${name} ${v.state === 'open' ? 'DOWN' : 'TRIAL'} (${v.reason})`).join(' · ')
+                    : '';
+                dom.stats.health.title = dom.stats.health.innerText;
+                dom.stats.health.classList.toggle('text-red-400', down.length > 0);
+
+                // Restored from a checkpoint until the first live fetch lands
+                dom.liveBadge.innerText = meta.stale ? 'STALE' : 'LIVE';
+                dom.liveBadge.classList.toggle('text-success', !meta.stale);
+                dom.liveBadge.classList.toggle('text-yellow-400', !!meta.stale);
                 
                 if (opps.length > 0) {
-                    dom.stats.rate.innerText = fmtPct(opps[0].funding_rate);
+                    // The top rows are ranked on executable APR, so the highest rate need not be first
+                    let max = opps[0].funding_rate;
+                    for (const o of opps) if (o.funding_rate > max) max = o.funding_rate;
+                    dom.stats.rate.innerText = fmtPct(max);
                 }
 
                 // Table
-                const filter = dom.search.value.toUpperCase();
-                const filtered = opps.filter(o => o.symbol.includes(filter));
-
-                let html = '';
-                filtered.forEach((o, i) => {
-                    let rankClass = "text-gray-600";
-                    let rowClass = "hover:bg-white/5 transition-colors";
-                    
-                    if (i === 0) rankClass = "text-success font-bold";
-                    if (i < 3) rowClass += " bg-gradient-to-r from-white/[0.02] to-transparent";
-
-                    html += `
-                    <div class="grid grid-cols-12 px-6 py-2.5 items-center border-b border-white/5 ${rowClass} group">
-                        <div class="col-span-1 font-mono text-[10px] ${rankClass}">${i+1}</div>
-                        
-                        <div class="col-span-3 flex items-center gap-2">
-                            <div class="w-1 h-1 rounded-full ${i < 3 ? 'bg-success shadow-[0_0_5px_#00f0ff]' : 'bg-gray-700'}"></div>
-                            <span class="font-medium text-xs text-gray-200 group-hover:text-white">${o.symbol}</span>
-                        </div>
-                        
-                        <div class="col-span-2 text-right">
-                            <span class="font-mono text-xs text-white font-medium">${fmtPct(o.funding_rate)}</span>
-                        </div>
-                        
-                        <div class="col-span-2 text-right">
-                            <span class="font-mono text-xs text-gray-400">${fmtApr(o.apr)}</span>
-                        </div>
-                        
-                        <div class="col-span-2 text-center">
-                            <span class="px-1.5 py-0.5 rounded text-[8px] font-bold uppercase bg-white/5 text-gray-400 border border-white/10 group-hover:border-accent/30 group-hover:text-accent transition-all">
-                                ${o.exchange}
-                            </span>
-                        </div>
-                        
-                        <div class="col-span-2 text-right font-mono text-[10px] text-gray-500">
-                            ${o.price}
-                        </div>
-                    </div>
-                    `;
-                });
-
-                if (html === '') html = '<div class="h-full flex items-center justify-center text-[10px] text-gray-600 font-mono tracking-widest">NO ASSETS DETECTED</div>';
-                dom.list.innerHTML = html;
+                applyFilter();
+                renderWindow();
 
                 // Chart Update
-                if (chartInstance && filtered.length > 0) {
-                    const top = filtered.slice(0, 15);
-                    chartInstance.data.labels = top.map(o => o.symbol);
-                    chartInstance.data.datasets[0].data = top.map(o => o.funding_rate);
-                    chartInstance.update('none');
-                }
+                updateChart();
+                updateHistory();
 
                 // Top 5 Log Update
-                const top5 = opps.slice(0, 5);
-                let logHtml = '';
-                if (top5.length > 0) {
-                    top5.forEach((o, i) => {
-                        logHtml += `
-                        <div class="flex justify-between items-center p-2.5 rounded-lg bg-white/5 border border-white/5 group hover:border-accent/30 transition-all">
-                            <div class="flex items-center gap-3">
-                                <div class="flex items-center justify-center w-5 h-5 rounded bg-void border border-white/10 text-[9px] font-mono text-accent font-bold">
-                                    ${i+1}
-                                </div>
-                                <span class="text-xs text-gray-200 font-medium">${o.symbol}</span>
-                            </div>
-                            <div class="text-right">
-                                <div class="text-xs text-success font-mono font-bold">${fmtPct(o.funding_rate)}</div>
-                                <div class="text-[8px] text-gray-500 uppercase tracking-wide">${o.exchange}</div>
-                            </div>
-                        </div>
-                        `;
-                    });
-                } else {
-                    logHtml = '<div class="text-center py-4 text-[10px] text-gray-600">Scan pending...</div>';
-                }
-                dom.topList.innerHTML = logHtml;
+                updateTop5();
+
+                dom.renderStats.textContent = `RENDER: ${(performance.now() - t0).toFixed(1)}ms / ${opps.length} ROWS`;
 
             } catch (e) {
                 console.error(e);
             }
         }
 
+        // FRAME-TIME READOUT: p50/p95/max over the last 120 frames
+        const frameTimes = [];
+        let lastFrame = performance.now();
+        function frameTick(now) {
+            frameTimes.push(now - lastFrame);
+            lastFrame = now;
+            if (frameTimes.length > 120) frameTimes.shift();
+            requestAnimationFrame(frameTick);
+        }
+        function reportFrames() {
+            if (frameTimes.length === 0) return;
+            const sorted = frameTimes.slice().sort((a, b) => a - b);
+            const pick = (q) => sorted[Math.min(sorted.length - 1, Math.floor(q * sorted.length))];
+            dom.frameStats.textContent = `FRAME p50 ${pick(0.5).toFixed(1)} / p95 ${pick(0.95).toFixed(1)} / max ${sorted[sorted.length - 1].toFixed(1)}ms`;
+        }
+
+        // Scrolling and searching only touch the visible window
+        let scrollQueued = false;
+        dom.list.addEventListener('scroll', () => {
+            if (scrollQueued) return;
+            scrollQueued = true;
+            requestAnimationFrame(() => { scrollQueued = false; renderWindow(); });
+        }, { passive: true });
+
+        dom.search.addEventListener('input', () => {
+            state.filter = dom.search.value.toUpperCase();
+            applyFilter();
+            dom.list.scrollTop = 0;
+            renderWindow();
+            updateChart();
+        });
+
+        window.addEventListener('resize', renderWindow);
+
+        dom.window.addEventListener('click', (e) => {
+            let row = e.target;
+            while (row && row.parentNode !== dom.window) row = row.parentNode;
+            if (row && row._opp && SYNTHETIC_ROWS === 0) showHistory(row._opp);
+        });
+        dom.chartReset.addEventListener('click', showDistribution);
+
         // START
         initChart();
+        requestAnimationFrame(frameTick);
+        setInterval(reportFrames, 1000);
         setInterval(updateTime, 1000);
         setInterval(render, 2000);
         render();
@@ -521,3 +971,12 @@ HTML_TEMPLATE = r"""
 </body>
 </html>
 """
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard workers serving the bot's shared-memory snapshot")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("WEB_PORT", 5000)))
+    parser.add_argument("--shm", default=os.getenv("SHM_SNAPSHOT", "/dev/shm/funding-snapshot"))
+    args = parser.parse_args()
+    serve_workers(args.workers, args.host, args.port, args.shm)